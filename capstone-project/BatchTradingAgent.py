@@ -0,0 +1,94 @@
+from TradingAgent import TradingAgent
+from Environment import Environment
+from learn import BatchQLearner
+
+class BatchTradingAgent:
+    """ Learns and trades several independent trading agents (e.g. one per
+        universe) in lockstep date by date. The Q tables of all agents are
+        held in one BatchQLearner so that the actions and Q updates of all
+        agents are computed in one go per step.
+
+        Each agent behaves exactly like a TradingAgent with an ArrayQLearner.
+    """
+
+    def __init__(self, datas, price_item, items, alphas, recorders=None, **agent_args):
+        """ Initialises a trading agent per data panel.
+
+            Arguments:
+            datas -- a list of data panels, one per agent, where items are data
+                    items (e.g. LEVERAGE_ART, or PRICE), major axis are dates and
+                    minor axis are tickers
+            price_item -- a string that represents the name of the stock price item
+            items -- the items to form the state space over (shared by all agents)
+            alphas -- the learning rate for all agents or a list with one per agent
+            recorders -- a TradeRecorder (or None) per agent or None
+            agent_args -- further keyword arguments passed to each TradingAgent
+        """
+        self.__learner = BatchQLearner(len(datas), ["BUY", "SELL"], items, alpha=alphas, \
+                                       bins=Environment.state_bins(items, agent_args.get('discretiser')))
+        recorders = recorders or [None] * len(datas)
+        self.__agents = [TradingAgent(data, price_item, items, None, \
+                                      learner=self.__learner.learner(i), recorder=recorder, **agent_args) \
+                         for i, (data, recorder) in enumerate(zip(datas, recorders))]
+
+    def get_agents(self):
+        return self.__agents
+
+    def get_learner(self):
+        return self.__learner
+
+    def learn(self, periods, reward_offset, logs=None):
+        """ Initially trains all agents for given periods and realises rewards
+            after given offset, see TradingAgent.learn.
+
+            Arguments:
+            logs -- a list per agent to add log messages to (or None) or None
+        """
+        logs = logs or [None] * len(self.__agents)
+        self.__run([agent.learn_steps(periods, reward_offset, log=log) \
+                    for agent, log in zip(self.__agents, logs)])
+
+    def trade(self, reward_offset, logs=None):
+        """ Steps all agents through time and trades, see TradingAgent.trade.
+
+            Arguments:
+            logs -- a list per agent to add log messages to (or None) or None
+        """
+        logs = logs or [None] * len(self.__agents)
+        self.__run([agent.trade_steps(reward_offset, log=log) \
+                    for agent, log in zip(self.__agents, logs)])
+
+    def __run(self, steps):
+        pending = {}
+        for i in range(len(steps)):
+            self.__send(steps, pending, i, None)
+
+        while pending:
+            responses = {}
+
+            choosing = [i for i in sorted(pending.keys()) if pending[i][0] == 'choose']
+            if choosing:
+                actions = self.__learner.get_action_codes_for_states_batch( \
+                    choosing, [pending[i][1] for i in choosing], \
+                    recorders=[self.__agents[i].get_recorder() for i in choosing])
+                responses.update(zip(choosing, actions))
+
+            rewarding = [i for i in sorted(pending.keys()) if pending[i][0] == 'reward']
+            if rewarding:
+                self.__learner.reward_batch(rewarding, \
+                                            [pending[i][1] for i in rewarding], \
+                                            [pending[i][2] for i in rewarding], \
+                                            logs=[pending[i][3] for i in rewarding], \
+                                            recorders=[self.__agents[i].get_recorder() for i in rewarding])
+
+            for i in sorted(pending.keys()):
+                self.__send(steps, pending, i, responses.get(i))
+
+    def __send(self, steps, pending, i, response):
+        try:
+            if i in pending:
+                pending[i] = steps[i].send(response)
+            else:
+                pending[i] = next(steps[i])
+        except StopIteration:
+            pending.pop(i, None)
@@ -0,0 +1,250 @@
+""" Benchmarks the hot paths of the backtest on synthetic data.
+
+    Each case is run for a base size of T dates, N tickers and k state items
+    and again with each of T, N and k scaled up while the others stay at their
+    base size. Results (seconds, throughput and peak memory) are written to a
+    csv file which can be compared against the results of another version:
+
+        python Benchmark.py --output new.csv --compare old.csv
+"""
+import argparse
+import gc
+import timeit
+import tracemalloc
+import numpy as np
+import pandas as pd
+from data import DataPanel
+from data import FinancialDataService
+from Environment import Environment
+from learn import QLearner
+from learn import ArrayQLearner
+from finance import InvestmentPortfolio
+from finance import MinVarianceSolver
+from finance import StreamingCovariance
+from TradingAgent import TradingAgent
+
+class Benchmark:
+    """ Runs the benchmark cases over synthetic panels. """
+
+    actions = ["BUY", "SELL"]
+
+    def __init__(self, dates=500, tickers=30, items=4, scales=(2, 4), repeat=3, seed=0):
+        """
+            Arguments:
+            dates -- the base number of dates T
+            tickers -- the base number of tickers N
+            items -- the base number of state items k
+            scales -- the factors to scale each of T, N and k by
+            repeat -- the number of times to run each case (the fastest counts)
+            seed -- the seed of the synthetic data
+        """
+        self.__base = (dates, tickers, items)
+        self.__scales = scales
+        self.__repeat = repeat
+        self.__seed = seed
+
+    def run(self, cases=None):
+        """ Runs the given cases (all if None) for all sizes and returns a
+            data frame with one row per case and size.
+        """
+        cases = sorted(self.cases().keys()) if cases is None else cases
+        rows = []
+        for size in self.sizes():
+            data = self.synthetic_panel(*size)
+            for case in cases:
+                rows.append(self.__run_case(case, data, size))
+
+        return pd.DataFrame(rows, columns=["CASE", "T", "N", "K", "SECONDS", "UNITS", \
+                                           "UNITS_PER_SECOND", "PEAK_MB"])
+
+    def sizes(self):
+        dates, tickers, items = self.__base
+        sizes = [self.__base]
+        for scale in self.__scales:
+            sizes.append((dates * scale, tickers, items))
+            sizes.append((dates, tickers * scale, items))
+            sizes.append((dates, tickers, items * scale))
+        return sizes
+
+    def synthetic_panel(self, dates, tickers, items):
+        """ Returns a panel with a PRICE item following a random walk, the base
+            items of all derived items of FinancialDataService and k persistent
+            state items ITEM_0 .. ITEM_k-1.
+        """
+        rng = np.random.RandomState(self.__seed)
+        index = pd.bdate_range('2000-01-03', periods=dates)
+        columns = ["T{}".format(i) for i in range(tickers)]
+
+        def frame(values):
+            return pd.DataFrame(values, index=index, columns=columns)
+
+        frames = {"PRICE": frame(100 * np.cumprod(1 + rng.normal(0.0003, 0.015, (dates, tickers)), axis=0))}
+        base_items = set(item for required, computation in FinancialDataService.derived_items.values() \
+                         for item in required)
+        for item in sorted(base_items):
+            frames[item] = frame(np.cumsum(rng.normal(0, 1, (dates, tickers)), axis=0) + 100)
+        for i in range(items):
+            frames[Benchmark.state_item(i)] = frame(np.cumsum(rng.normal(0, 1, (dates, tickers)), axis=0))
+
+        return DataPanel.from_frames(frames)
+
+    @staticmethod
+    def state_item(i):
+        return "ITEM_{}".format(i)
+
+    def cases(self):
+        """ Returns a dictionary from case name to a function which takes the
+            panel and its size, does the work and returns the units of work done.
+        """
+        return {
+            'environment_sense_date': self.environment_sense_date,
+            'environment_sense_date_precomputed': self.environment_sense_date_precomputed,
+            'qlearner': self.qlearner,
+            'array_qlearner': self.array_qlearner,
+            'portfolio_rebalance': self.portfolio_rebalance,
+            'portfolio_returns': self.portfolio_returns,
+            'min_variance': self.min_variance,
+            'trading_agent': self.trading_agent,
+            'financial_data_service': self.financial_data_service
+        }
+
+    def environment_sense_date(self, data, size, precompute=False):
+        items = self.__items(size)
+        environment = Environment(data, items, precompute=precompute)
+        for date in data.dates:
+            environment.sense_date(date)
+        return len(data.dates)
+
+    def environment_sense_date_precomputed(self, data, size):
+        return self.environment_sense_date(data, size, precompute=True)
+
+    def qlearner(self, data, size, learner_class=QLearner):
+        items = self.__items(size)
+        environment = Environment(data, items, precompute=True)
+        learner = learner_class(environment, Benchmark.actions, items)
+        rng = np.random.RandomState(self.__seed)
+        for date in data.dates:
+            states = environment.sense_date(date)
+            learner.get_actions_for_states(states)
+            learner.reward(states, pd.Series(rng.normal(size=len(data.tickers)), index=data.tickers))
+        return len(data.dates)
+
+    def array_qlearner(self, data, size):
+        return self.qlearner(data, size, learner_class=ArrayQLearner)
+
+    def portfolio_rebalance(self, data, size):
+        self.__rebalanced_portfolio(data)
+        return len(data.dates)
+
+    def portfolio_returns(self, data, size):
+        portfolio = self.__rebalanced_portfolio(data)
+        prices = data.get("PRICE").copy()
+        prices["CASH"] = 1.0
+        portfolio.calculate_portfolio_returns(prices)
+        return len(data.dates)
+
+    def min_variance(self, data, size):
+        # rebalances every 5 dates over a BUY set which changes by a few names
+        rng = np.random.RandomState(self.__seed)
+        returns = data.get("PRICE").pct_change()
+        covariance = StreamingCovariance(data.tickers, lookback=255)
+        solver = MinVarianceSolver()
+
+        held = rng.rand(len(data.tickers)) > 0.5
+        for i, row in enumerate(returns.values):
+            covariance.append(row)
+            if i < 255 or i % 5 != 0:
+                continue
+
+            held ^= rng.rand(len(data.tickers)) > 0.9
+            held[rng.randint(len(data.tickers))] = True
+            solver.solve(covariance.covariance(data.tickers[held]))
+        return len(data.dates)
+
+    def trading_agent(self, data, size):
+        # trade assumes 255 learning periods
+        items = self.__items(size)
+        agent = TradingAgent(data, "PRICE", items, 0.5, precompute=True, array_learner=True)
+        agent.learn(255, 5)
+        agent.trade(5)
+        return len(data.dates)
+
+    def financial_data_service(self, data, size):
+        items = ["PRICE"] + sorted(FinancialDataService.derived_items.keys())
+        service = FinancialDataService(lambda items, tickers: data.select(sorted(items)))
+        service.get_data(tickers=list(data.tickers), items=items)
+        return len(data.dates)
+
+    def __items(self, size):
+        return [Benchmark.state_item(i) for i in range(size[2])]
+
+    def __rebalanced_portfolio(self, data):
+        rng = np.random.RandomState(self.__seed)
+        portfolio = InvestmentPortfolio()
+        for date in data.dates[::5]:
+            held = rng.rand(len(data.tickers)) > 0.5
+            portfolio.rebalance(date, pd.Series(rng.rand(held.sum()), index=data.tickers[held]))
+        return portfolio
+
+    def __run_case(self, case, data, size):
+        function = self.cases()[case]
+        seconds = None
+
+        try:
+            # time without tracing allocations as that slows down python code
+            for i in range(self.__repeat):
+                gc.collect()
+                start = timeit.default_timer()
+                units = function(data, size)
+                elapsed = timeit.default_timer() - start
+                seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+            gc.collect()
+            tracemalloc.start()
+            try:
+                function(data, size)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        except ImportError as e:
+            print("Skipping {}: {}".format(case, e))
+            return [case] + list(size) + [np.nan] * 4
+
+        return [case] + list(size) + [seconds, units, units / seconds, peak / 1024.0 ** 2]
+
+    @staticmethod
+    def compare(results, baseline):
+        """ Joins the given results with baseline results on case and size and
+            adds the ratio of seconds and peak memory (above 1 means slower or
+            more memory than the baseline).
+        """
+        keys = ["CASE", "T", "N", "K"]
+        joined = results.merge(baseline, on=keys, how='left', suffixes=("", "_BASELINE"))
+        joined["SECONDS_RATIO"] = joined["SECONDS"] / joined["SECONDS_BASELINE"]
+        joined["PEAK_MB_RATIO"] = joined["PEAK_MB"] / joined["PEAK_MB_BASELINE"]
+        return joined[keys + ["SECONDS", "SECONDS_BASELINE", "SECONDS_RATIO", \
+                              "PEAK_MB", "PEAK_MB_BASELINE", "PEAK_MB_RATIO"]]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks the backtest hot paths on synthetic data.")
+    parser.add_argument("--dates", type=int, default=500, help="base number of dates T")
+    parser.add_argument("--tickers", type=int, default=30, help="base number of tickers N")
+    parser.add_argument("--items", type=int, default=4, help="base number of state items k")
+    parser.add_argument("--scales", type=int, nargs="*", default=[2, 4], help="factors to scale T, N and k by")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the fastest counts")
+    parser.add_argument("--cases", nargs="*", default=None, help="cases to run (default all)")
+    parser.add_argument("--output", default=None, help="csv file to write the results to")
+    parser.add_argument("--compare", default=None, help="csv file with baseline results to compare against")
+    args = parser.parse_args()
+
+    benchmark = Benchmark(args.dates, args.tickers, args.items, tuple(args.scales), args.repeat)
+    results = benchmark.run(args.cases)
+
+    pd.set_option('display.width', 200)
+    print(results.to_string(index=False))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    if args.compare:
+        print(Benchmark.compare(results, pd.read_csv(args.compare)).to_string(index=False))
@@ -1,24 +1,62 @@
+import numpy as np
 import pandas as pd
 from scipy.stats.mstats import zscore
+from data import DateIndex
+from discretise import ZScoreDiscretiser
 
 class Environment:
     """ The environment holds the current date and allows to sense the
         state for given date as well as advance to the next date.
     """
 
-    def __init__(self, data, items):
+    bins = 3
+
+    def __init__(self, data, items, precompute=False, date_index=None, discretiser=None, calendar=None):
         """ Initialises the environment with the underlying data panel and
             the data items to form the state space over.
 
             Arguments:
-            data -- a panel where items are data items (e.g. LEVERAGE_ART, or PRICE),
+            data -- a data panel where items are data items (e.g. LEVERAGE_ART, or PRICE),
                     major axis are dates and minor axis are tickers.
             items -- the items to form the state space over
+            precompute -- if True then the states for all dates are discretised
+                    once up front and sensing becomes a lookup.
+            date_index -- the DateIndex of the dates of the data to share or None
+                    to create one
+            discretiser -- a Discretiser for all items or a dictionary from item
+                    to Discretiser, in which case states are always precomputed,
+                    or None to discretise zscores into Environment.bins bins
+            calendar -- the dates to discretise states on (e.g. the rebalance dates)
+                    in which case states are precomputed and the state at any
+                    date is as of the last calendar date, or None for all dates
         """
         self.__data = data
-        self.__dates = list(data.get(items[0]).index)
+        self.__dates = date_index if date_index is not None else DateIndex(data.get(items[0]).index)
         self.__items = items
         self.__current_date_index = -1
+        self.__states = None
+        self.__calendar = pd.DatetimeIndex(calendar) if calendar is not None else None
+        self.__discretisers = Environment.__discretisers_for(items, discretiser)
+        self.__bins = np.array([d.get_bins() for d in self.__discretisers], dtype=np.int64)
+        self.__multipliers = np.append(np.cumprod(self.__bins[:0:-1])[::-1], 1)
+
+        if precompute or discretiser is not None or calendar is not None:
+            self.__states = self.__discretise_panel()
+
+    @staticmethod
+    def state_bins(items, discretiser=None):
+        """ Returns the number of distinct states of each of given items for
+            given discretiser(s), see the constructor.
+        """
+        return [d.get_bins() for d in Environment.__discretisers_for(items, discretiser)]
+
+    @staticmethod
+    def __discretisers_for(items, discretiser):
+        if discretiser is None:
+            discretiser = ZScoreDiscretiser(Environment.bins, nan_bin=False)
+        if isinstance(discretiser, dict):
+            return [discretiser[item] for item in items]
+        return [discretiser] * len(items)
 
     def advance(self):
         """ Advances one step through time.
@@ -31,18 +69,64 @@ class Environment:
             return None
 
         self.__current_date_index += 1
-        return self.__dates[self.__current_date_index]
+        return self.__dates.date(self.__current_date_index)
+
+    def seek(self, date):
+        """ Sets the current date to given date, hence 'advance' continues
+            with the date after it.
+        """
+        self.__current_date_index = self.__dates.position(date)
+
+    def get_current_date(self):
+        """ Returns the current date or None if not advanced yet. """
+        if self.__current_date_index < 0:
+            return None
+        return self.__dates.date(self.__current_date_index)
+
+    def get_current_position(self):
+        """ Returns the position of the current date or -1 if not advanced yet. """
+        return self.__current_date_index
+
+    def get_date_index(self):
+        return self.__dates
+
+    def get_bins(self):
+        """ Returns the number of distinct states of each item. """
+        return [int(bins) for bins in self.__bins]
+
+    def get_state_count(self):
+        """ Returns the number of distinct state ids, see 'get_state_ids'. """
+        return int(np.prod(self.__bins))
+
+    def get_state_ids(self, date):
+        """ Returns the dense state id (0 .. get_state_count() - 1) of each
+            ticker at given date, reading the bins of the items as the digits
+            of a mixed radix number.
+        """
+        if self.__states is None:
+            states = self.sense_date(date).values
+        else:
+            states = self.__states[self.__state_row(date)]
+            if (states < 0).any():
+                raise ValueError("Could not discretise all items at {}".format(date))
+
+        return self.__multipliers.dot(np.asarray(states, dtype=np.int64))
 
     def sense(self):
         """ Creates the environment space for current date. """
 
-        date = self.__dates[self.__current_date_index]
+        date = self.__dates.date(self.__current_date_index)
         environment = self.sense_date(date)
 
         return environment
 
     def sense_date(self, date):
-        bins = 3
+        """ Creates the environment space for given date. """
+
+        if self.__states is not None:
+            return self.__lookup_date(date)
+
+        bins = Environment.bins
         tickers = self.__data.get(self.__items[0]).columns
 
         environment = pd.DataFrame(index=[self.__items[0]], columns=tickers)
@@ -50,12 +134,57 @@ class Environment:
         # create zscores for each item
         for item in self.__items:
             try:
-                item_data = self.__data.get(item).ix[date].copy()
+                item_data = self.__data.get(item).loc[date].copy()
                 item_data[:] = pd.cut(zscore(item_data), bins=bins, labels=range(bins))
-                environment.ix[item] = item_data
+                environment.loc[item] = item_data
             except ValueError:
                 print("Could not compute zscore for {}".format(item))
                 raise
 
 
         return environment
+
+    def __lookup_date(self, date):
+        tickers = self.__data.get(self.__items[0]).columns
+        states = self.__states[self.__state_row(date)]
+
+        for item, item_states in zip(self.__items, states):
+            if item_states[0] < 0:
+                print("Could not compute zscore for {}".format(item))
+                raise ValueError("Could not compute zscore for {} at {}".format(item, date))
+
+        return pd.DataFrame(states, index=self.__items, columns=tickers)
+
+    def __state_row(self, date):
+        if self.__calendar is None:
+            return self.__dates.position(date)
+
+        row = self.__calendar.searchsorted(date, side='right') - 1
+        if row < 0:
+            raise ValueError("No state as of {} before the first calendar date".format(date))
+        return row
+
+    def __discretise_panel(self):
+        """ Discretises all items for all dates (or the calendar dates) with
+            their discretisers and returns an int8 array of shape (dates, items,
+            tickers). States of cross sections that cannot be discretised (e.g.
+            constant or containing NaN without a NaN bin) are -1.
+        """
+        tickers = self.__data.get(self.__items[0]).columns
+        dates = self.__dates.dates
+        rows = None
+
+        if self.__calendar is not None:
+            # values as of each calendar date
+            rows = dates.searchsorted(self.__calendar, side='right') - 1
+            dates = self.__calendar
+
+        states = np.empty((len(dates), len(self.__items), len(tickers)), dtype=np.int8)
+
+        for i, (item, discretiser) in enumerate(zip(self.__items, self.__discretisers)):
+            values = self.__data.get(item).values
+            if rows is not None:
+                values = np.where((rows >= 0)[:, np.newaxis], values[np.maximum(rows, 0)], np.nan)
+            states[:, i, :] = discretiser.discretise(item, values, dates)
+
+        return states
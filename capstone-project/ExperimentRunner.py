@@ -0,0 +1,134 @@
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from TradingAgent import TradingAgent
+from data import DataPanel
+
+# data panel of the current worker process, see _init_worker
+_worker_data = None
+
+class ExperimentRunner:
+    """ Runs trading agents for a grid of parameters in a pool of processes.
+
+        The data panel is written once to a memory-mapped file which each
+        worker opens read-only, hence the data is not copied per run. Each run
+        seeds its own random number generator so that results do not depend
+        on the number of workers.
+    """
+
+    def __init__(self, data, price_item, processes=None):
+        """
+            Arguments:
+            data -- a data panel where items are data items (e.g. LEVERAGE_ART, or PRICE),
+                    major axis are dates and minor axis are tickers
+            price_item -- a string that represents the name of the stock price item
+            processes -- the number of worker processes (defaults to the cpu count),
+                    1 runs all experiments in the current process
+        """
+        self.__data = data
+        self.__price_item = price_item
+        self.__processes = processes
+
+    def run(self, alphas, reward_offsets, items, seeds, learning_periods=255, \
+            random=False, **agent_args):
+        """ Learns and trades an agent for each combination of the given
+            parameters and returns a data frame with one row per run holding
+            the run parameters, the cumulative return and Sharpe ratio, the
+            portfolio returns series and the learnt Q table.
+
+            Arguments:
+            alphas -- the learning rates to run
+            reward_offsets -- the reward offsets (rebalance frequencies) to run
+            items -- a list of state spaces, each a list of items
+            seeds -- the random seeds to run
+            learning_periods -- the periods to learn for before trading
+            random -- if True the agents trade randomly
+            agent_args -- further keyword arguments passed to each TradingAgent
+        """
+        runs = [dict(alpha=alpha, reward_offset=reward_offset, items=list(state_items), \
+                     seed=seed, learning_periods=learning_periods, random=random, \
+                     agent_args=agent_args) \
+                for alpha, reward_offset, state_items, seed \
+                in itertools.product(alphas, reward_offsets, items, seeds)]
+
+        if self.__processes == 1:
+            _set_worker_data(self.__data)
+            try:
+                results = [_run(run, self.__price_item) for run in runs]
+            finally:
+                _set_worker_data(None)
+        else:
+            results = self.__run_pool(runs)
+
+        frame = pd.DataFrame(index=range(len(runs)), \
+                             columns=["ALPHA", "REWARD_OFFSET", "ITEMS", "SEED", \
+                                      "CUM_RETURN", "SHARPE", "RETURNS", "Q"])
+        for i, (run, result) in enumerate(zip(runs, results)):
+            returns, q_table = result
+            cum_return = (returns + 1).prod() - 1
+            frame.at[i, "ALPHA"] = run["alpha"]
+            frame.at[i, "REWARD_OFFSET"] = run["reward_offset"]
+            frame.at[i, "ITEMS"] = tuple(run["items"])
+            frame.at[i, "SEED"] = run["seed"]
+            frame.at[i, "CUM_RETURN"] = cum_return
+            frame.at[i, "SHARPE"] = cum_return / returns.std()
+            frame.at[i, "RETURNS"] = returns
+            frame.at[i, "Q"] = q_table
+
+        return frame
+
+    def __run_pool(self, runs):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "data.npy")
+            values = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, \
+                                               shape=self.__data.values.shape)
+            values[:] = self.__data.values
+            values.flush()
+            del values
+
+            labels = (list(self.__data.items), self.__data.dates, self.__data.tickers)
+
+            pool = multiprocessing.Pool(self.__processes, initializer=_init_worker, \
+                                        initargs=(path, labels))
+            try:
+                results = pool.map(_run_star, [(run, self.__price_item) for run in runs], \
+                                   chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            shutil.rmtree(directory)
+
+        return results
+
+def _init_worker(path, labels):
+    items, dates, tickers = labels
+    values = np.load(path, mmap_mode='r')
+    _set_worker_data(DataPanel(values, items, dates, tickers))
+
+def _set_worker_data(data):
+    global _worker_data
+    _worker_data = data
+
+def _run_star(args):
+    return _run(*args)
+
+def _run(run, price_item):
+    data = _worker_data
+
+    agent = TradingAgent(data, price_item, run["items"], run["alpha"], \
+                         random=run["random"], seed=run["seed"], **run["agent_args"])
+    if not run["random"]:
+        agent.learn(run["learning_periods"], run["reward_offset"])
+    agent.trade(run["reward_offset"])
+
+    prices = data.get(price_item).copy()
+    prices["CASH"] = 1.0
+    returns = agent.get_portfolio().calculate_portfolio_returns(prices)
+
+    return returns, agent.get_learner().get_q_table()
@@ -0,0 +1,132 @@
+import timeit
+import pandas as pd
+
+class Instrumentation:
+    """ Collects the wall time and number of calls per phase of the trading
+        agent (e.g. sense, choose, rebalance, reward, update) as well as named
+        counters, and passes log messages to attached sinks.
+
+        Hooks are called with the phase name and its duration in seconds after
+        each phase. Sinks are called with each log message; messages may be
+        given as functions returning the message so that they are only
+        formatted if a sink is attached.
+    """
+
+    def __init__(self, hooks=None, sinks=None):
+        """
+            Arguments:
+            hooks -- functions taking a phase name and seconds
+            sinks -- functions taking a log message
+        """
+        self.__hooks = list(hooks or [])
+        self.__sinks = list(sinks or [])
+        self.__phases = {}
+        self.__seconds = {}
+        self.__calls = {}
+        self.__counters = {}
+
+    def phase(self, name):
+        """ Returns a context manager timing the given phase. """
+        phase = self.__phases.get(name)
+        if phase is None:
+            phase = _Phase(self, name)
+            self.__phases[name] = phase
+            self.__seconds[name] = 0.0
+            self.__calls[name] = 0
+        return phase
+
+    def record(self, name, seconds):
+        """ Adds a call of given duration to the given phase. """
+        self.__seconds[name] += seconds
+        self.__calls[name] += 1
+        for hook in self.__hooks:
+            hook(name, seconds)
+
+    def count(self, name, value=1):
+        """ Adds the given value to the given counter. """
+        self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        """ Sets the given counter to the given value. The value may be given
+            as a function returning it so that it is only computed when the
+            counters are read.
+        """
+        self.__counters[name] = value
+
+    @property
+    def logging(self):
+        """ True if log messages are consumed by any sink. """
+        return len(self.__sinks) > 0
+
+    def log(self, message):
+        """ Passes the message (or the result of calling it) to all sinks. """
+        if not self.__sinks:
+            return
+
+        if callable(message):
+            message = message()
+        for sink in self.__sinks:
+            sink(message)
+
+    def add_hook(self, hook):
+        self.__hooks.append(hook)
+
+    def add_sink(self, sink):
+        self.__sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self.__sinks.remove(sink)
+
+    def get_counters(self):
+        return dict((name, value() if callable(value) else value) for name, value in self.__counters.items())
+
+    def summary(self):
+        """ Returns a data frame with the calls, cumulative and mean seconds per phase. """
+        phases = sorted(self.__seconds.keys())
+        summary = pd.DataFrame(index=phases, columns=["CALLS", "SECONDS", "MEAN_SECONDS"], dtype=float)
+        for name in phases:
+            calls = self.__calls[name]
+            summary.loc[name] = [calls, self.__seconds[name], self.__seconds[name] / calls if calls else 0.0]
+        return summary
+
+class NullInstrumentation:
+    """ Instrumentation which records nothing, used when none is attached. """
+
+    logging = False
+
+    def phase(self, name):
+        return _null_phase
+
+    def count(self, name, value=1):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+    def log(self, message):
+        pass
+
+class _Phase:
+
+    def __init__(self, instrumentation, name):
+        self.__instrumentation = instrumentation
+        self.__name = name
+        self.__start = None
+
+    def __enter__(self):
+        self.__start = timeit.default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__instrumentation.record(self.__name, timeit.default_timer() - self.__start)
+        return False
+
+class _NullPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_null_phase = _NullPhase()
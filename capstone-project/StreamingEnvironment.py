@@ -0,0 +1,95 @@
+import collections
+from Environment import Environment
+
+class StreamingEnvironment:
+    """ An environment over a stream of consecutive data panels (e.g. from
+        FlatFileDataService.iter_data) which only retains the states and
+        values of the most recent dates.
+
+        States of each panel are discretised as per Environment when the
+        panel is pulled from the stream.
+    """
+
+    def __init__(self, chunks, items, retain=1, discretiser=None):
+        """ Arguments:
+            chunks -- an iterable of data panels over consecutive dates where items
+                    are data items (e.g. LEVERAGE_ART, or PRICE), major axis are
+                    dates and minor axis are tickers
+            items -- the items to form the state space over
+            retain -- the number of most recent dates to retain states for
+            discretiser -- the discretiser(s) of the items, see Environment
+        """
+        self.__chunks = iter(chunks)
+        self.__items = items
+        self.__discretiser = discretiser
+        self.__chunk = None
+        self.__chunk_environment = None
+        self.__chunk_dates = []
+        self.__chunk_index = 0
+        self.__current_date = None
+        self.__states = collections.OrderedDict()
+        self.__retain = retain
+
+    def get_bins(self):
+        """ Returns the number of distinct states of each item. """
+        return Environment.state_bins(self.__items, self.__discretiser)
+
+    def retain(self, retain):
+        """ Sets the number of most recent dates to retain states for. """
+        self.__retain = max(retain, 1)
+
+    def get_tickers(self):
+        """ Returns the tickers of the current panel. """
+        self.__ensure_chunk()
+        return self.__chunk.tickers
+
+    def advance(self):
+        """ Advances one step through time.
+
+            Yields the next date in time or None if we are at the
+            end of the stream.
+        """
+        if not self.__ensure_chunk():
+            return None
+
+        self.__current_date = self.__chunk_dates[self.__chunk_index]
+        self.__chunk_index += 1
+
+        self.__states[self.__current_date] = self.__chunk_environment.sense_date(self.__current_date)
+        while len(self.__states) > self.__retain:
+            self.__states.popitem(last=False)
+
+        return self.__current_date
+
+    def sense(self):
+        """ Creates the environment space for current date. """
+        return self.__states[self.__current_date]
+
+    def sense_date(self, date):
+        """ Returns the environment space for given date which must be
+            one of the retained dates.
+        """
+        return self.__states[date]
+
+    def get_retained_dates(self):
+        """ Returns the retained dates from oldest to most recent. """
+        return list(self.__states.keys())
+
+    def sense_item(self, item):
+        """ Returns the values of given item for the current date as a series. """
+        return self.__chunk.get(item).loc[self.__current_date]
+
+    def __ensure_chunk(self):
+        while self.__chunk is None or self.__chunk_index >= len(self.__chunk_dates):
+            try:
+                chunk = next(self.__chunks)
+            except StopIteration:
+                return False
+
+            self.__chunk = chunk
+            self.__chunk_environment = Environment(chunk, self.__items, precompute=True, \
+                                                   discretiser=self.__discretiser)
+            self.__chunk_dates = list(chunk.dates)
+            self.__chunk_index = 0
+
+        return True
@@ -0,0 +1,232 @@
+import collections
+import numpy as np
+import pandas as pd
+from StreamingEnvironment import StreamingEnvironment
+from learn import QLearner
+from learn import ArrayQLearner
+from finance import InvestmentPortfolio
+from finance import StreamingCovariance
+from finance import MinVarianceSolver
+from random import Random
+
+class StreamingTradingAgent:
+    """ A trading agent which learns and trades like TradingAgent but pulls its
+        data as a stream of panels and only keeps the returns, states and
+        actions of the most recent dates, hence memory is bounded by the
+        reward offset and covariance lookback rather than the history length.
+
+        The rebalances and realised returns are kept for inspection unless
+        the history is disabled, in which case they can be passed to a sink
+        instead so that nothing grows with the history.
+    """
+
+    def __init__(self, chunks, price_item, items, alpha, random=False, \
+                 array_learner=False, cov_lookback=None, seed=None, discretiser=None, \
+                 history=True, sink=None):
+        """ Initialises the trading agent with its data and items to trade upon.
+
+            Arguments:
+            chunks -- an iterable of data panels over consecutive dates (e.g. from
+                    FlatFileDataService.iter_data)
+            price_item -- a string that represents the name of the stock price item
+            items -- the items to form the state space over
+            alpha -- the learning rate for the q learner
+            random -- will trade randomly if True
+            array_learner -- if True then the Q table is held in a dense array
+                    and actions are chosen for all tickers at once
+            cov_lookback -- the number of periods to estimate the covariance for
+                    the minimum variance portfolio over or None for all history
+                    (which only keeps running sums)
+            seed -- seed for the random number generator used when trading randomly
+            discretiser -- a Discretiser for all items, a dictionary from item to
+                    Discretiser or None to discretise zscores as the Environment does
+                    (fixed edges are learned on the first panel)
+            history -- if True then the rebalances and realised returns are kept
+                    (see get_portfolio and get_performance) which grows with the
+                    number of dates traded
+            sink -- a function called with the kind ('rebalance' or 'return'),
+                    the date and the weights (a series) or the portfolio return
+                    respectively, or None
+        """
+        self.__actions = ["BUY", "SELL"]
+        self.__state_variables = items
+        self.__price_item = price_item
+
+        self.__environment = StreamingEnvironment(chunks, items, discretiser=discretiser)
+        if array_learner:
+            self.__learner = ArrayQLearner(self.__environment, self.__actions, self.__state_variables, alpha=alpha, \
+                                           bins=self.__environment.get_bins())
+        else:
+            self.__learner = QLearner(self.__environment, self.__actions, self.__state_variables, alpha=alpha)
+        self.__tickers = self.__environment.get_tickers()
+        self.__covariance = StreamingCovariance(self.__tickers, lookback=cov_lookback)
+        self.__portfolio = InvestmentPortfolio() if history else None
+        self.__solver = MinVarianceSolver()
+        self.__random = random
+        self.__rng = Random(seed)
+
+        self.__last_prices = None
+        self.__returns = collections.deque()
+        self.__actions_taken = collections.deque()
+        self.__weights = None
+        self.__performance = [] if history else None
+        self.__sink = sink
+        self.__cum_return = 0.0
+
+    def get_environment(self):
+        return self.__environment
+
+    def learn(self, periods, reward_offset, log=None):
+        """ Initially trains the learner for given periods and
+            realises rewards after given offset.
+
+            Arguments:
+            periods -- the number of periods to learn for without actually
+                    tracking performance
+            reward_offset -- the periods after which to calculate the
+                    reward (e.g. if we act at time t then we calculate
+                    realised asset returns between t and t + reward_offset)
+            log -- a list if log messages should be added or None if not needed
+        """
+        self.__retain(reward_offset)
+
+        for i in range(periods):
+            date = self.__advance()
+            if date is None:
+                return
+
+            actions = self.__learner.get_actions_for_states(self.__environment.sense())
+            self.__actions_taken.append(pd.Series(actions))
+
+            if i <= reward_offset or i % reward_offset != 0:
+                # only act every 'reward_offset' times
+                continue
+
+            self.__reward(reward_offset, log=log)
+
+    def trade(self, reward_offset, log=None):
+        """ Steps through time and trades available stocks in a minimum
+            variance portfolio.
+
+            Arguments:
+            reward_offset -- the periods after which to calculate the
+                    reward (e.g. if we act at time t then we calculate
+                    realised asset returns between t and t + reward_offset)
+            log -- a list if log messages should be added or None if not needed
+        """
+
+        if self.__random:
+            self.learn(255, reward_offset)
+
+        self.__retain(reward_offset)
+
+        i = 0
+        current_date = self.__advance()
+        while current_date is not None:
+            actions = pd.Series(self.__learner.get_actions_for_states(self.__environment.sense()))
+            if self.__random:
+                actions = actions.apply(lambda x: self.__rng.choice(self.__actions))
+
+            self.__actions_taken.append(actions)
+
+            if i > reward_offset and i % reward_offset == 0:
+                buy_actions = actions.loc[actions == 'BUY'].index
+
+                if len(buy_actions) == 0:
+                    self.__rebalance(current_date, pd.Series({'CASH': 1.0}))
+                else:
+                    current_cov = self.__covariance.covariance(buy_actions)
+                    self.__rebalance(current_date, self.__solver.solve_or_equal(current_cov))
+
+                self.__reward(reward_offset, log=log)
+
+            current_date = self.__advance()
+            i += 1
+
+    def __retain(self, reward_offset):
+        # states, returns and actions from the start of the reward window
+        self.__environment.retain(reward_offset + 1)
+        self.__returns = collections.deque(self.__returns, maxlen=reward_offset + 1)
+        self.__actions_taken = collections.deque(self.__actions_taken, maxlen=reward_offset + 1)
+
+    def __advance(self):
+        date = self.__environment.advance()
+        if date is None:
+            return None
+
+        prices = np.asarray(self.__environment.sense_item(self.__price_item).values, dtype=np.float64)
+        if self.__last_prices is not None:
+            returns = prices / self.__last_prices - 1
+            self.__returns.append(returns)
+            self.__covariance.append(returns)
+
+            if self.__weights is not None:
+                self.__track(date, np.nansum(self.__weights * returns))
+
+        self.__last_prices = prices
+        return date
+
+    def __track(self, date, portfolio_return):
+        self.__cum_return = (1 + self.__cum_return) * (1 + portfolio_return) - 1
+
+        if self.__performance is not None:
+            self.__performance.append((date, portfolio_return))
+        if self.__sink is not None:
+            self.__sink('return', date, portfolio_return)
+
+    def __rebalance(self, date, weights):
+        if self.__portfolio is not None:
+            self.__portfolio.rebalance(date, weights)
+        if self.__sink is not None:
+            self.__sink('rebalance', date, weights)
+
+        weights = weights / weights.sum()
+        self.__weights = weights.reindex(self.__tickers).fillna(0).values
+
+    def __reward(self, reward_offset, log=None):
+        returns = np.array(self.__returns)
+        actions_taken = self.__actions_taken[0]
+        reward_date = self.__environment_dates()[0]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cum_returns = pd.Series(np.nanprod(returns + 1, axis=0) - 1, index=self.__tickers)
+            std = pd.Series(np.nanstd(returns, axis=0, ddof=1), index=self.__tickers)
+        sharpe = cum_returns / std
+
+        states = self.__environment.sense_date(reward_date)
+
+        # if the action at the time was SELL then the reward is the inverse
+        # (i.e. if we sold and the return was negative then that should be rewarded)
+        sell_actions = actions_taken.loc[actions_taken == 'SELL'].index
+
+        rewards = sharpe
+        rewards.loc[sell_actions] = rewards.loc[sell_actions] * -1
+
+        if log is not None:
+            log.append("Registering reward for {}: {}".format(reward_date.date(), rewards.to_dict()))
+
+        self.__learner.reward(states, rewards, log=log)
+
+    def __environment_dates(self):
+        return self.__environment.get_retained_dates()
+
+    def get_portfolio(self):
+        """ Yields the InvestmentPortfolio or None if the history is disabled. """
+        return self.__portfolio
+
+    def get_performance(self):
+        """ Yields the portfolio returns realised so far while trading (none
+            if the history is disabled).
+        """
+        if not self.__performance:
+            return pd.Series([], dtype=np.float64)
+
+        dates, returns = zip(*self.__performance)
+        return pd.Series(returns, index=dates)
+
+    def get_cumulative_return(self):
+        """ Yields the cumulative portfolio return realised so far while trading. """
+        return self.__cum_return
+
+    def get_learner(self):
+        return self.__learner
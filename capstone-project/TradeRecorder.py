@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+class TradeRecorder:
+    """ Records the decisions of a trading agent as typed columnar events.
+
+        Each event is a row for one ticker at one date of one of the kinds
+
+            choose -- the learner chose 'action' for the ticker in 'state'
+                      based on its best Q (q_before, q_after)
+            reward -- the agent rewarded 'action_taken' with 'reward' given the
+                      realised cum_return, std and sharpe
+            update -- the learner updated Q of 'action' in 'state' from
+                      q_before to q_after for 'reward' (learners which update
+                      all tickers in one go, e.g. ArrayQLearner, record the Q
+                      before and after the whole step)
+
+        Rows are appended to preallocated arrays which grow geometrically and
+        tickers and actions are stored as integer codes, hence recording costs
+        little. Frames, files and strings are only built on request.
+    """
+
+    kinds = ["choose", "reward", "update"]
+    values = ["q_before", "q_after", "reward", "cum_return", "std", "sharpe"]
+
+    def __init__(self, state_variables, actions, capacity=1024):
+        """
+        Arguments:
+        state_variables -- the state variables of the recorded states
+        actions -- the possible actions
+        capacity -- the number of rows to preallocate
+        """
+        self.__state_variables = list(state_variables)
+        self.__actions = list(actions)
+        self.__action_codes = dict((action, i) for i, action in enumerate(self.__actions))
+        self.__kind_codes = dict((kind, i) for i, kind in enumerate(TradeRecorder.kinds))
+        self.__tickers = []
+        self.__ticker_codes = {}
+        self.__date = np.int64(-1)
+        self.__size = 0
+
+        self.__columns = {}
+        self.__allocate(capacity)
+
+    def set_date(self, date):
+        """ Sets the date of the events recorded from now on. """
+        self.__date = np.int64(pd.Timestamp(date).value)
+
+    def record(self, kind, tickers, states=None, action=None, action_taken=None, **values):
+        """ Appends an event per ticker at the current date.
+
+            Arguments:
+            kind -- one of TradeRecorder.kinds
+            tickers -- the tickers of the events
+            states -- array of shape (tickers, state variables) or None
+            action -- the action per ticker or None
+            action_taken -- the action taken per ticker or None
+            values -- arrays with a value per ticker for any of TradeRecorder.values
+        """
+        n = len(tickers)
+        start, end = self.__size, self.__size + n
+        self.__reserve(end)
+
+        columns = self.__columns
+        columns['date'][start:end] = self.__date
+        columns['kind'][start:end] = self.__kind_codes[kind]
+        columns['ticker'][start:end] = [self.__ticker_code(ticker) for ticker in tickers]
+        columns['state'][start:end] = -1 if states is None else states
+        columns['action'][start:end] = self.__codes(action)
+        columns['action_taken'][start:end] = self.__codes(action_taken)
+
+        for name in TradeRecorder.values:
+            columns[name][start:end] = values.pop(name, np.nan)
+        if values:
+            raise ValueError("Unknown values {}".format(sorted(values.keys())))
+
+        self.__size = end
+
+    def __len__(self):
+        return self.__size
+
+    def to_frame(self, kind=None):
+        """ Returns the recorded events as a data frame with a column per field
+            and state variable.
+
+            Arguments:
+            kind -- one of TradeRecorder.kinds to only return its events or None
+        """
+        columns = dict((name, column[:self.__size]) for name, column in self.__columns.items())
+        if kind is not None:
+            rows = columns['kind'] == self.__kind_codes[kind]
+            columns = dict((name, column[rows]) for name, column in columns.items())
+
+        frame = pd.DataFrame({
+            'date': columns['date'].astype('datetime64[ns]'),
+            'kind': pd.Categorical.from_codes(columns['kind'], TradeRecorder.kinds),
+            'ticker': pd.Categorical.from_codes(columns['ticker'], self.__tickers)
+        })
+        for i, state_variable in enumerate(self.__state_variables):
+            frame[state_variable] = columns['state'][:, i]
+        frame['action'] = pd.Categorical.from_codes(columns['action'], self.__actions)
+        frame['action_taken'] = pd.Categorical.from_codes(columns['action_taken'], self.__actions)
+        for name in TradeRecorder.values:
+            frame[name] = columns[name]
+
+        return frame
+
+    def to_parquet(self, path):
+        """ Writes the recorded events to given Parquet file (needs pyarrow). """
+        self.to_frame().to_parquet(path)
+
+    def to_feather(self, path):
+        """ Writes the recorded events to given Feather file (needs pyarrow). """
+        self.to_frame().to_feather(path)
+
+    def to_string(self, kind=None):
+        """ Formats the recorded events as a table, see 'to_frame'. """
+        return self.to_frame(kind=kind).to_string(index=False)
+
+    def __ticker_code(self, ticker):
+        code = self.__ticker_codes.get(ticker)
+        if code is None:
+            code = len(self.__tickers)
+            self.__ticker_codes[ticker] = code
+            self.__tickers.append(ticker)
+        return code
+
+    def __codes(self, actions):
+        if actions is None:
+            return -1
+        return [self.__action_codes[action] for action in actions]
+
+    def __allocate(self, capacity):
+        columns = {
+            'date': np.empty(capacity, dtype=np.int64),
+            'kind': np.empty(capacity, dtype=np.int8),
+            'ticker': np.empty(capacity, dtype=np.int32),
+            'state': np.empty((capacity, len(self.__state_variables)), dtype=np.int8),
+            'action': np.empty(capacity, dtype=np.int8),
+            'action_taken': np.empty(capacity, dtype=np.int8)
+        }
+        for name in TradeRecorder.values:
+            columns[name] = np.empty(capacity, dtype=np.float64)
+
+        for name, column in self.__columns.items():
+            columns[name][:self.__size] = column[:self.__size]
+        self.__columns = columns
+
+    def __reserve(self, rows):
+        capacity = len(self.__columns['date'])
+        if rows > capacity:
+            self.__allocate(max(rows, 2 * capacity))
@@ -1,32 +1,82 @@
+import collections
+import numpy as np
 import pandas as pd
-import portfolioopt as pfopt
 from Environment import Environment
+from data import DateIndex
 from learn import QLearner
+from learn import ArrayQLearner
+from learn import QCheckpoint
 from finance import InvestmentPortfolio
-import random
+from finance import RollingCovariance
+from finance import PortfolioReturns
+from finance import RollingSharpe
+from finance import MinVarianceSolver
+from random import Random
+from Instrumentation import NullInstrumentation
 
 class TradingAgent:
 
-    def __init__(self, data, price_item, items, alpha, random=False):
+    def __init__(self, data, price_item, items, alpha, random=False, precompute=False, \
+                 array_learner=False, cov_lookback=None, \
+                 seed=None, instrumentation=None, learner=None, recorder=None, discretiser=None, \
+                 calendar=None):
         """ Initialises the trading agent with its data and items to trade upon.
 
             Arguments:
-            data -- a panel where items are data items (e.g. LEVERAGE_ART, or PRICE),
+            data -- a data panel where items are data items (e.g. LEVERAGE_ART, or PRICE),
                     major axis are dates and minor axis are tickers
             price_item -- a string that represents the name of the stock price item
             items -- the items to form the state space over
             alpha -- the learning rate for the q learner
             random -- will trade randomly if True
+            precompute -- if True then the environment discretises all states
+                    up front rather than on every sense
+            array_learner -- if True then the Q table is held in a dense array
+                    and actions are chosen for all tickers at once
+            cov_lookback -- the number of periods to estimate the covariance for
+                    the minimum variance portfolio over or None for all history
+            seed -- seed for the random number generator used when trading randomly
+            instrumentation -- an Instrumentation to time the phases of learning and
+                    trading and to pass log messages to, or None
+            learner -- the Q learner to use (e.g. a view onto a BatchQLearner) or
+                    None to create one
+            recorder -- a TradeRecorder to record the choices, rewards and Q updates
+                    on or None
+            discretiser -- a Discretiser for all items, a dictionary from item to
+                    Discretiser or None to discretise zscores as the Environment does
+            calendar -- the dates to form states on (e.g. the rebalance dates), states
+                    in between are as of the last of them, or None for all dates
         """
         self.__actions = ["BUY", "SELL"]
+        self.__action_codes = dict((action, i) for i, action in enumerate(self.__actions))
         self.__state_variables = items
 
-        self.__environment = Environment(data, items)
-        self.__learner = QLearner(self.__environment, self.__actions, self.__state_variables, alpha=alpha)
+        self.__dates = DateIndex(data.get(price_item).index)
+        self.__environment = Environment(data, items, precompute=precompute, date_index=self.__dates, \
+                                         discretiser=discretiser, calendar=calendar)
+        if learner is None and array_learner:
+            learner = ArrayQLearner(self.__environment, self.__actions, self.__state_variables, alpha=alpha, \
+                                    bins=self.__environment.get_bins())
+        elif learner is None:
+            learner = QLearner(self.__environment, self.__actions, self.__state_variables, alpha=alpha)
+        self.__learner = learner
         self.__prices = pd.DataFrame(data.get(price_item))
         self.__returns = (self.__prices / self.__prices.shift(1) - 1)[1:]
-        self.__portfolio = InvestmentPortfolio()
+        self.__sharpe = RollingSharpe(self.__returns)
+        self.__covariance = RollingCovariance(self.__returns, lookback=cov_lookback)
+        self.__portfolio = InvestmentPortfolio(date_index=self.__dates)
+        self.__solver = MinVarianceSolver()
+        self.__performance = PortfolioReturns(self.__prices.assign(CASH=1.0))
         self.__random = random
+        self.__rng = Random(seed)
+        self.__instrumentation = instrumentation or NullInstrumentation()
+        self.__recorder = recorder
+        self.__trade_step = 0
+        # (position, action codes) of the most recent dates while trading
+        self.__trade_actions = collections.deque()
+        # (position, action codes) by position of the actions awaiting their
+        # reward while driven by events (see Scheduler)
+        self.__event_actions = {}
 
     def get_environment(self):
         return self.__environment
@@ -43,21 +93,7 @@ class TradingAgent:
                     realised asset returns between t and t + reward_offset)
             log -- a list if log messages should be added or None if not needed
         """
-        actions_taken = dict()
-
-        for i in range(periods):
-            date = self.__environment.advance()
-
-            actions = self.__learner.get_actions()
-            actions_taken[date] = pd.Series(actions)
-
-            if i <= reward_offset or i % reward_offset != 0:
-                # only act every 'reward_offset' times
-                continue
-
-            date_to = self.__returns.index[i-1]
-            date_from = self.__returns.index[i-1-reward_offset]
-            self.__reward(date_from, date_to, actions_taken[date_from], log=log)
+        self.__run(self.learn_steps(periods, reward_offset, log=log))
 
     def trade(self, reward_offset, log=None):
         """ Steps through time and trades available stocks in a minimum
@@ -69,63 +105,221 @@ class TradingAgent:
                     realised asset returns between t and t + reward_offset)
             log -- a list if log messages should be added or None if not needed
         """
+        self.__run(self.trade_steps(reward_offset, log=log))
 
-        if self.__random:
-            self.learn(255, reward_offset)
+    def learn_steps(self, periods, reward_offset, log=None):
+        """ Learns as per 'learn' but yields the requests to the learner rather
+            than serving them, which allows to drive several agents in lockstep
+            (see BatchTradingAgent).
 
-        actions_taken = dict()
+            A request is either ('choose', states) which must be answered with
+            the action codes for the states (the index of the action per ticker,
+            see get_action_codes_for_states) or ('reward', states, rewards, log)
+            which must be answered with None once the learner was rewarded.
+        """
+        # actions from the start of the reward window
+        actions_taken = collections.deque(maxlen=reward_offset + 1)
 
-        i = 0
+        for i in range(periods):
+            date = self.__environment.advance()
+
+            state = self.__sense(date)
+            codes = yield ('choose', state)
+            actions_taken.append(self.__encode(codes))
+
+            if i <= reward_offset or i % reward_offset != 0:
+                # only act every 'reward_offset' times
+                continue
+
+            request = self.__reward(actions_taken[0], log=log)
+            yield request
+            self.__rewarded(request, log)
+
+    def trade_steps(self, reward_offset, log=None):
+        """ Trades as per 'trade' but yields the requests to the learner, see
+            'learn_steps'.
+        """
+
+        if self.__random and self.__trade_step == 0:
+            learn_steps = self.learn_steps(255, reward_offset)
+            try:
+                request = next(learn_steps)
+                while True:
+                    response = yield request
+                    request = learn_steps.send(response)
+            except StopIteration:
+                pass
+
+        # kept on the agent so that trading can resume from a checkpoint
+        self.__trade_actions = collections.deque(self.__trade_actions, maxlen=reward_offset + 1)
+        actions_taken = self.__trade_actions
+
+        i = self.__trade_step
         current_date = self.__environment.advance()
         while current_date:
-            state = self.__environment.sense()
+            self.__performance.step(current_date)
+            state = self.__sense(current_date)
 
-            actions = pd.Series(self.__learner.get_actions())
+            codes = yield ('choose', state)
             if self.__random:
-                actions = actions.apply(lambda x: random.choice(self.__actions))
+                codes = self.__random_codes(codes)
 
-            actions_taken[current_date] = pd.Series(actions)
+            actions_taken.append(self.__encode(codes))
 
             if i <= reward_offset or i % reward_offset != 0:
                 current_date = self.__environment.advance()
                 i += 1
+                self.__trade_step = i
                 continue
 
-            buy_actions = actions.loc[actions == 'BUY'].index
+            self.__rebalance_actions(current_date, codes)
+
+            request = self.__reward(actions_taken[0], log=log)
+            yield request
+            self.__rewarded(request, log)
+
+            current_date = self.__environment.advance()
+            i += 1
+            self.__trade_step = i
+
+    def learn_events(self, events, log=None):
+        """ Trains the learner on given events only rather than on every date,
+            see 'event_steps' and Scheduler.
+        """
+        self.__run(self.event_steps(events, trade=False, log=log))
+
+    def trade_events(self, events, log=None):
+        """ Trades on given events only rather than on every date, see
+            'event_steps' and Scheduler.
+        """
+        self.__run(self.event_steps(events, trade=True, log=log))
+
+    def event_steps(self, events, trade=False, log=None):
+        """ Steps through given events in date order and yields the requests
+            to the learner, see 'learn_steps'. The environment is moved
+            straight to the date of each event, dates without events are not
+            stepped through.
+
+            Arguments:
+            events -- ('act', date) to sense and choose (and rebalance if
+                    trading) at date or ('reward', date, act_date) to reward
+                    the actions taken at act_date for the returns realised up
+                    to date
+            trade -- if True then the portfolio is rebalanced on each act
+            log -- a list if log messages should be added or None if not needed
+        """
+        for event in events:
+            date = event[1]
+            self.__environment.seek(date)
+
+            if event[0] == 'act':
+                if trade:
+                    self.__performance.step(date)
+                state = self.__sense(date)
+
+                codes = yield ('choose', state)
+                if self.__random and trade:
+                    codes = self.__random_codes(codes)
+
+                actions_taken = self.__encode(codes)
+                self.__event_actions[actions_taken[0]] = actions_taken
+
+                if trade:
+                    self.__rebalance_actions(date, codes)
+            else:
+                actions_taken = self.__event_actions.pop(self.__dates.position(event[2]))
+
+                request = self.__reward(actions_taken, log=log)
+                yield request
+                self.__rewarded(request, log)
+
+    def __run(self, steps):
+        """ Drives the given steps serving their requests with the own learner. """
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(self.__serve(request))
+        except StopIteration:
+            pass
+
+    def __serve(self, request):
+        if request[0] == 'choose':
+            with self.__instrumentation.phase('choose'):
+                return self.__learner.get_action_codes_for_states(request[1], recorder=self.__recorder)
+
+        kind, states, rewards, learner_log = request
+        with self.__instrumentation.phase('update'):
+            self.__learner.reward(states, rewards, log=learner_log, recorder=self.__recorder)
+        return None
+
+    def __sense(self, date):
+        if self.__recorder is not None:
+            self.__recorder.set_date(date)
+
+        with self.__instrumentation.phase('sense'):
+            state = self.__environment.sense()
+        self.__instrumentation.count('states_seen', len(state.columns))
+        return state
+
+    def __rebalance_actions(self, date, codes):
+        """ Rebalances into the minimum variance portfolio of the stocks to buy. """
+        with self.__instrumentation.phase('rebalance'):
+            buy_actions = self.__prices.columns[codes == self.__action_codes['BUY']]
 
             if len(buy_actions) == 0:
-                self.__portfolio.rebalance(current_date, pd.Series({'CASH': 1.0}))
+                self.__rebalance(date, pd.Series({'CASH': 1.0}))
             else:
-                current_returns = self.__returns.ix[:current_date][buy_actions]
-                min_var_portfolio = pfopt.min_var_portfolio(current_returns.cov())
-                self.__portfolio.rebalance(current_date, min_var_portfolio)
+                current_cov = self.__covariance.covariance(date, buy_actions)
+                self.__rebalance(date, self.__solver.solve_or_equal(current_cov))
+            self.__instrumentation.count('rebalances')
 
-            date_to = self.__returns.index[255+i-1]
-            date_from = self.__returns.index[255+i-1-reward_offset]
+    def __rebalance(self, date, weights):
+        self.__portfolio.rebalance(date, weights)
+        self.__performance.rebalance(date, weights)
 
-            self.__reward(date_from, date_to, actions_taken[date_from], log=log)
+    def __encode(self, codes):
+        """ Returns the current position and the code of the action per ticker. """
+        return (self.__environment.get_current_position(), np.asarray(codes, dtype=np.int8))
 
-            current_date = self.__environment.advance()
-            i += 1
+    def __random_codes(self, codes):
+        """ Returns a random action code per ticker. """
+        return np.array([self.__rng.randrange(len(self.__actions)) for code in codes], dtype=np.int8)
 
-    def __reward(self, date_from, date_to, actions_taken, log=None):
-        returns_slice = self.__returns.ix[date_from:date_to]
+    def __reward(self, actions_taken, log=None):
+        """ Rewards the actions taken at the start of the window up to the
+            current date.
 
-        cum_returns = self.__calculate_cum_returns(returns_slice)
-        std = returns_slice.std()
-        sharpe = cum_returns / returns_slice.std()
-        reward_date = date_from
+            Arguments:
+            actions_taken -- the position and the action codes of the actions taken
+        """
+        instrumentation = self.__instrumentation
+        logging = log is not None or instrumentation.logging
+
+        with instrumentation.phase('reward'):
+            position_from, action_codes = actions_taken
+            date_from = self.__dates.date(position_from)
+            date_to = self.__dates.date(self.__environment.get_current_position())
+
+            cum_returns, std, sharpe = self.__sharpe.window(date_from, date_to)
+            reward_date = date_from
 
-        states = self.__environment.sense_date(reward_date)
+            states = self.__environment.sense_date(reward_date)
 
-        # if the action at the time was SELL then the reward is the inverse
-        # (i.e. if we sold and the return was negative then that should be rewarded)
-        sell_actions = actions_taken.loc[actions_taken == 'SELL'].index
+            # if the action at the time was SELL then the reward is the inverse
+            # (i.e. if we sold and the return was negative then that should be rewarded)
+            sell_actions = action_codes == self.__action_codes['SELL']
+            rewards = sharpe * np.where(sell_actions, -1.0, 1.0)
 
-        rewards = sharpe
-        rewards.ix[sell_actions] = rewards.ix[sell_actions] * -1
+        if self.__recorder is not None or logging:
+            actions_taken = pd.Series(np.array(self.__actions)[action_codes], index=self.__prices.columns)
 
-        if log:
+        if self.__recorder is not None:
+            self.__recorder.set_date(reward_date)
+            self.__recorder.record('reward', rewards.index, action_taken=actions_taken.values, \
+                                   reward=rewards.values, cum_return=cum_returns.values, \
+                                   std=std.values, sharpe=sharpe.values)
+
+        if logging:
             log_cols = ["Cum. Return", "Std", "Sharpe", "Action Taken", "Reward"]
             log_cols.extend(states.index)
 
@@ -137,17 +331,118 @@ class TradingAgent:
             log_frame["Reward"] = rewards
 
             for state_variable in states.index:
-                log_frame[state_variable] = states.ix[state_variable]
+                log_frame[state_variable] = states.loc[state_variable]
+
+            self.__log(log, ["Registering reward for {} for realised returns up tp {}: "\
+                             .format(reward_date.date(), date_to.date()), log_frame.to_string()])
+
+        learner_log = [] if logging else None
+        return ('reward', states, rewards, learner_log)
 
-            log.append("Registering reward for {} for realised returns up tp {}: "\
-                      .format(reward_date.date(), date_to.date()))
-            log.append(log_frame.to_string())
+    def __rewarded(self, request, log):
+        self.__instrumentation.count('rewards')
+        self.__instrumentation.gauge('q_table_size', self.__learner.get_q_size)
 
-        self.__learner.reward(states, rewards, log=log)
+        learner_log = request[3]
+        if learner_log:
+            self.__log(log, learner_log)
 
-    def __calculate_cum_returns(self, returns):
-        cum_returns = ((returns + 1).apply(lambda s: s.cumprod()) - 1).iloc[-1]
-        return cum_returns
+    def __log(self, log, messages):
+        if log is not None:
+            log.extend(messages)
+        for message in messages:
+            self.__instrumentation.log(message)
 
     def get_portfolio(self):
         return self.__portfolio
+
+    def get_performance(self):
+        """ Yields the portfolio returns realised so far while trading. """
+        return self.__performance.get_returns()
+
+    def get_learner(self):
+        return self.__learner
+
+    def get_instrumentation(self):
+        return self.__instrumentation
+
+    def get_recorder(self):
+        return self.__recorder
+
+    def save_checkpoint(self, path):
+        """ Saves the learner state (see QCheckpoint) and the trading progress
+            (the current date, the trade step, the actions taken while trading,
+            the rebalances, the weights held, the returns realised and the state
+            of the random number generator) to given path.
+        """
+        current_date = self.__environment.get_current_date()
+        action_dates = [self.__dates.date(position) for position, codes in self.__trade_actions]
+        tickers = list(self.__prices.columns)
+
+        action_codes = np.array([codes for position, codes in self.__trade_actions], dtype=np.int8)\
+                         .reshape(len(action_dates), len(tickers))
+
+        portfolio = self.__portfolio.get_state()
+        performance = self.__performance.get_state()
+        solver = self.__solver.get_state()
+        rng_version, rng_state, rng_gauss = self.__rng.getstate()
+
+        QCheckpoint.save(path, self.__learner.get_state(), \
+                         date=np.int64(pd.Timestamp(current_date).value if current_date is not None else -1), \
+                         trade_step=np.int64(self.__trade_step), \
+                         action_dates=np.array([pd.Timestamp(date).value for date in action_dates], dtype=np.int64), \
+                         action_codes=action_codes, \
+                         tickers=np.array([str(ticker) for ticker in tickers], dtype=np.str_), \
+                         portfolio_dates=portfolio['dates'], \
+                         portfolio_tickers=np.array([str(ticker) for ticker in portfolio['tickers']], dtype=np.str_), \
+                         portfolio_weights=portfolio['weights'], \
+                         performance_weights=performance['weights'], \
+                         performance_cost=performance['cost'], \
+                         performance_last_date=performance['last_date'], \
+                         performance_dates=performance['dates'], \
+                         performance_returns=performance['returns'], \
+                         solver_tickers=np.array([str(ticker) for ticker in solver['tickers']], dtype=np.str_), \
+                         solver_weights=solver['weights'], \
+                         rng_version=np.int64(rng_version), \
+                         rng_state=np.array(rng_state, dtype=np.int64), \
+                         rng_gauss=np.float64(np.nan if rng_gauss is None else rng_gauss))
+
+    def load_checkpoint(self, path):
+        """ Restores the learner state and trading progress from given path so
+            that 'trade' resumes with the date after the checkpointed date as if
+            it had not stopped. The data of this agent must hold the checkpointed
+            date and the dates of the actions taken and rebalances before it.
+        """
+        learner_state, progress = QCheckpoint.load(path)
+        self.__learner.set_state(learner_state)
+
+        tickers = [str(ticker) for ticker in progress['tickers']]
+        if tickers != [str(ticker) for ticker in self.__prices.columns]:
+            raise ValueError("Checkpoint for tickers {} does not match {}".format(tickers, list(self.__prices.columns)))
+
+        self.__trade_step = int(progress['trade_step'])
+        self.__trade_actions = collections.deque()
+        for date, codes in zip(progress['action_dates'], progress['action_codes']):
+            self.__trade_actions.append((self.__dates.position(pd.Timestamp(int(date))), codes))
+
+        # checkpoints of earlier versions only hold the above
+        if 'portfolio_weights' in progress:
+            ticker_names = dict((str(ticker), ticker) for ticker in list(self.__prices.columns) + ['CASH'])
+            self.__portfolio.set_state({
+                'dates': progress['portfolio_dates'],
+                'tickers': [ticker_names[str(ticker)] for ticker in progress['portfolio_tickers']],
+                'weights': progress['portfolio_weights']
+            })
+            self.__performance.set_state(dict((key, progress['performance_' + key]) \
+                                              for key in ['weights', 'cost', 'last_date', 'dates', 'returns']))
+            self.__solver.set_state({
+                'tickers': [ticker_names[str(ticker)] for ticker in progress['solver_tickers']],
+                'weights': progress['solver_weights']
+            })
+
+            rng_gauss = float(progress['rng_gauss'])
+            self.__rng.setstate((int(progress['rng_version']), tuple(int(x) for x in progress['rng_state']), \
+                                 None if np.isnan(rng_gauss) else rng_gauss))
+
+        if int(progress['date']) >= 0:
+            self.__environment.seek(pd.Timestamp(int(progress['date'])))
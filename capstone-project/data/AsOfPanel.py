@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from .DataPanel import DataPanel
+
+class AsOfPanel:
+    ''' Data items for tickers where each item is held at its native dates
+        (e.g. quarterly fundamentals next to daily prices) rather than on the
+        union of the dates of all items.
+
+        Values are resolved as of any dates on demand, i.e. the value of a
+        ticker at a date is its last value at or before that date, by a sorted
+        search over the native dates of the item.
+    '''
+
+    def __init__(self, tickers):
+        """
+        Arguments:
+        tickers -- the tickers (columns) of all items
+        """
+        self.tickers = pd.Index(tickers)
+        self.__dates = {}
+        self.__values = {}
+
+    @staticmethod
+    def from_frames(frames, tickers=None):
+        """ Creates a panel from a dictionary of (date x ticker) data frames,
+            see 'add'.
+
+            Arguments:
+            frames -- a dictionary from item to data frame
+            tickers -- the tickers of the panel or None for the union of all
+        """
+        if tickers is None:
+            for item in sorted(frames.keys()):
+                columns = frames[item].columns
+                tickers = columns if tickers is None else tickers.union(columns)
+
+        panel = AsOfPanel(tickers if tickers is not None else [])
+        for item in sorted(frames.keys()):
+            panel.add(item, frames[item])
+        return panel
+
+    @staticmethod
+    def from_panel(panel):
+        """ Creates a panel from the items of given data panel, dropping the
+            dates on which an item has no values.
+        """
+        return AsOfPanel.from_frames(dict((item, panel.get(item)) for item in panel.items), panel.tickers)
+
+    @property
+    def items(self):
+        return sorted(self.__values.keys())
+
+    def add(self, item, frame):
+        """ Adds (or replaces) an item. Only the dates on which the item has
+            a value for any ticker are kept and values are filled forward
+            over these dates.
+
+            Arguments:
+            item -- the name of the item
+            frame -- a (date x ticker) data frame
+        """
+        frame = frame.sort_index().reindex(columns=self.tickers)
+        frame = frame.loc[frame.notna().any(axis=1).values].ffill()
+
+        self.__dates[item] = pd.DatetimeIndex(frame.index)
+        self.__values[item] = np.ascontiguousarray(frame.values, dtype=np.float64)
+
+    def get_dates(self, item):
+        """ Returns the native dates of given item. """
+        return self.__dates[item]
+
+    def values(self, item, dates):
+        """ Returns the values of given item as of given dates as an array of
+            shape (dates, tickers), NaN before the first date of the item.
+        """
+        rows = self.__dates[item].searchsorted(pd.DatetimeIndex(dates), side='right') - 1
+
+        values = self.__values[item][np.maximum(rows, 0)]
+        values[rows < 0] = np.nan
+        return values
+
+    def get(self, item, dates=None):
+        """ Returns given item as a (date x ticker) data frame as of given
+            dates or at its native dates if None.
+        """
+        if dates is None:
+            return pd.DataFrame(self.__values[item].copy(), index=self.__dates[item], columns=self.tickers)
+
+        dates = pd.DatetimeIndex(dates)
+        return pd.DataFrame(self.values(item, dates), index=dates, columns=self.tickers)
+
+    def union_dates(self, items=None):
+        """ Returns the union of the native dates of given items (or all). """
+        dates = pd.DatetimeIndex([])
+        for item in items if items is not None else self.items:
+            dates = dates.union(self.__dates[item])
+        return dates
+
+    def to_panel(self, dates=None, items=None):
+        """ Resolves given items (or all) as of given dates (or the union of
+            their native dates) into a DataPanel.
+        """
+        items = list(items) if items is not None else self.items
+        dates = pd.DatetimeIndex(dates) if dates is not None else self.union_dates(items)
+
+        values = np.empty((len(items), len(dates), len(self.tickers)))
+        for i, item in enumerate(items):
+            values[i] = self.values(item, dates)
+
+        return DataPanel(values, items, dates, self.tickers)
+
+    @property
+    def nbytes(self):
+        """ The number of bytes held by the values of all items. """
+        return sum(values.nbytes for values in self.__values.values())
@@ -0,0 +1,105 @@
+import json
+import struct
+import numpy as np
+import pandas as pd
+
+class ColumnarFile:
+    ''' Reads and writes a data frame of floats with a date index as a binary
+        file which can be memory-mapped.
+
+        Layout: a magic line, the length of a json header (little-endian
+        uint64), the json header (ticker names, number of dates), padding to
+        8 bytes, the dates as int64 nanoseconds and the values as a float64
+        (ticker x date) matrix so that each ticker is a contiguous column.
+    '''
+
+    magic = b'PNLCOL1\n'
+    extension = 'col'
+
+    @staticmethod
+    def write(path, frame):
+        """ Writes the given data frame (dates on the index, tickers as columns)
+            to given path.
+
+            Arguments:
+            path -- the file to write
+            frame -- the data frame to write
+        """
+        dates = pd.DatetimeIndex(frame.index)
+        header = json.dumps({
+            'tickers': [str(ticker) for ticker in frame.columns],
+            'dates': len(dates),
+            'index_name': frame.index.name
+        }).encode('utf-8')
+
+        prefix_length = len(ColumnarFile.magic) + 8 + len(header)
+        padding = b' ' * (-prefix_length % 8)
+
+        with open(path, 'wb') as f:
+            f.write(ColumnarFile.magic)
+            f.write(struct.pack('<Q', len(header) + len(padding)))
+            f.write(header + padding)
+            f.write(dates.values.astype('datetime64[ns]').astype('<i8').tobytes())
+            f.write(np.ascontiguousarray(frame.values.T, dtype='<f8').tobytes())
+
+    @staticmethod
+    def read(path, tickers=None, start=None, end=None):
+        """ Reads a data frame from given path. Only the values for the requested
+            tickers and dates are read from the memory-mapped file.
+
+            An error will be raised if there are missing tickers.
+
+            Arguments:
+            path -- the file to read
+            tickers -- the tickers to read or None for all
+            start -- the first date to read or None to read from the first date
+            end -- the last date to read or None to read up to the last date
+        """
+        header, dates_offset, values_offset = ColumnarFile.__read_header(path)
+        all_tickers = header['tickers']
+        n_dates = header['dates']
+
+        if tickers is None:
+            tickers = all_tickers
+
+        positions = dict((ticker, i) for i, ticker in enumerate(all_tickers))
+        missing = set(tickers) - set(positions.keys())
+        if len(missing) > 0:
+            raise Exception("Missing tickers: {}".format(missing))
+
+        dates = ColumnarFile.__read_dates(path, dates_offset, n_dates)
+        first = 0 if start is None else dates.searchsorted(pd.Timestamp(start), side='left')
+        last = n_dates if end is None else dates.searchsorted(pd.Timestamp(end), side='right')
+
+        values = np.memmap(path, dtype='<f8', mode='r', offset=values_offset, \
+                           shape=(len(all_tickers), n_dates))
+        selected = values[[positions[ticker] for ticker in tickers], first:last]
+
+        index = dates[first:last]
+        index.name = header['index_name']
+        return pd.DataFrame(np.array(selected.T), index=index, columns=list(tickers))
+
+    @staticmethod
+    def read_dates(path):
+        """ Reads the dates of the file at given path without reading any values. """
+        header, dates_offset, values_offset = ColumnarFile.__read_header(path)
+        return ColumnarFile.__read_dates(path, dates_offset, header['dates'])
+
+    @staticmethod
+    def __read_header(path):
+        with open(path, 'rb') as f:
+            if f.read(len(ColumnarFile.magic)) != ColumnarFile.magic:
+                raise Exception("Not a columnar file: {}".format(path))
+            header_length = struct.unpack('<Q', f.read(8))[0]
+            header = json.loads(f.read(header_length).decode('utf-8'))
+
+        dates_offset = len(ColumnarFile.magic) + 8 + header_length
+        values_offset = dates_offset + 8 * header['dates']
+        return header, dates_offset, values_offset
+
+    @staticmethod
+    def __read_dates(path, offset, n_dates):
+        if n_dates == 0:
+            return pd.DatetimeIndex([])
+        dates = np.memmap(path, dtype='<i8', mode='r', offset=offset, shape=(n_dates,))
+        return pd.DatetimeIndex(np.array(dates, dtype=np.int64).view('datetime64[ns]'))
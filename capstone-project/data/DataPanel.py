@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+class DataPanel:
+    ''' A panel of data items for dates and tickers held in one contiguous
+        (item x date x ticker) float array with label indexes.
+
+        Items are returned as data frames over the underlying array and date
+        slices share memory with the panel they are taken from.
+    '''
+
+    def __init__(self, values, items, dates, tickers):
+        """
+        Arguments:
+        values -- a float array of shape (items, dates, tickers), not copied
+        items -- the item names
+        dates -- the dates (major axis)
+        tickers -- the tickers (minor axis)
+        """
+        self.values = values
+        self.items = list(items)
+        self.dates = pd.Index(dates)
+        self.tickers = pd.Index(tickers)
+        self.__item_positions = dict((item, i) for i, item in enumerate(self.items))
+
+        if values.shape != (len(self.items), len(self.dates), len(self.tickers)):
+            raise ValueError("Values of shape {} do not match {} items, {} dates and {} tickers"\
+                             .format(values.shape, len(self.items), len(self.dates), len(self.tickers)))
+
+    @staticmethod
+    def from_frames(frames, dtype=np.float64):
+        """ Creates a panel from a dictionary of (date x ticker) data frames which
+            are aligned on the union of their dates and tickers.
+
+            Arguments:
+            frames -- a dictionary from item to data frame
+            dtype -- the float type of the panel (e.g. np.float32 to halve memory)
+        """
+        items = sorted(frames.keys())
+        dates = None
+        tickers = None
+        for item in items:
+            frame = frames[item]
+            dates = frame.index if dates is None else dates.union(frame.index)
+            tickers = frame.columns if tickers is None else tickers.union(frame.columns)
+
+        if dates is None:
+            return DataPanel(np.empty((0, 0, 0), dtype=dtype), [], [], [])
+
+        values = np.empty((len(items), len(dates), len(tickers)), dtype=dtype)
+        for i, item in enumerate(items):
+            values[i] = frames[item].reindex(index=dates, columns=tickers).values
+
+        return DataPanel(values, items, dates, tickers)
+
+    @property
+    def major_axis(self):
+        return self.dates
+
+    @property
+    def minor_axis(self):
+        return self.tickers
+
+    def get(self, item):
+        """ Returns a (date x ticker) data frame for given item. """
+        return pd.DataFrame(self.values[self.__item_positions[item]], \
+                            index=self.dates, columns=self.tickers, copy=False)
+
+    def __getitem__(self, item):
+        return self.get(item)
+
+    def __setitem__(self, item, frame):
+        """ Sets (or adds) an item from a data frame aligned on the panel's dates
+            and tickers. Existing items are overwritten in place.
+        """
+        values = np.asarray(frame.reindex(index=self.dates, columns=self.tickers).values, \
+                            dtype=self.values.dtype)
+
+        if item in self.__item_positions:
+            self.values[self.__item_positions[item]] = values
+        else:
+            self.values = np.concatenate([self.values, values[np.newaxis]])
+            self.__item_positions[item] = len(self.items)
+            self.items.append(item)
+
+    def __contains__(self, item):
+        return item in self.__item_positions
+
+    def select(self, items):
+        """ Returns a panel with the given items (in given order). The values are
+            shared if the items are consecutive in this panel.
+        """
+        positions = [self.__item_positions[item] for item in items]
+        if len(positions) > 0 and positions == list(range(positions[0], positions[0] + len(positions))):
+            values = self.values[positions[0]:positions[0] + len(positions)]
+        else:
+            values = self.values[positions]
+
+        return DataPanel(values, items, self.dates, self.tickers)
+
+    def slice_dates(self, start=None, end=None):
+        """ Returns a panel sharing values with this panel for the dates from
+            start to end (both inclusive, None for open ended).
+        """
+        first = 0 if start is None else self.dates.searchsorted(start, side='left')
+        last = len(self.dates) if end is None else self.dates.searchsorted(end, side='right')
+        return self.iloc_dates(first, last)
+
+    def iloc_dates(self, start=None, stop=None):
+        """ Returns a panel sharing values with this panel for the dates at
+            positions start (inclusive) to stop (exclusive).
+        """
+        dates = slice(start, stop)
+        return DataPanel(self.values[:, dates], self.items, self.dates[dates], self.tickers)
+
+    def iter_chunks(self, chunk_size):
+        """ Yields consecutive panels of at most chunk_size dates which share
+            values with this panel.
+        """
+        for start in range(0, len(self.dates), chunk_size):
+            yield self.iloc_dates(start, start + chunk_size)
+
+    def ffill(self):
+        """ Returns a panel where NaN values are filled forward through time. """
+        valid = ~np.isnan(self.values)
+        positions = np.where(valid, np.arange(len(self.dates))[np.newaxis, :, np.newaxis], 0)
+        np.maximum.accumulate(positions, axis=1, out=positions)
+
+        values = np.take_along_axis(self.values, positions, axis=1)
+        # leading NaNs stay NaN
+        values[~np.maximum.accumulate(valid, axis=1)] = np.nan
+
+        return DataPanel(values, self.items, self.dates, self.tickers)
+
+    def dropna_dates(self):
+        """ Returns a panel without the dates for which any value is NaN. """
+        keep = ~np.isnan(self.values).any(axis=(0, 2))
+        if keep.all():
+            return self
+        return DataPanel(self.values[:, keep], self.items, self.dates[keep], self.tickers)
+
+    def dropna_tickers(self):
+        """ Returns a panel without the tickers for which any value is NaN. """
+        keep = ~np.isnan(self.values).any(axis=(0, 1))
+        if keep.all():
+            return self
+        return DataPanel(self.values[:, :, keep], self.items, self.dates, self.tickers[keep])
+
+    def astype(self, dtype):
+        """ Returns a panel with values of the given float type. """
+        return DataPanel(self.values.astype(dtype), self.items, self.dates, self.tickers)
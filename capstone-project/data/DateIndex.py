@@ -0,0 +1,35 @@
+import pandas as pd
+
+class DateIndex:
+    """ Maps the dates of a panel to their positions and back in constant time.
+
+        One index is shared by the components stepping through the same
+        dates (e.g. Environment, TradingAgent and InvestmentPortfolio) so
+        that dates are only ever looked up once and windows are expressed
+        as positions.
+    """
+
+    def __init__(self, dates):
+        """
+        Arguments:
+        dates -- the ordered dates
+        """
+        self.dates = pd.Index(dates)
+        self.__positions = dict((date, i) for i, date in enumerate(self.dates))
+
+        if len(self.__positions) != len(self.dates):
+            raise ValueError("Dates of a date index must be unique")
+
+    def position(self, date):
+        """ Returns the position of given date, raises a KeyError if unknown. """
+        return self.__positions[date]
+
+    def date(self, position):
+        """ Returns the date at given position. """
+        return self.dates[position]
+
+    def __contains__(self, date):
+        return date in self.__positions
+
+    def __len__(self):
+        return len(self.dates)
@@ -1,13 +1,17 @@
 import pandas as pd
-import datetime
+from collections import OrderedDict
+from .AsOfPanel import AsOfPanel
+from .DataPanel import DataPanel
 
 class FinancialDataService:
 	'''Exposes an API to retrieve quantitative data for different financial tickers.'''
 
+	# derived item -> (required items, computation over a mapping from item to
+	# a (date x ticker) data frame)
 	derived_items = {
-		'LEVERAGE': (["AVERAGE_ASSETS", "AVERAGE_EQUITY"], lambda df: df["AVERAGE_ASSETS"] / df["AVERAGE_EQUITY"]),
-		'INTEREST_BURDEN': (["EBT", "EBIT"], lambda df: df["EBT"] / df["EBIT"]),
-		'INTEREST_COVERAGE': (["NET_INCOME", "INTEREST_EXPENSE"], lambda df: df["NET_INCOME"] / df["INTEREST_EXPENSE"])
+		'LEVERAGE': (["AVERAGE_ASSETS", "AVERAGE_EQUITY"], lambda data: data["AVERAGE_ASSETS"] / data["AVERAGE_EQUITY"]),
+		'INTEREST_BURDEN': (["EBT", "EBIT"], lambda data: data["EBT"] / data["EBIT"]),
+		'INTEREST_COVERAGE': (["NET_INCOME", "INTEREST_EXPENSE"], lambda data: data["NET_INCOME"] / data["INTEREST_EXPENSE"])
 	}
 
 	# TODO possibly move into own class and push in as dependency
@@ -18,17 +22,48 @@ class FinancialDataService:
 				 'VZ', 'WMT', 'DIS']
 	}
 
-	def __init__(self, data_func):
+	def __init__(self, data_func, cache_size=128, snapshots=None, fingerprint=None):
+		""" Keyword arguments:
+			data_func -- function which takes items and tickers (and optionally
+						 start and end dates) and returns a panel
+			cache_size -- the number of (item, tickers, date range) data frames
+						  to keep in memory, 0 disables caching
+			snapshots -- a SnapshotCache to serve identical requests of
+						 'get_data' from (also across sessions) or None
+			fingerprint -- function which takes items and tickers and returns
+						   a digest of their source data, or None to use the
+						   'get_fingerprint' of the service of data_func (e.g.
+						   FlatFileDataService). Required for snapshots.
+		"""
+		if fingerprint is None:
+			fingerprint = getattr(getattr(data_func, '__self__', None), 'get_fingerprint', None)
+		if snapshots is not None and fingerprint is None:
+			raise ValueError("Snapshots need a fingerprint of the source data to detect changes")
+
 		self.__data_func = data_func
+		self.__cache_size = cache_size
+		self.__cache = OrderedDict()
+		self.__snapshots = snapshots
+		self.__fingerprint = fingerprint
 
 	def get_data(self, tickers = [], \
 					   items = [], \
 					   expand_composites = False, \
-					   trim = True):
+					   trim = True, \
+					   start = None, \
+					   end = None, \
+					   dates = None):
 		""" Returns a panel which's items are the given items and has dates
 			on the major axis and tickers on the minor axis.
 
-			NaN items are fill forwarded.
+			NaN items are fill forwarded, i.e. values are as of the last date
+			on which they were available.
+
+			Loaded and derived items are cached at their native dates (e.g.
+			quarterly for fundamentals), hence only items that have not been
+			requested for the same tickers and dates before are loaded. Derived
+			items are computed only when requested and at the native dates of
+			the items they are derived from.
 
 			Keyword arguments:
 			tickers -- can contain either valid stock tickers or stock indices.
@@ -38,11 +73,100 @@ class FinancialDataService:
 								 to its composite tickers.
 			trim -- if True then the head of the resulting panel will be trimmed
 					to the first date for which all items are non NaN.
+			start -- the first date to obtain or None for all history
+			end -- the last date to obtain or None for all history
+			dates -- the dates to resolve the items as of (e.g. a rebalance
+					 calendar) or None for all dates the data function returned
+					 for the items (also those on which no item has a value)
+
+			With a SnapshotCache the cleaned result is stored under a hash of
+			the request (the expanded tickers, items, trim, dates and date
+			range) and the source data, later identical requests are read
+			from the snapshot.
+		"""
+		tickers = FinancialDataService.__expand(tickers, expand_composites)
+
+		if self.__snapshots is not None:
+			source = self.__fingerprint(sorted(FinancialDataService.__split_items(items)[1]), tickers)
+			key = self.__snapshots.key(source, tickers, items=list(items), trim=trim, \
+									   start=start, end=end, dates=dates)
+			result = self.__snapshots.get(key)
+			if result is not None:
+				return result
+
+		frames, source_dates = self.__native_frames(tickers, items, start, end, required=True)
+		native = AsOfPanel.from_frames(frames)
+
+		if dates is None:
+			# all dates of the data function, also those without any value
+			dates = source_dates
+
+		# align all items on the dates, values are as of the last available date
+		result = native.to_panel(dates)
+
+		if trim:
+			result = result.dropna_dates()
+
+		# nanoseconds as the dates read from a snapshot
+		result = result.select(list(items))
+		result = DataPanel(result.values, result.items, pd.DatetimeIndex(result.dates).astype('datetime64[ns]'), \
+						   result.tickers)
+		if self.__snapshots is not None:
+			self.__snapshots.put(key, result)
+
+		return result
+
+	def get_native_data(self, tickers = [], \
+							  items = [], \
+							  expand_composites = False, \
+							  start = None, \
+							  end = None, \
+							  required = False):
+		""" Returns an AsOfPanel which holds each of the given items at its
+			native dates, see 'get_data' for the arguments. Given a start the
+			panel also holds the last native row before it, i.e. the values as
+			of start.
+
+			Keyword arguments:
+			required -- if True then the panel also holds the items required by
+						requested derived items
+		"""
+		tickers = FinancialDataService.__expand(tickers, expand_composites)
+		frames, source_dates = self.__native_frames(tickers, items, start, end, required)
+		return AsOfPanel.from_frames(frames)
+
+	def __native_frames(self, tickers, items, start, end, required):
+		""" Returns a dictionary from item to data frame at its native dates
+			and the union of the dates returned by the data function for
+			these items within the date range.
+		"""
+		derived_items, data_items = FinancialDataService.__split_items(items)
+
+		key = (tuple(tickers), start, end)
+		loaded = self.__load_items(data_items, tickers, key, start, end)
+
+		for derived_item in derived_items:
+			loaded[derived_item] = self.__derive_item(derived_item, tickers, key, start, end)
+
+		if not required:
+			loaded = dict((item, loaded[item]) for item in items)
+
+		frames = {}
+		source_dates = pd.DatetimeIndex([])
+		for item, (frame, item_dates) in loaded.items():
+			frames[item] = frame
+			source_dates = source_dates.union(item_dates)
+
+		return frames, source_dates
+
+	@staticmethod
+	def __split_items(items):
+		""" Returns the derived items among the given items and the items to
+			load from the data function for them.
 		"""
 		derived_items = set(FinancialDataService.derived_items.keys()) & set(items)
 		direct_items = set(items) - derived_items
 
-
 		# direct items required by derived items
 		required_direct_items = set([item for derived_item in derived_items \
 									 	  for item in FinancialDataService.derived_items[derived_item][0]])
@@ -50,59 +174,112 @@ class FinancialDataService:
 		# less the direct items that are required anyway
 		required_additional_items = required_direct_items - direct_items
 
-		data_items = set(direct_items | required_additional_items)
+		return derived_items, set(direct_items | required_additional_items)
 
-		if expand_composites:
-			real_tickers = [ticker for ticker in tickers \
-							if ticker not in FinancialDataService.indices.keys()]
-			indices = [FinancialDataService.indices[ticker] for ticker in tickers \
-							if ticker in FinancialDataService.indices.keys()]
-			# flatten
-			indices = [item for sublist in indices for item in sublist]
-			tickers = list(set(real_tickers + indices))
+	@staticmethod
+	def __expand(tickers, expand_composites):
+		""" Resolves composites (e.g. DJIA) among the given tickers to their
+			composite tickers if expand_composites.
+		"""
+		if not expand_composites:
+			return tickers
 
-		result = self.__data_func(data_items, tickers).fillna(method='ffill')
+		real_tickers = [ticker for ticker in tickers \
+				if ticker not in FinancialDataService.indices.keys()]
+		indices = [FinancialDataService.indices[ticker] for ticker in tickers \
+				if ticker in FinancialDataService.indices.keys()]
+		# flatten
+		indices = [item for sublist in indices for item in sublist]
+		# sorted so that the order does not depend on the hashing of a session
+		return sorted(set(real_tickers + indices))
 
-		# mapping from derived item to computation lambda
-		compute_items = dict((key, FinancialDataService.derived_items[key][1]) for key in derived_items)
-		derived_data = self.__compute_derived_items__(result, compute_items)
+	def __load_items(self, items, tickers, key, start, end):
+		""" Returns a dictionary from item to a tuple of its data frame at its
+			native dates and the dates returned by the data function for it
+			(also those without any value) for the given items, only items
+			which are not cached are loaded.
+		"""
+		frames = {}
+		missing = []
+		for item in items:
+			frame = self.__cache_get((item,) + key)
+			if frame is None:
+				missing.append(item)
+			else:
+				frames[item] = frame
 
-		result = result.join(derived_data)
+		if len(missing) > 0:
+			if end is None:
+				loaded = self.__data_func(missing, tickers)
+			else:
+				# the history before start is loaded to carry its last values into the range
+				loaded = self.__data_func(missing, tickers, end=end)
 
-		if trim:
-			result = result.dropna(axis=1)
-
-		return result.loc[list(items),:,:]
-
-	def __compute_derived_items__(self, data, computations):
-	    """Applies the given computations over each ticker data frame of the
-	       given panel and returns a panel for which each ticker data frame contains
-	       the given computation results where the column names are the keys of
-	       the computations dictionary. If 'data' is a data frame then this is treated
-	       as a panel with one ticker.
-
-	       Keyword arguments:
-	       data -- a panel or data frame
-	       computations -- a dictionary where a key maps to a function that takes
-	                       a data frame and outputs a series with result metrics
-	    """
-
-	    try:
-	        keys = data.minor_axis
-	        metrics = {}
-	        for key in keys:
-	            df = data.loc[:,:,key]
-	            metrics[key] = self.__compute__(df, computations)
-	        return pd.Panel(metrics).swapaxes(0, 2)
-	    except AttributeError:
-	        return self.__compute__(data, computations)
-
-	def __compute__(self, df, computations):
-	    columns = {}
-
-	    for key in computations.keys():
-	        computation = computations[key]
-	        computation_result = computation(df)
-	        columns[key] = computation_result
-
-	    return pd.DataFrame(columns)
+			for item in missing:
+				frame = loaded.get(item)
+				dates = pd.DatetimeIndex(frame.loc[start:end].index)
+				frame = FinancialDataService.__in_range(FinancialDataService.__native(frame), start, end)
+
+				frames[item] = (frame, dates)
+				self.__cache_put((item,) + key, frames[item])
+
+		return frames
+
+	def __derive_item(self, item, tickers, key, start, end):
+		""" Computes the given derived item over whole (date x ticker) frames of
+			its required items.
+		"""
+		derived = self.__cache_get((item,) + key)
+		if derived is not None:
+			return derived
+
+		required_items, computation = FinancialDataService.derived_items[item]
+		required = self.__load_items(required_items, tickers, key, start, end)
+
+		dates = None
+		source_dates = pd.DatetimeIndex([])
+		for required_frame, required_dates in required.values():
+			dates = required_frame.index if dates is None else dates.union(required_frame.index)
+			source_dates = source_dates.union(required_dates)
+
+		frame = computation(dict((required_item, required_frame.reindex(dates, method='ffill')) \
+								 for required_item, (required_frame, required_dates) in required.items()))
+		derived = (FinancialDataService.__native(frame), source_dates)
+		self.__cache_put((item,) + key, derived)
+
+		return derived
+
+	@staticmethod
+	def __native(frame):
+		""" Returns the given frame at the dates on which it has any value with
+			values filled forward over these dates.
+		"""
+		return frame.loc[frame.notna().any(axis=1).values].ffill()
+
+	@staticmethod
+	def __in_range(frame, start, end):
+		""" Returns the rows of the given native frame from start to end and
+			the last row before start, which holds the values as of start (not
+			every data function restricts its dates to the range).
+		"""
+		frame = frame.loc[:end]
+		if start is None:
+			return frame
+
+		start = pd.Timestamp(start)
+		return pd.concat([frame.loc[frame.index < start].tail(1), frame.loc[frame.index >= start]])
+
+	def __cache_get(self, key):
+		frame = self.__cache.pop(key, None)
+		if frame is not None:
+			# most recently used go last
+			self.__cache[key] = frame
+		return frame
+
+	def __cache_put(self, key, frame):
+		if self.__cache_size <= 0:
+			return
+
+		self.__cache[key] = frame
+		while len(self.__cache) > self.__cache_size:
+			self.__cache.popitem(last=False)
@@ -1,48 +1,206 @@
 import pandas as pd
 import os
+import io
+import hashlib
+import tarfile
+from .ColumnarFile import ColumnarFile
+from .DataPanel import DataPanel
 
 class FlatFileDataService:
     ''' Obtains (and allows to persist) panel data to flat files. '''
 
-    def __init__(self, directory):
+    # content digest by (path, size, modification time) of the files hashed so far
+    __digests = {}
+
+    def __init__(self, directory, binary=False, archive=None):
+        """
+        Arguments:
+        directory -- the directory holding one file per item
+        binary -- if True then items are read from and written to memory-mappable
+                  columnar files (e.g. 'NET_INCOME.col') rather than csv files.
+        archive -- a tar archive (e.g. 'data.tar.gz') to read the csv files in
+                  directory (e.g. 'data') from without extracting it or None
+        """
+        if binary and archive is not None:
+            raise ValueError("Columnar files cannot be read from an archive")
+
         self.__directory = directory
+        self.__binary = binary
+        self.__archive = archive
 
-    def get_data(self, items, tickers):
+    def get_data(self, items, tickers, start=None, end=None):
         """
         A file represents an individual item in the resulting panel and must be a
-        csv file where the relative name is the item name (e.g. 'NET_INCOME.csv').
+        csv file where the relative name is the item name (e.g. 'NET_INCOME.csv')
+        or a columnar file (e.g. 'NET_INCOME.col') if this instance is binary.
 
         An error will be raised if there are missing items or tickers.
 
         Arguments:
         items -- the data items to obtain
         tickers -- the tickers to obain
+        start -- the first date to obtain or None for all history
+        end -- the last date to obtain or None for all history
         """
 
         data_items = {}
+        # the archive is opened once for all items
+        archive = tarfile.open(self.__archive) if self.__archive is not None else None
+        try:
+            for item in items:
+                if self.__binary:
+                    path = os.path.join(self.__directory, "{}.{}".format(item, ColumnarFile.extension))
+                    data_items[item] = ColumnarFile.read(path, tickers, start=start, end=end)
+                    continue
+
+                with self.__open(archive, "{}.csv".format(item)) as f:
+                    data_for_item = pd.read_csv(f, index_col=0, parse_dates=True)
+                data_items[item] = data_for_item.loc[start:end, tickers]
+
+                missing = set(data_for_item.columns) & set(tickers) - set(tickers)
+                if len(missing) > 0:
+                    raise Exception("Missing tickers: {}".format(missing))
+        finally:
+            if archive is not None:
+                archive.close()
+
+        return DataPanel.from_frames(data_items)
+
+    def get_fingerprint(self, items, tickers=None):
+        """
+        Returns a hex digest of the content of the files of the given items
+        (or of the archive holding them), which changes whenever the data
+        changes (see SnapshotCache).
+
+        Arguments:
+        items -- the data items
+        tickers -- ignored, all tickers are in the same files
+        """
+        digest = hashlib.sha256()
+        if self.__archive is not None:
+            digest.update(FlatFileDataService.__digest(self.__archive).encode('utf-8'))
+
+        extension = ColumnarFile.extension if self.__binary else "csv"
+        for item in sorted(items):
+            digest.update("{}.{}".format(item, extension).encode('utf-8'))
+            if self.__archive is None:
+                path = os.path.join(self.__directory, "{}.{}".format(item, extension))
+                digest.update(FlatFileDataService.__digest(path).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def __open(self, archive, file_name):
+        """ Opens the given file in the directory (or the open archive) for reading. """
+        if archive is None:
+            return open(os.path.join(self.__directory, file_name), 'rb')
+
+        # archive member names always use '/'
+        member = "/".join([self.__directory.strip("/"), file_name]).lstrip("/")
+        try:
+            return io.BytesIO(archive.extractfile(member).read())
+        except KeyError:
+            raise IOError("No file {} in archive {}".format(member, self.__archive))
+
+    @staticmethod
+    def __digest(path):
+        """ Returns the (memoised) sha256 hex digest of the content of given file. """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+
+        digest = FlatFileDataService.__digests.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            FlatFileDataService.__digests[key] = digest
+        return digest
+
+    def iter_data(self, items, tickers, chunk_size=250):
+        """
+        Yields the data as consecutive panels of at most chunk_size dates over the
+        union of the dates of all items. Values are filled forward, also across
+        chunks.
+
+        Only binary instances read the files chunk by chunk (keeping just the
+        dates in memory), csv files are read in full first.
+
+        Arguments:
+        items -- the data items to obtain
+        tickers -- the tickers to obain
+        chunk_size -- the number of dates per panel
+        """
+
+        if not self.__binary:
+            for chunk in self.get_data(items, tickers).ffill().iter_chunks(chunk_size):
+                yield chunk
+            return
+
+        paths = dict((item, os.path.join(self.__directory, "{}.{}".format(item, ColumnarFile.extension))) \
+                     for item in items)
+
+        dates = None
         for item in items:
-            path = os.path.join(self.__directory, "{}.csv".format(item))
-            data_for_item = pd.read_csv(path, index_col=0, parse_dates=True)
-            data_items[item] = data_for_item[tickers]
+            item_dates = ColumnarFile.read_dates(paths[item])
+            dates = item_dates if dates is None else dates.union(item_dates)
 
-            missing = set(data_for_item.columns) & set(tickers) - set(tickers)
-            if len(missing) > 0:
-                raise Exception("Missing tickers: {}".format(missing))
+        # last filled values of each item to fill the next chunk with
+        carry = {}
+        for start in range(0, len(dates), chunk_size):
+            chunk_dates = dates[start:start + chunk_size]
 
-        return pd.Panel(data_items)
+            data_items = {}
+            for item in items:
+                data_for_item = ColumnarFile.read(paths[item], tickers, start=chunk_dates[0], end=chunk_dates[-1])
+                data_for_item = data_for_item.reindex(chunk_dates)
+                if item in carry:
+                    data_for_item.iloc[0] = data_for_item.iloc[0].fillna(carry[item])
+                data_for_item = data_for_item.ffill()
+
+                carry[item] = data_for_item.iloc[-1]
+                data_items[item] = data_for_item
+
+            yield DataPanel.from_frames(data_items)
 
     def persist_data(self, panel):
         """
         Writes the given panel to the directory associated with this instance.
 
-        The items of the given pandas panel will be used as file names and
+        The items of the given data panel will be used as file names and
         the data frame for given item will be the content of that file (that
         is for each item a file will be output).
 
         Arguments:
-        panel -- pandas data panel to persist
+        panel -- data panel to persist
         """
+        if self.__archive is not None:
+            raise ValueError("Cannot persist data to an archive")
 
         for item in panel.items:
-            output_path = "{}/{}.csv".format(self.__directory, item)
-            panel.get(item).to_csv(output_path)
+            if self.__binary:
+                output_path = "{}/{}.{}".format(self.__directory, item, ColumnarFile.extension)
+                ColumnarFile.write(output_path, panel.get(item))
+            else:
+                output_path = "{}/{}.csv".format(self.__directory, item)
+                panel.get(item).to_csv(output_path)
+
+    @staticmethod
+    def convert(csv_directory, binary_directory):
+        """
+        Converts each csv file in the given directory to a columnar file
+        in the binary directory.
+
+        Arguments:
+        csv_directory -- the directory with the item csv files
+        binary_directory -- the directory to write the columnar files to
+        """
+
+        for file_name in sorted(os.listdir(csv_directory)):
+            item, extension = os.path.splitext(file_name)
+            if extension != ".csv":
+                continue
+
+            data_for_item = pd.read_csv(os.path.join(csv_directory, file_name), index_col=0, parse_dates=True)
+            output_path = os.path.join(binary_directory, "{}.{}".format(item, ColumnarFile.extension))
+            ColumnarFile.write(output_path, data_for_item)
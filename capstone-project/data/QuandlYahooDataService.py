@@ -1,6 +1,12 @@
+import datetime
+import os
+import threading
 import pandas as pd
 import quandl
-import pandas_datareader.data as web
+import requests
+from io import StringIO
+from multiprocessing.pool import ThreadPool
+from .DataPanel import DataPanel
 
 class QuandlYahooDataService:
     ''' Obtains fundamental data from Quandl and market data from yahoo.'''
@@ -18,42 +24,160 @@ class QuandlYahooDataService:
         'NET_PROFIT_MARGIN': 'SF1/{}_NETMARGIN_ART',
     }
 
-    def __init__(self):
-        pass
+    __first_date = pd.Timestamp('1900-01-01')
 
-    def get_data(self, items, tickers):
+    def __init__(self, cache_directory=None, threads=8, \
+                 yahoo_url="http://ichart.finance.yahoo.com/table.csv", \
+                 quandl_url="https://www.quandl.com/api/v3/datasets"):
+        """
+        Arguments:
+        cache_directory -- directory to cache downloaded series in or None
+                           if every request should be downloaded
+        threads -- the maximum number of concurrent downloads
+        yahoo_url -- the url of the yahoo price table
+        quandl_url -- the url of the quandl datasets api
+        """
+        self.__cache_directory = cache_directory
+        self.__threads = threads
+        self.__yahoo_url = yahoo_url
+        self.__quandl_url = quandl_url
+        self.__pool = None
+        self.__local = threading.local()
+        self.__sessions = []
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Stops the download threads and closes their connections. The
+            service can still be used afterwards, it then starts new ones.
+        """
+        with self.__lock:
+            pool, self.__pool = self.__pool, None
+            sessions, self.__sessions = self.__sessions, []
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for session in sessions:
+            session.close()
+        self.__local = threading.local()
+
+    def get_data(self, items, tickers, start=None, end=None):
         """ Returns a panel which's items are the given items and has dates
             on the major axis and tickers on the minor axis.
 
+            All series are downloaded concurrently. If this instance has a cache
+            directory then only dates that are not cached yet are downloaded.
+
             Keyword arguments:
             tickers -- can contain either valid stock tickers or stock indices.
             items -- a list of data items to obtain. See 'get_available_items'.
+            start -- the first date to obtain or None for all history
+            end -- the last date to obtain or None for all history up to today
         """
-        fundamental_data = {}
-
-        items = set(items)
-        if "PRICE" in items:
-            prices = self.__load_yahoo__(tickers)
-            fundamental_data["PRICE"] = prices
-            items = items - {"PRICE"}
+        start = QuandlYahooDataService.__first_date if start is None else pd.Timestamp(start)
+        end = pd.Timestamp(datetime.date.today()) if end is None else pd.Timestamp(end)
 
+        keys = [(item, ticker) for item in items for ticker in tickers]
+        series = self.__get_pool().map(lambda key: self.__get_series(key[0], key[1], start, end), \
+                                       keys)
 
+        fundamental_data = {}
         for item in items:
-            item_keys = [self.__fundamental_items[item].format(ticker) for ticker in tickers]
-            data_for_item = quandl.get(item_keys)
+            item_series = series[:len(tickers)]
+            series = series[len(tickers):]
+
+            data_for_item = pd.concat(item_series, axis=1)
             data_for_item.columns = tickers
+            if item == "PRICE":
+                data_for_item = data_for_item.ffill()
 
             fundamental_data[item] = data_for_item
 
-        return pd.Panel(fundamental_data)
+        return DataPanel.from_frames(fundamental_data)
+
+    def __get_series(self, item, ticker, start, end):
+        source = "YAHOO" if item == "PRICE" else "QUANDL"
+
+        path = None
+        cached = None
+        if self.__cache_directory is not None:
+            path = os.path.join(self.__cache_directory, source, item, "{}.pkl".format(ticker))
+            if os.path.exists(path):
+                cached = pd.read_pickle(path)
+
+        if cached is None:
+            cached = {'start': start, 'end': end, 'data': self.__download(source, item, ticker, start, end)}
+        else:
+            # only fetch the dates outside of the cached range
+            parts = [cached['data']]
+            if start < cached['start']:
+                parts.insert(0, self.__download(source, item, ticker, start, \
+                                                cached['start'] - pd.Timedelta(days=1)))
+            if end > cached['end']:
+                parts.append(self.__download(source, item, ticker, \
+                                             cached['end'] + pd.Timedelta(days=1), end))
+
+            if len(parts) > 1:
+                data = pd.concat(parts)
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+                cached = {'start': min(start, cached['start']), 'end': max(end, cached['end']), 'data': data}
+            else:
+                path = None
+
+        if path is not None:
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    # created concurrently
+                    pass
+            pd.to_pickle(cached, path)
+
+        return cached['data'].loc[start:end]
+
+    def __download(self, source, item, ticker, start, end):
+        if source == "YAHOO":
+            return self.__load_yahoo__(ticker, start, end)
+
+        return self.__load_quandl__(self.__fundamental_items[item].format(ticker), start, end)
+
+    def __load_yahoo__(self, ticker, start, end):
+        params = {'s': ticker, 'g': 'd', \
+                  'a': start.month - 1, 'b': start.day, 'c': start.year, \
+                  'd': end.month - 1, 'e': end.day, 'f': end.year}
+        data = self.__read_csv(self.__yahoo_url, params)
+        return data["Adj Close"].sort_index()
+
+    def __load_quandl__(self, key, start, end):
+        url = "{}/{}.csv".format(self.__quandl_url, key)
+        params = {'start_date': start.strftime('%Y-%m-%d'), \
+                  'end_date': end.strftime('%Y-%m-%d'), \
+                  'api_key': quandl.ApiConfig.api_key}
+        data = self.__read_csv(url, params)
+        return data["Value"].sort_index()
+
+    def __read_csv(self, url, params):
+        # one session per thread to reuse its connections
+        session = getattr(self.__local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self.__local.session = session
+            with self.__lock:
+                self.__sessions.append(session)
 
-    def __load_yahoo__(self, tickers):
-        url = "http://ichart.finance.yahoo.com/table.csv?s={}"
-        result = pd.DataFrame()
-        for ticker in tickers:
-            data = pd.read_csv(url.format(ticker), index_col=0, parse_dates=True)["Adj Close"]
-            frame = data.to_frame(ticker)
-            result = result.join(data.to_frame(ticker), how='outer')
+        response = session.get(url, params=params)
+        response.raise_for_status()
+        return pd.read_csv(StringIO(response.text), index_col=0, parse_dates=True)
 
-        result = result.fillna(method='ffill')
-        return result
+    def __get_pool(self):
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = ThreadPool(self.__threads)
+            return self.__pool
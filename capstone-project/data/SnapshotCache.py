@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from .DataPanel import DataPanel
+
+class SnapshotCache:
+    ''' Persists cleaned data panels (see FinancialDataService.get_data) as
+        uncompressed binary files in a directory, named by a content hash of
+        the request and of the source data.
+
+        A snapshot is only served for an identical request over identical
+        source data (given by a digest of its content, see
+        FlatFileDataService.get_fingerprint), hence changing either yields a
+        new key and stale snapshots are never read (they are left in place
+        until 'clear').
+    '''
+
+    # part of every key, to be bumped whenever the cleaning of data changes
+    version = 1
+    extension = 'npz'
+
+    def __init__(self, directory):
+        """
+        Arguments:
+        directory -- the directory to keep the snapshots in (created if missing)
+        """
+        self.__directory = directory
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, source, tickers, **request):
+        """ Returns the hex digest identifying a request.
+
+            Arguments:
+            source -- the digest of the source data of the request
+            tickers -- the (expanded) tickers of the request
+            request -- the further arguments of the request, dates and
+                       timestamps are hashed by their values
+        """
+        if not source:
+            raise ValueError("Snapshots need the digest of their source data")
+
+        content = {
+            'version': SnapshotCache.version,
+            'tickers': sorted(str(ticker) for ticker in tickers),
+            'source': str(source)
+        }
+        for name, value in request.items():
+            content[name] = SnapshotCache.__normalise(value)
+
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """ Returns the data panel stored for given key or None if there is none. """
+        path = self.__path(key)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as snapshot:
+            return DataPanel(snapshot['values'], list(snapshot['items']), \
+                             pd.DatetimeIndex(snapshot['dates'].astype('datetime64[ns]')), \
+                             list(snapshot['tickers']))
+
+    def put(self, key, panel):
+        """ Stores given data panel for given key. """
+        path = self.__path(key)
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+
+        # written aside and moved into place so that readers never see a partial file
+        with open(temporary_path, 'wb') as f:
+            np.savez(f, values=np.ascontiguousarray(panel.values), \
+                     items=np.array([str(item) for item in panel.items], dtype=np.str_), \
+                     dates=pd.DatetimeIndex(panel.dates).values.astype('datetime64[ns]').astype(np.int64), \
+                     tickers=np.array([str(ticker) for ticker in panel.tickers], dtype=np.str_))
+        getattr(os, 'replace', os.rename)(temporary_path, path)
+
+    def clear(self):
+        """ Removes all snapshots. """
+        for file_name in os.listdir(self.__directory):
+            if file_name.endswith("." + SnapshotCache.extension):
+                os.remove(os.path.join(self.__directory, file_name))
+
+    def __path(self, key):
+        return os.path.join(self.__directory, "{}.{}".format(key, SnapshotCache.extension))
+
+    @staticmethod
+    def __normalise(value):
+        """ Returns a json serialisable representation of given request argument. """
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'isoformat'):
+            return str(pd.Timestamp(value))
+        if isinstance(value, pd.Index) and len(value) > 0 and isinstance(value[0], pd.Timestamp):
+            return hashlib.sha256(pd.DatetimeIndex(value).values.astype('datetime64[ns]').tobytes()).hexdigest()
+        return [SnapshotCache.__normalise(element) for element in value]
@@ -1,3 +1,8 @@
-from FinancialDataService import FinancialDataService
-from QuandlYahooDataService import QuandlYahooDataService
-from FlatFileDataService import FlatFileDataService
+from .FinancialDataService import FinancialDataService
+from .QuandlYahooDataService import QuandlYahooDataService
+from .FlatFileDataService import FlatFileDataService
+from .ColumnarFile import ColumnarFile
+from .DataPanel import DataPanel
+from .AsOfPanel import AsOfPanel
+from .DateIndex import DateIndex
+from .SnapshotCache import SnapshotCache
@@ -0,0 +1,64 @@
+import numpy as np
+from abc import ABCMeta, abstractmethod
+
+# the abstract base of Python 2 and 3
+class Discretiser(ABCMeta('ABC', (object,), {})):
+    """ Base class of the discretisers which map the values of one item for
+        all dates and tickers to bins in one pass.
+
+        Subclasses assign bins 0 .. bins - 1 to the values they can place.
+        Missing values (e.g. NaN) either get a bin of their own (bin 'bins')
+        or, without a NaN bin, invalidate their whole cross section which is
+        then marked with -1.
+    """
+
+    def __init__(self, bins=3, nan_bin=True):
+        """
+        Arguments:
+        bins -- the number of bins for values which are not missing
+        nan_bin -- if True then missing values get a bin of their own, else
+                   cross sections with missing values are marked invalid (-1)
+        """
+        self.bins = bins
+        self.nan_bin = nan_bin
+
+    def get_bins(self):
+        """ Returns the number of distinct states including the NaN bin. """
+        return self.bins + 1 if self.nan_bin else self.bins
+
+    def fit(self, item, values, dates):
+        """ Learns the bins of given item from its values, if the discretiser
+            needs to (see FixedEdgeDiscretiser).
+
+            Arguments:
+            item -- the item the values belong to
+            values -- float array of shape (dates, tickers)
+            dates -- the dates of the rows of values
+        """
+        pass
+
+    def discretise(self, item, values, dates):
+        """ Fits (if needed) and returns the bins of given values as an int8
+            array of shape (dates, tickers).
+
+            Arguments:
+            item -- the item the values belong to
+            values -- float array of shape (dates, tickers)
+            dates -- the dates of the rows of values
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.fit(item, values, dates)
+
+        bins, missing = self._assign(item, values)
+        states = bins.astype(np.int8)
+
+        if self.nan_bin:
+            states[missing] = self.bins
+        else:
+            states[missing.any(axis=1)] = -1
+
+        return states
+
+    @abstractmethod
+    def _assign(self, item, values):
+        """ Returns the bin of each value and a mask of the missing values. """
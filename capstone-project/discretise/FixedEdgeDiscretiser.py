@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from .Discretiser import Discretiser
+
+class FixedEdgeDiscretiser(Discretiser):
+    """ Discretises values with the same bin edges for all dates. The edges
+        are either given or learned per item as the quantiles of all values
+        within a training window of dates (e.g. the learning period, so that
+        later dates do not leak into the states).
+
+        Edges are learned once per item on the first values discretised and
+        then kept, e.g. for all panels of a stream. Values on an edge belong
+        to the lower bin.
+    """
+
+    def __init__(self, bins=3, start=None, end=None, edges=None, nan_bin=True):
+        """
+        Arguments:
+        bins -- the number of bins for values which are not missing
+        start -- the first date of the training window or None for the first date
+        end -- the last date of the training window or None for the last date
+        edges -- the bins - 1 inner edges to use for all items or None to learn them
+        nan_bin -- see Discretiser
+        """
+        Discretiser.__init__(self, bins=bins, nan_bin=nan_bin)
+        self.__start = start
+        self.__end = end
+        self.__edges = {}
+        self.__fixed_edges = None
+
+        if edges is not None:
+            self.__fixed_edges = np.asarray(edges, dtype=np.float64)
+            if len(self.__fixed_edges) != bins - 1:
+                raise ValueError("Expected {} edges for {} bins but got {}".format(bins - 1, bins, len(edges)))
+
+    def get_edges(self, item):
+        """ Returns the inner edges for given item. """
+        if self.__fixed_edges is not None:
+            return self.__fixed_edges
+        return self.__edges[item]
+
+    def fit(self, item, values, dates):
+        if self.__fixed_edges is not None or item in self.__edges:
+            return
+
+        dates = pd.Index(dates)
+        rows = np.ones(len(dates), dtype=bool)
+        if self.__start is not None:
+            rows &= dates >= self.__start
+        if self.__end is not None:
+            rows &= dates <= self.__end
+
+        training = values[rows]
+        training = training[np.isfinite(training)]
+        if len(training) == 0:
+            raise ValueError("No values for {} to learn bin edges from between {} and {}"\
+                             .format(item, self.__start, self.__end))
+
+        self.__edges[item] = np.percentile(training, 100.0 * np.arange(1, self.bins) / self.bins)
+
+    def _assign(self, item, values):
+        return np.searchsorted(self.get_edges(item), values, side='left'), ~np.isfinite(values)
@@ -0,0 +1,17 @@
+import numpy as np
+from .Discretiser import Discretiser
+
+class QuantileDiscretiser(Discretiser):
+    """ Discretises the values of each date into cross-sectional quantile
+        bins of (as far as possible) equal size, ranking ties in ticker order.
+    """
+
+    def _assign(self, item, values):
+        missing = ~np.isfinite(values)
+
+        # missing values rank last and are not counted
+        ranked = np.where(missing, np.inf, values)
+        ranks = np.argsort(np.argsort(ranked, axis=1, kind='mergesort'), axis=1, kind='mergesort')
+        counts = np.maximum((~missing).sum(axis=1), 1)[:, np.newaxis]
+
+        return ranks * self.bins // counts, missing
@@ -0,0 +1,30 @@
+import warnings
+import numpy as np
+from .Discretiser import Discretiser
+
+class ZScoreDiscretiser(Discretiser):
+    """ Discretises the cross-sectional zscores of each date into equal width
+        bins between their minimum and maximum (as per pd.cut), which is how
+        Environment always formed its states.
+
+        Values on an inner edge belong to the lower bin. Cross sections with
+        less than two distinct values have no zscores, hence are missing.
+    """
+
+    def _assign(self, item, values):
+        with warnings.catch_warnings():
+            # cross sections without any values are missing anyway
+            warnings.simplefilter('ignore', RuntimeWarning)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = np.nanmean(values, axis=1)[:, np.newaxis]
+                std = np.nanstd(values, axis=1)[:, np.newaxis]
+                zscores = (values - mean) / std
+
+                lower = np.nanmin(zscores, axis=1)[:, np.newaxis]
+                upper = np.nanmax(zscores, axis=1)[:, np.newaxis]
+
+        # inner bin edges as per np.linspace(lower, upper, bins + 1) in pd.cut
+        edges = lower + np.arange(1, self.bins) * ((upper - lower) / self.bins)
+        bins = (zscores[:, :, np.newaxis] > edges[:, np.newaxis, :]).sum(axis=2)
+
+        return bins, ~np.isfinite(zscores)
@@ -0,0 +1,4 @@
+from .Discretiser import Discretiser
+from .ZScoreDiscretiser import ZScoreDiscretiser
+from .QuantileDiscretiser import QuantileDiscretiser
+from .FixedEdgeDiscretiser import FixedEdgeDiscretiser
@@ -1,11 +1,25 @@
 import numpy as np
 import pandas as pd
+from .PortfolioReturns import PortfolioReturns
 
 class InvestmentPortfolio:
     """Represents a portfolio of tickers with weights through time."""
 
-    def __init__(self):
-        self.__portfolio = pd.DataFrame()
+    def __init__(self, date_index=None):
+        """
+        Arguments:
+        date_index -- the DateIndex of the dates traded on, rebalances are then
+                      keyed by position and must be on one of its dates, or None
+        """
+        # weights are appended to a preallocated (date x ticker) matrix which
+        # grows geometrically, the frame is only built on request
+        self.__weights = np.zeros((16, 16))
+        self.__date_index = date_index
+        self.__dates = []  # rebalance dates or their positions given a date index
+        self.__date_rows = {}
+        self.__tickers = []
+        self.__ticker_columns = {}
+        self.__portfolio = None
 
     def rebalance(self, date, weights):
         """Sets the given weights for their assosiated assets at given date.
@@ -15,35 +29,89 @@ class InvestmentPortfolio:
         weights -- a dictonary or series containing a mapping from ticker to weight
                    which need not be normalized.
         """
-        for missing in set(weights.index) - set(self.__portfolio.columns):
-            self.__portfolio[missing] = .0
+        weights = pd.Series(weights)
+
+        for ticker in weights.index:
+            if ticker not in self.__ticker_columns:
+                self.__ticker_columns[ticker] = len(self.__tickers)
+                self.__tickers.append(ticker)
+
+        key = date if self.__date_index is None else self.__date_index.position(date)
+        row = self.__date_rows.get(key)
+        if row is None:
+            row = len(self.__dates)
+            self.__date_rows[key] = row
+            self.__dates.append(key)
+
+        self.__reserve(len(self.__dates), len(self.__tickers))
 
-        self.__portfolio.ix[date] = weights
-        self.__portfolio = self.__portfolio.fillna(0)
+        columns = [self.__ticker_columns[ticker] for ticker in weights.index]
+        self.__weights[row, :] = .0
+        self.__weights[row, columns] = np.nan_to_num(weights.values.astype(np.float64))
+        self.__portfolio = None
 
-    def calculate_portfolio_returns(self, prices):
+    def __reserve(self, rows, columns):
+        capacity_rows, capacity_columns = self.__weights.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+
+        if rows > capacity_rows:
+            capacity_rows = max(rows, 2 * capacity_rows)
+        if columns > capacity_columns:
+            capacity_columns = max(columns, 2 * capacity_columns)
+
+        weights = np.zeros((capacity_rows, capacity_columns))
+        weights[:self.__weights.shape[0], :self.__weights.shape[1]] = self.__weights
+        self.__weights = weights
+
+    def calculate_portfolio_returns(self, prices, drift=False, transaction_cost=0.0):
         """ Calculates the portfolio returns given the individual asset prices.
 
         Arguments:
         prices -- data frame which contains prices for all assets covered by this
                   portfolio.
+        drift -- if True then weights drift with asset returns between rebalances
+        transaction_cost -- the cost per unit of turnover at a rebalance
         """
-        tickers = set(self.__portfolio.columns)
+        portfolio = self.get_portfolio_weights()
+        returns = PortfolioReturns(prices.loc[:, list(portfolio.columns)], \
+                                   drift=drift, transaction_cost=transaction_cost)
+        return returns.calculate(portfolio)
 
-        prices = prices.ix[:,tickers]
-        norm_weights = self.__portfolio.div(self.__portfolio.sum(axis=1), axis=0)
-        weights_aligned = pd.DataFrame(columns=prices.columns, index=prices.index)
-        weights_aligned.ix[norm_weights.index,norm_weights.columns] = norm_weights
-        weights_aligned = weights_aligned.fillna(method='ffill').fillna(0)
-        weights_aligned = weights_aligned.shift(1)[1:]
-        asset_returns = (prices / prices.shift(1) - 1)[1:]
-        asset_returns = asset_returns.ix[weights_aligned.index]
+    def get_state(self):
+        """ Returns the rebalances as a dictionary of arrays (the rebalance dates
+            as int64 nanoseconds, the tickers and the weights per date and
+            ticker), see 'set_state'.
+        """
+        portfolio = self.get_portfolio_weights()
+        return {
+            'dates': pd.DatetimeIndex(portfolio.index).values.astype('datetime64[ns]').astype(np.int64),
+            'tickers': list(portfolio.columns),
+            'weights': portfolio.values.copy()
+        }
 
-        weighted_asset_returns = asset_returns * weights_aligned
-        portfolio_returns = weighted_asset_returns.dot(np.ones(len(weighted_asset_returns.columns)))
-        return portfolio_returns
+    def set_state(self, state):
+        """ Replaces all rebalances with the ones of given dictionary as
+            returned by 'get_state'.
+        """
+        weights = np.asarray(state['weights'], dtype=np.float64).reshape(len(state['dates']), len(state['tickers']))
+        dates = pd.DatetimeIndex(np.asarray(state['dates'], dtype=np.int64).astype('datetime64[ns]'))
 
+        self.__weights = np.zeros((16, 16))
+        self.__dates = []
+        self.__date_rows = {}
+        self.__tickers = []
+        self.__ticker_columns = {}
+        self.__portfolio = None
+        for date, row in zip(dates, weights):
+            self.rebalance(date, pd.Series(row, index=list(state['tickers'])))
 
     def get_portfolio_weights(self):
         """ Yields the portfolio weights. """
+        if self.__portfolio is None:
+            dates = self.__dates
+            if self.__date_index is not None:
+                dates = self.__date_index.dates[dates]
+            self.__portfolio = pd.DataFrame(self.__weights[:len(self.__dates), :len(self.__tickers)].copy(), \
+                                            index=dates, columns=self.__tickers)
         return self.__portfolio
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_triangular
+
+class MinVarianceSolver:
+    """ Solves the long-only minimum variance portfolio
+
+            minimise w' C w  subject to  sum(w) = 1, w >= 0
+
+        with a primal active-set method. Each iteration solves the equality
+        constrained problem over the currently held (free) assets using a
+        Cholesky factor of their covariance which is updated in place when an
+        asset enters or leaves the free set rather than being refactorised.
+
+        Consecutive rebalances usually hold nearly the same assets, hence each
+        solve is warm started from the weights of the previous solution, i.e.
+        typically only a few assets enter or leave the free set.
+    """
+
+    def __init__(self, tolerance=1e-12, max_iterations=None):
+        """
+        Arguments:
+        tolerance -- relative tolerance of the optimality conditions
+        max_iterations -- maximum number of active-set iterations per solve or
+                          None for a bound based on the number of assets
+        """
+        self.__tolerance = tolerance
+        self.__max_iterations = max_iterations
+        self.__weights = None
+
+    def solve(self, cov):
+        """ Returns the minimum variance portfolio weights as a series indexed
+            like the given covariance matrix.
+
+            Raises a ValueError if the covariance matrix is not finite (e.g.
+            estimated over fewer than two returns).
+
+            Arguments:
+            cov -- covariance matrix as a DataFrame
+        """
+        sigma = np.asarray(cov.values, dtype=np.float64)
+        if not np.isfinite(sigma).all():
+            raise ValueError("Covariance matrix must be finite")
+        x = self.__solve(sigma, self.__warm_start(cov.index))
+
+        self.__weights = dict(zip(cov.index, x))
+        return pd.Series(x, index=cov.index)
+
+    def solve_or_equal(self, cov):
+        """ Returns the weights as per 'solve' or equal weights if the
+            covariance matrix is not finite (e.g. trading from the first date).
+
+            Arguments:
+            cov -- covariance matrix as a DataFrame
+        """
+        if not np.isfinite(np.asarray(cov.values, dtype=np.float64)).all():
+            return pd.Series(1.0 / len(cov.index), index=cov.index)
+        return self.solve(cov)
+
+    def get_state(self):
+        """ Returns the tickers and weights of the previous solution the next
+            solve is warm started from, see 'set_state'.
+        """
+        weights = self.__weights or {}
+        tickers = sorted(weights.keys())
+        return {'tickers': tickers, 'weights': np.array([weights[ticker] for ticker in tickers], dtype=np.float64)}
+
+    def set_state(self, state):
+        """ Sets the solution to warm start the next solve from. """
+        weights = dict(zip(state['tickers'], np.asarray(state['weights'], dtype=np.float64)))
+        self.__weights = weights if weights else None
+
+    def reset(self):
+        """ Forgets the previous solution, i.e. the next solve starts cold. """
+        self.__weights = None
+
+    def __warm_start(self, tickers):
+        x = np.zeros(len(tickers))
+        if self.__weights is not None:
+            x = np.array([self.__weights.get(ticker, 0.0) for ticker in tickers])
+
+        if x.sum() <= 0:
+            x = np.ones(len(tickers))
+
+        return x / x.sum()
+
+    def __solve(self, sigma, x):
+        n = len(sigma)
+        scale = np.abs(np.diag(sigma)).max() if n > 0 else 0.0
+        if scale == 0:
+            # all portfolios have zero variance (e.g. constant prices), keep the start
+            return x
+        max_iterations = self.__max_iterations or 10 * n + 10
+
+        free = list(np.flatnonzero(x > 0))
+        try:
+            factor = np.linalg.cholesky(sigma[np.ix_(free, free)])
+        except np.linalg.LinAlgError:
+            # singular, build the factor asset by asset with a ridge instead
+            factor = np.zeros((0, 0))
+            for m, k in enumerate(free):
+                factor = self.__insert(factor, sigma, free[:m], k, scale)
+
+        for _ in range(max_iterations):
+            # equality constrained optimum over the free assets
+            ones = np.ones(len(free))
+            y = solve_triangular(factor, ones, lower=True, check_finite=False)
+            y = solve_triangular(factor, y, lower=True, trans='T', check_finite=False)
+            y /= y.sum()
+
+            x_free = x[free]
+            if (y < 0).any():
+                # move towards the optimum until the first weight drops to zero
+                direction = y - x_free
+                decreasing = np.flatnonzero(direction < 0)
+                ratios = x_free[decreasing] / -direction[decreasing]
+                blocking = decreasing[np.argmin(ratios)]
+
+                x[free] = x_free + min(1.0, ratios.min()) * direction
+                x[free[blocking]] = 0.0
+
+                factor = self.__remove(factor, blocking)
+                del free[blocking]
+                continue
+
+            x[:] = 0.0
+            x[free] = y
+
+            # an excluded asset reduces the variance if its marginal variance
+            # is below the variance of the portfolio
+            gradient = sigma[:, free].dot(y)
+            multipliers = gradient - y.dot(gradient[free])
+            multipliers[free] = np.inf
+
+            k = np.argmin(multipliers)
+            if multipliers[k] >= -self.__tolerance * scale:
+                return x
+
+            factor = self.__insert(factor, sigma, free, k, scale)
+            free.append(k)
+
+        raise RuntimeError("Minimum variance solver did not converge in {} iterations".format(max_iterations))
+
+    def __insert(self, factor, sigma, free, k, scale):
+        """ Appends asset k to the Cholesky factor of the free assets. """
+        m = len(free)
+        column = solve_triangular(factor, sigma[free, k], lower=True, check_finite=False) if m > 0 else np.zeros(0)
+
+        # a tiny ridge keeps the factor definite for singular covariances
+        pivot = sigma[k, k] - column.dot(column)
+        pivot = np.sqrt(max(pivot, self.__tolerance * scale))
+
+        extended = np.zeros((m + 1, m + 1))
+        extended[:m, :m] = factor
+        extended[m, :m] = column
+        extended[m, m] = pivot
+        return extended
+
+    def __remove(self, factor, p):
+        """ Removes the asset at position p from the Cholesky factor. """
+        reduced = np.delete(factor, p, axis=0)
+
+        # rows after p carry an extra column, retriangularise the trailing block
+        trailing = reduced[p:, p:]
+        r = np.linalg.qr(trailing.T, mode='r')
+        r *= np.where(np.diag(r) < 0, -1.0, 1.0)[:, np.newaxis]
+
+        result = np.zeros((len(reduced), len(reduced)))
+        result[:, :p] = reduced[:, :p]
+        result[p:, p:] = r.T
+        return result
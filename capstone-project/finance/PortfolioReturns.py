@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+class PortfolioReturns:
+    """ Computes the returns of a portfolio on a fixed price history, either in
+        one go for all rebalances or incrementally date by date.
+
+        The return on a date is earned with the weights held after the previous
+        date. Weights are either held constant until the next rebalance or
+        drift with the asset returns. Transaction costs are charged as a
+        fraction of the turnover of a rebalance against the first period held.
+    """
+
+    def __init__(self, prices, drift=False, transaction_cost=0.0):
+        """
+        Arguments:
+        prices -- data frame which contains prices for all assets that can be
+                  held (dates on the index and tickers as columns).
+        drift -- if True then weights drift with asset returns between rebalances
+        transaction_cost -- the cost per unit of turnover at a rebalance
+        """
+        values = np.asarray(prices.values, dtype=np.float64)
+
+        self.__dates = prices.index
+        self.__positions = dict((ticker, i) for i, ticker in enumerate(prices.columns))
+        self.__returns = np.zeros_like(values)
+        self.__returns[1:] = values[1:] / values[:-1] - 1
+        self.__drift = drift
+        self.__transaction_cost = transaction_cost
+
+        self.__weights = np.zeros(values.shape[1])
+        self.__cost = 0.0
+        self.__last_position = None
+        self.__tracked = []
+
+    def calculate(self, portfolio_weights):
+        """ Calculates the portfolio returns for all dates but the first for the
+            given rebalance weights.
+
+            Arguments:
+            portfolio_weights -- data frame with rebalance dates on the index and
+                                 (not necessarily normalized) weights per ticker
+        """
+        n_dates, n_assets = self.__returns.shape
+        if len(portfolio_weights) == 0:
+            # nothing held before the first rebalance
+            return pd.Series(np.zeros(max(n_dates - 1, 0)), index=self.__dates[1:])
+
+        rebalance_positions = self.__dates.searchsorted(portfolio_weights.index)
+        weights = np.zeros((len(portfolio_weights), n_assets))
+        weights[:, self.__columns(portfolio_weights.columns)] = self.__normalize(portfolio_weights.values)
+
+        # the rebalance in effect for the return of each date
+        held = rebalance_positions.searchsorted(np.arange(n_dates) - 1, side='right') - 1
+        held_weights = np.where(held[:, np.newaxis] >= 0, weights[np.maximum(held, 0)], 0.0)
+
+        if self.__drift:
+            growth = np.cumprod(1 + np.nan_to_num(self.__returns), axis=0)
+            base = growth[rebalance_positions[np.maximum(held, 0)]]
+            held_weights = self.__normalize(held_weights * np.roll(growth, 1, axis=0) / base)
+
+        portfolio_returns = (held_weights * self.__returns).sum(axis=1)
+
+        if self.__transaction_cost:
+            before = np.vstack([np.zeros(n_assets), weights[:-1]])
+            if self.__drift and len(weights) > 1:
+                growth_ratio = growth[rebalance_positions[1:]] / growth[rebalance_positions[:-1]]
+                before[1:] = self.__normalize(before[1:] * growth_ratio)
+            costs = self.__transaction_cost * np.abs(weights - np.nan_to_num(before)).sum(axis=1)
+            charged = rebalance_positions + 1 < n_dates
+            np.subtract.at(portfolio_returns, rebalance_positions[charged] + 1, costs[charged])
+
+        return pd.Series(portfolio_returns[1:], index=self.__dates[1:])
+
+    def rebalance(self, date, weights):
+        """ Sets the weights held from given date onwards.
+
+            Arguments:
+            date -- the date of the rebalance
+            weights -- a series containing a mapping from ticker to weight
+                       which need not be normalized.
+        """
+        self.step(date)
+
+        new_weights = np.zeros_like(self.__weights)
+        new_weights[self.__columns(weights.index)] = self.__normalize(np.asarray(weights.values, dtype=np.float64))
+
+        self.__cost += self.__transaction_cost * np.abs(new_weights - self.__weights).sum()
+        self.__weights = new_weights
+
+    def step(self, date):
+        """ Realises the portfolio returns of all dates up to and including given
+            date that have not been realised yet and returns the last one.
+
+            Arguments:
+            date -- the date to advance to
+        """
+        position = self.__dates.get_loc(date)
+        if self.__last_position is None:
+            self.__last_position = position - 1
+
+        for i in range(self.__last_position + 1, position + 1):
+            asset_returns = self.__returns[i]
+            portfolio_return = (self.__weights * asset_returns).sum() - self.__cost
+            self.__cost = 0.0
+
+            if self.__drift:
+                self.__weights = self.__normalize(self.__weights * (1 + np.nan_to_num(asset_returns)))
+
+            self.__tracked.append((self.__dates[i], portfolio_return))
+            self.__last_position = i
+
+        return self.__tracked[-1][1] if self.__tracked else np.nan
+
+    def get_state(self):
+        """ Returns the progress of 'step' and 'rebalance' (the weights held,
+            the pending transaction cost, the last date realised and the
+            returns realised so far) as a dictionary of arrays, see 'set_state'.
+        """
+        dates = [date for date, portfolio_return in self.__tracked]
+        return {
+            'weights': self.__weights.copy(),
+            'cost': np.float64(self.__cost),
+            'last_date': np.int64(-1 if self.__last_position is None else \
+                                  pd.Timestamp(self.__dates[self.__last_position]).value),
+            'dates': pd.DatetimeIndex(dates).values.astype('datetime64[ns]').astype(np.int64),
+            'returns': np.array([portfolio_return for date, portfolio_return in self.__tracked], dtype=np.float64)
+        }
+
+    def set_state(self, state):
+        """ Restores the progress from given dictionary as returned by
+            'get_state' for prices of the same tickers which hold the last
+            date realised (they may start on another date).
+        """
+        weights = np.asarray(state['weights'], dtype=np.float64)
+        if weights.shape != self.__weights.shape:
+            raise ValueError("State for {} assets does not match {}".format(len(weights), len(self.__weights)))
+
+        self.__weights = weights.copy()
+        self.__cost = float(state['cost'])
+        last_date = int(state['last_date'])
+        self.__last_position = None if last_date < 0 else self.__dates.get_loc(pd.Timestamp(last_date))
+        dates = pd.DatetimeIndex(np.asarray(state['dates'], dtype=np.int64).astype('datetime64[ns]'))
+        self.__tracked = list(zip(dates, [float(value) for value in state['returns']]))
+
+    def get_returns(self):
+        """ Yields the portfolio returns realised through 'step' so far. """
+        if not self.__tracked:
+            return pd.Series([], dtype=np.float64)
+
+        dates, returns = zip(*self.__tracked)
+        return pd.Series(returns, index=dates)
+
+    def __columns(self, tickers):
+        return [self.__positions[ticker] for ticker in tickers]
+
+    def __normalize(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if weights.ndim == 1:
+                total = weights.sum()
+                return weights / total if total != 0 else weights
+            total = weights.sum(axis=1)[:, np.newaxis]
+            return np.where(total != 0, weights / total, weights)
@@ -0,0 +1,50 @@
+import numpy as np
+from .StreamingCovariance import StreamingCovariance
+
+class RollingCovariance:
+    """ Incrementally maintains the covariance of asset returns over an expanding
+        or fixed lookback window that moves forward through time.
+
+        Returns are appended to a StreamingCovariance as the window moves
+        forward, which gives the same result as DataFrame.cov() over the window.
+    """
+
+    def __init__(self, returns, lookback=None):
+        """
+        Arguments:
+        returns -- data frame with dates on the index and tickers as columns
+        lookback -- number of most recent dates to estimate the covariance over
+                    or None for an expanding window.
+        """
+        self.__index = returns.index
+        self.__columns = returns.columns
+        self.__values = np.asarray(returns.values, dtype=np.float64)
+        self.__lookback = lookback
+        self.__reset(0)
+
+    def covariance(self, date, tickers):
+        """ Returns the covariance matrix for given tickers estimated on the
+            returns up to and including the given date.
+
+            Arguments:
+            date -- the last date of the estimation window
+            tickers -- the tickers to obtain the covariance matrix for
+        """
+        self.__advance(self.__index.searchsorted(date, side='right'))
+        return self.__covariance.covariance(tickers)
+
+    def __advance(self, end):
+        if end < self.__end:
+            # moving backwards in time, start over
+            self.__reset(0)
+
+        if self.__lookback is not None and end - self.__end > self.__lookback:
+            # no overlap with the current window, rebuild it
+            self.__reset(end - self.__lookback)
+
+        self.__covariance.append(self.__values[self.__end:end])
+        self.__end = end
+
+    def __reset(self, end):
+        self.__covariance = StreamingCovariance(self.__columns, lookback=self.__lookback)
+        self.__end = end
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+class RollingSharpe:
+    """ Computes cumulative returns, standard deviations and Sharpe ratios
+        (cumulative return over standard deviation) of asset returns for
+        arbitrary windows of dates.
+
+        Prefix sums of log returns and of the first two moments are computed
+        once, hence each window costs O(tickers) regardless of its length.
+        Missing returns are skipped.
+    """
+
+    def __init__(self, returns):
+        """
+        Arguments:
+        returns -- data frame with dates on the index and tickers as columns
+        """
+        values = np.asarray(returns.values, dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        # centre on the column means to limit cancellation in the variance
+        with np.errstate(invalid='ignore'):
+            centre = np.nanmean(values, axis=0) if len(values) else np.zeros(values.shape[1])
+        centre = np.nan_to_num(centre)
+        centred = np.where(valid, values - centre, 0.0)
+
+        self.__index = returns.index
+        self.__columns = returns.columns
+        self.__log_sums = self.__prefix_sums(np.log1p(np.where(valid, values, 0.0)))
+        self.__sums = self.__prefix_sums(centred)
+        self.__squares = self.__prefix_sums(centred ** 2)
+        self.__counts = self.__prefix_sums(valid.astype(np.float64))
+
+    def window(self, date_from, date_to):
+        """ Returns the cumulative returns, standard deviations and Sharpe ratios
+            as series for the returns from and including date_from up to and
+            including date_to.
+        """
+        cum_returns, std, sharpe = self.windows([date_from], [date_to])
+        return cum_returns.iloc[0], std.iloc[0], sharpe.iloc[0]
+
+    def windows(self, dates_from, dates_to):
+        """ Returns the cumulative returns, standard deviations and Sharpe ratios
+            as data frames with one row per window (indexed by its first date)
+            and one column per ticker.
+
+            Arguments:
+            dates_from -- the first date of each window
+            dates_to -- the last date of each window
+        """
+        first = self.__index.searchsorted(dates_from, side='left')
+        last = self.__index.searchsorted(dates_to, side='right')
+
+        counts = self.__counts[last] - self.__counts[first]
+        sums = self.__sums[last] - self.__sums[first]
+        squares = self.__squares[last] - self.__squares[first]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cum_returns = np.expm1(self.__log_sums[last] - self.__log_sums[first])
+            variance = (squares - sums ** 2 / counts) / (counts - 1)
+            std = np.sqrt(np.maximum(variance, 0.0))
+            std[counts < 2] = np.nan
+            sharpe = cum_returns / std
+
+        index = self.__index[np.minimum(first, len(self.__index) - 1)]
+        return (pd.DataFrame(cum_returns, index=index, columns=self.__columns), \
+                pd.DataFrame(std, index=index, columns=self.__columns), \
+                pd.DataFrame(sharpe, index=index, columns=self.__columns))
+
+    def __prefix_sums(self, values):
+        sums = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=sums[1:])
+        return sums
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+class StreamingCovariance:
+    """ Maintains the covariance of asset returns which are appended date by
+        date over an expanding or fixed lookback window.
+
+        Running sums and cross-products are kept pairwise (i.e. only over dates
+        on which both assets have a return) which gives the same result as
+        DataFrame.cov() over the window. For a fixed lookback only the returns
+        within the window are retained.
+    """
+
+    def __init__(self, tickers, lookback=None):
+        """
+        Arguments:
+        tickers -- the tickers of the columns of the appended returns
+        lookback -- number of most recent dates to estimate the covariance over
+                    or None for an expanding window.
+        """
+        n = len(tickers)
+        self.__positions = dict((ticker, i) for i, ticker in enumerate(tickers))
+        self.__lookback = lookback
+        self.__sum_xy = np.zeros((n, n))
+        self.__sum_x = np.zeros((n, n))
+        self.__count = np.zeros((n, n))
+
+        # ring buffer of the returns within the lookback window
+        self.__buffer = np.empty((lookback if lookback is not None else 0, n))
+        self.__first = 0
+        self.__size = 0
+
+    def append(self, rows):
+        """ Appends returns of the next dates.
+
+            Arguments:
+            rows -- array of shape (dates, tickers) or (tickers,)
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+
+        if self.__lookback is None:
+            self.__update(rows, 1.0)
+            return
+
+        if len(rows) > self.__lookback:
+            # older rows would leave the window straight away
+            rows = rows[-self.__lookback:]
+
+        self.__evict(max(0, self.__size + len(rows) - self.__lookback))
+
+        positions = (self.__first + self.__size + np.arange(len(rows))) % self.__lookback
+        self.__buffer[positions] = rows
+        self.__size += len(rows)
+        self.__update(rows, 1.0)
+
+    def covariance(self, tickers):
+        """ Returns the covariance matrix for given tickers over the current window.
+
+            Arguments:
+            tickers -- the tickers to obtain the covariance matrix for
+        """
+        positions = np.array([self.__positions[ticker] for ticker in tickers], dtype=np.int64)
+        grid = np.ix_(positions, positions)
+
+        count = self.__count[grid]
+        sum_x = self.__sum_x[grid]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = (self.__sum_xy[grid] - sum_x * sum_x.T / count) / (count - 1)
+        covariance[count < 2] = np.nan
+
+        return pd.DataFrame(covariance, index=tickers, columns=tickers)
+
+    def __evict(self, n):
+        if n <= 0:
+            return
+
+        positions = (self.__first + np.arange(n)) % self.__lookback
+        self.__update(self.__buffer[positions], -1.0)
+        self.__first = (self.__first + n) % self.__lookback
+        self.__size -= n
+
+    def __update(self, rows, sign):
+        if len(rows) == 0:
+            return
+
+        valid = (~np.isnan(rows)).astype(np.float64)
+        rows = np.where(valid > 0, rows, 0.0)
+
+        self.__sum_xy += sign * rows.T.dot(rows)
+        self.__sum_x += sign * rows.T.dot(valid)
+        self.__count += sign * valid.T.dot(valid)
@@ -1 +1,6 @@
-from InvestmentPortfolio import InvestmentPortfolio
+from .InvestmentPortfolio import InvestmentPortfolio
+from .RollingCovariance import RollingCovariance
+from .PortfolioReturns import PortfolioReturns
+from .RollingSharpe import RollingSharpe
+from .StreamingCovariance import StreamingCovariance
+from .MinVarianceSolver import MinVarianceSolver
@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+
+class ArrayQLearner:
+    """ A Q learner which holds Q in a dense (states x actions) array.
+
+        States are encoded as integers by reading the discretised state
+        variables as digits of a (mixed radix) number with base 'bins', hence
+        the state space is known up front (the product of the bins) and actions
+        and updates for all actionables are computed in one go.
+    """
+
+    def __init__(self, environment, actions, state_variables, alpha=0.5, bins=3):
+        """
+            Arguments:
+            environment -- the environment that allows to sense the current state
+            actions -- possible actions for all states
+            state_variables -- a list of available state varialbes
+            alpha -- the learning rate
+            bins -- the number of discrete values each state variable can take or
+                    a list with one per state variable (see Environment.get_bins)
+        """
+        self.__environment = environment
+        self.__actions = list(actions)
+        self.__state_variables = state_variables
+        self.__alpha = alpha
+        self.__bins = np.broadcast_to(np.asarray(bins, dtype=np.int64), (len(state_variables),)).copy()
+        self.__multipliers = np.append(np.cumprod(self.__bins[:0:-1])[::-1], 1).astype(np.int64)
+        self.__Q = np.zeros((int(np.prod(self.__bins)), len(self.__actions)))
+        self.__seen = np.zeros(len(self.__Q), dtype=bool)
+        self.__visits = np.zeros(self.__Q.shape, dtype=np.int64)
+
+    def reward(self, states, rewards, log=None, recorder=None):
+        """ Realises rewards for given states.
+
+            Arguments:
+            states -- data frame with actionable (e.g. asset) on x
+                      and state variables on y
+            rewards -- series with rewards for actionables (e.g. asset)
+            log -- list to append log messages on or None if not needed
+            recorder -- TradeRecorder to record the choices and updates on or None
+        """
+        actionables = states.columns
+        state_indices = self.encode_states(states)
+        action_indices = self.choose(state_indices)
+
+        if log is not None:
+            self.__log_choices(actionables, state_indices, action_indices, log)
+        if recorder is not None:
+            self.__record_choices(actionables, state_indices, action_indices, recorder)
+
+        rewards = np.asarray(rewards.loc[actionables], dtype=np.float64)
+        old_q = self.__Q[state_indices, action_indices]
+
+        self.update(state_indices, action_indices, rewards)
+
+        if recorder is not None:
+            recorder.record('update', actionables, states=self.__digits(state_indices), \
+                            action=[self.__actions[a] for a in action_indices], \
+                            q_before=old_q, q_after=self.__Q[state_indices, action_indices], reward=rewards)
+
+        if log is not None:
+            new_q = self.__Q[state_indices, action_indices]
+            for i in range(len(actionables)):
+                log.append("Updating Q for action {} in state {} from {} to {}"\
+                             .format(self.__actions[action_indices[i]], \
+                                     self.decode_state(state_indices[i]), old_q[i], new_q[i]))
+
+    def get_actions(self, log=None, recorder=None):
+        """ Senses the environment and determines the best actions for each
+            of the possible actionable.
+
+            Arguments:
+            log -- list of log should be appended or None if not needed
+            recorder -- TradeRecorder to record the choices on or None
+        """
+
+        states = self.__environment.sense()
+        actions = self.get_actions_for_states(states, log=log, recorder=recorder)
+
+        return actions
+
+    def get_actions_for_states(self, states, log=None, recorder=None):
+        """
+            Gets actions to choose for given state data frame.
+
+            Arguments:
+            states -- data frame with actionable (e.g. asset) on x
+                      and state variables on y
+            log -- list to append log messages on or None if not needed
+            recorder -- TradeRecorder to record the choices on or None
+
+        """
+        action_indices = self.get_action_codes_for_states(states, log=log, recorder=recorder)
+
+        actions = [self.__actions[a] for a in action_indices]
+        return dict(zip(states.columns, actions))
+
+    def get_action_codes_for_states(self, states, log=None, recorder=None):
+        """ Chooses as per 'get_actions_for_states' but returns the index of
+            the action per column of the states.
+        """
+        state_indices = self.encode_states(states)
+        action_indices = self.choose(state_indices)
+
+        if log is not None:
+            self.__log_choices(states.columns, state_indices, action_indices, log)
+        if recorder is not None:
+            self.__record_choices(states.columns, state_indices, action_indices, recorder)
+
+        return action_indices.astype(np.int8)
+
+    def encode_states(self, states):
+        """ Maps the state of each actionable to its row in the Q table.
+
+            Arguments:
+            states -- data frame with actionable (e.g. asset) on x
+                      and state variables on y
+        """
+        values = np.asarray(states.loc[self.__state_variables].values, dtype=np.int64)
+        return self.__multipliers.dot(values)
+
+    def decode_state(self, state_index):
+        """ Returns the state tuple for the given Q table row. """
+        digits = (state_index // self.__multipliers) % self.__bins
+        return tuple(int(d) for d in digits)
+
+    def choose(self, state_indices):
+        """ Returns the index of the best action for each given state index,
+            ties resolve to the first action.
+        """
+        self.__seen[state_indices] = True
+        return self.__Q[state_indices].argmax(axis=1)
+
+    def update(self, state_indices, action_indices, rewards):
+        """ Applies Q <- Q + alpha * (reward - Q) for each given (state, action)
+            and reward. Updates hitting the same cell are applied as if done
+            one after the other in the given order.
+        """
+        cells = state_indices * len(self.__actions) + action_indices
+        ArrayQLearner.scatter_update(self.__Q.reshape(-1), cells, rewards, self.__alpha)
+        np.add.at(self.__visits.reshape(-1), cells, 1)
+
+    @staticmethod
+    def scatter_update(Q, cells, rewards, alpha):
+        """ Applies Q <- Q + alpha * (reward - Q) to the given cells of the flat
+            array Q as if done one after the other in the given order.
+
+            Arguments:
+            Q -- a flat array of Q values which is updated in place
+            cells -- the index into Q of each update
+            rewards -- the reward of each update
+            alpha -- the learning rate or an array with the learning rate of each
+                     update (which must be the same for updates on the same cell)
+        """
+        # position of each update within the sequence of updates on its cell
+        order = np.argsort(cells, kind='mergesort')
+        sorted_cells = cells[order]
+        starts = np.concatenate(([True], sorted_cells[1:] != sorted_cells[:-1]))
+        group_starts = np.flatnonzero(starts)
+        group_sizes = np.diff(np.append(group_starts, len(cells)))
+        ranks = np.arange(len(cells)) - np.repeat(group_starts, group_sizes)
+        remaining = np.repeat(group_sizes, group_sizes) - ranks - 1
+
+        alpha = np.asarray(alpha, dtype=np.float64)
+        if alpha.ndim > 0:
+            alpha = alpha[order]
+            group_alpha = alpha[group_starts]
+        else:
+            group_alpha = alpha
+
+        # the j-th of k updates on a cell carries weight alpha * (1 - alpha)^(k-1-j)
+        contributions = np.zeros(len(group_starts))
+        np.add.at(contributions, np.repeat(np.arange(len(group_starts)), group_sizes), \
+                  alpha * (1 - alpha) ** remaining * rewards[order])
+
+        unique_cells = sorted_cells[group_starts]
+        Q[unique_cells] = (1 - group_alpha) ** group_sizes * Q[unique_cells] + contributions
+
+    def get_q_size(self):
+        """ Returns the number of states seen so far. """
+        return int(self.__seen.sum())
+
+    def get_state(self):
+        """ Returns the learner state (Q values and visit counts of the states
+            seen, alpha and the state schema) as a dictionary of arrays, see
+            QCheckpoint.
+        """
+        seen = np.flatnonzero(self.__seen)
+        return {
+            'states': ((seen[:, np.newaxis] // self.__multipliers) % self.__bins).astype(np.int64),
+            'q': self.__Q[seen].copy(),
+            'visits': self.__visits[seen].copy(),
+            'alpha': self.__alpha,
+            'actions': list(self.__actions),
+            'state_variables': list(self.__state_variables)
+        }
+
+    def set_state(self, state):
+        """ Restores the learner state from given dictionary as returned by
+            'get_state'. Raises a ValueError if the actions or state variables differ.
+        """
+        if list(state['actions']) != list(self.__actions) \
+                or list(state['state_variables']) != list(self.__state_variables):
+            raise ValueError("Learner state for actions {} and state variables {} does not match {} and {}"\
+                             .format(list(state['actions']), list(state['state_variables']), \
+                                     self.__actions, self.__state_variables))
+
+        rows = np.asarray(state['states'], dtype=np.int64).reshape(-1, len(self.__state_variables))
+        rows = rows.dot(self.__multipliers)
+
+        self.__alpha = float(state['alpha'])
+        self.__Q[:] = 0.0
+        self.__visits[:] = 0
+        self.__seen[:] = False
+        self.__Q[rows] = state['q']
+        self.__visits[rows] = state['visits']
+        self.__seen[rows] = True
+
+    def get_q_table(self):
+        """ Returns the Q table as a data frame with states on x and actions on y. """
+        states = [self.decode_state(i) for i in range(len(self.__Q))]
+        return pd.DataFrame(self.__Q.copy(), \
+                            index=pd.Index(states, tupleize_cols=False), columns=self.__actions)
+
+    def __digits(self, state_indices):
+        return ((state_indices[:, np.newaxis] // self.__multipliers) % self.__bins).astype(np.int8)
+
+    def __record_choices(self, actionables, state_indices, action_indices, recorder):
+        best_q = self.__Q[state_indices, action_indices]
+        recorder.record('choose', actionables, states=self.__digits(state_indices), \
+                        action=[self.__actions[a] for a in action_indices], q_before=best_q, q_after=best_q)
+
+    def __log_choices(self, actionables, state_indices, action_indices, log):
+        for actionable, state_index, action_index in zip(actionables, state_indices, action_indices):
+            q_values = dict(zip(self.__actions, self.__Q[state_index]))
+            log.append("Choosing {} for {} based on best Q {} for state {} ({})"\
+                     .format(self.__actions[action_index], actionable, \
+                             self.__Q[state_index, action_index], \
+                             self.decode_state(state_index), q_values))
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from .ArrayQLearner import ArrayQLearner
+
+class BatchQLearner:
+    """ Holds the Q tables of several independent learners (e.g. one per
+        universe) in one dense (learners x states x actions) array so that
+        actions and updates for all learners are computed in one go.
+
+        States are encoded as in ArrayQLearner and each learner behaves
+        exactly like its own ArrayQLearner.
+    """
+
+    def __init__(self, learners, actions, state_variables, alpha=0.5, bins=3):
+        """
+            Arguments:
+            learners -- the number of learners
+            actions -- possible actions for all states
+            state_variables -- a list of available state varialbes
+            alpha -- the learning rate or a list with the learning rate of each learner
+            bins -- the number of discrete values each state variable can take or
+                    a list with one per state variable (see Environment.get_bins)
+        """
+        self.__actions = list(actions)
+        self.__state_variables = state_variables
+        self.__bins = np.broadcast_to(np.asarray(bins, dtype=np.int64), (len(state_variables),)).copy()
+        self.__alphas = np.broadcast_to(np.asarray(alpha, dtype=np.float64), (learners,)).copy()
+        self.__multipliers = np.append(np.cumprod(self.__bins[:0:-1])[::-1], 1).astype(np.int64)
+        self.__n_states = int(np.prod(self.__bins))
+        self.__Q = np.zeros((learners, self.__n_states, len(self.__actions)))
+        self.__seen = np.zeros((learners, self.__n_states), dtype=bool)
+        self.__visits = np.zeros(self.__Q.shape, dtype=np.int64)
+
+    def get_actions_for_states_batch(self, learners, states, recorders=None):
+        """ Gets actions to choose for given state data frames of given learners
+            and returns a dictionary from actionable to action per learner.
+
+            Arguments:
+            learners -- the indexes of the learners
+            states -- a data frame per learner with actionable (e.g. asset) on x
+                      and state variables on y
+            recorders -- a TradeRecorder to record the choices on (or None) per
+                         learner or None
+        """
+        result = []
+        for state, chosen in zip(states, self.get_action_codes_for_states_batch(learners, states, recorders)):
+            result.append(dict(zip(state.columns, [self.__actions[a] for a in chosen])))
+        return result
+
+    def get_action_codes_for_states_batch(self, learners, states, recorders=None):
+        """ Chooses as per 'get_actions_for_states_batch' but returns the
+            index of the action per column of the states per learner.
+        """
+        rows, sizes = self.__rows(learners, states)
+        action_indices = self.__choose(rows)
+
+        if recorders is not None:
+            best_q = self.__Q.reshape(-1, len(self.__actions))[rows, action_indices]
+            self.__record('choose', recorders, states, sizes, rows, action_indices, \
+                          q_before=best_q, q_after=best_q)
+
+        return np.split(action_indices.astype(np.int8), np.cumsum(sizes)[:-1])
+
+    def reward_batch(self, learners, states, rewards, logs=None, recorders=None):
+        """ Realises rewards for given states of given learners.
+
+            Arguments:
+            learners -- the indexes of the learners
+            states -- a data frame per learner with actionable (e.g. asset) on x
+                      and state variables on y
+            rewards -- a series per learner with rewards for actionables (e.g. asset)
+            logs -- a list to append log messages on (or None) per learner or None
+            recorders -- a TradeRecorder to record the choices and updates on (or
+                         None) per learner or None
+        """
+        rows, sizes = self.__rows(learners, states)
+        action_indices = self.__choose(rows)
+        reward_values = np.concatenate([np.asarray(reward.loc[state.columns], dtype=np.float64) \
+                                        for state, reward in zip(states, rewards)])
+        alphas = np.repeat(self.__alphas[list(learners)], sizes)
+
+        Q = self.__Q.reshape(-1, len(self.__actions))
+        old_q = Q[rows, action_indices]
+        cells = rows * len(self.__actions) + action_indices
+        ArrayQLearner.scatter_update(Q.reshape(-1), cells, reward_values, alphas)
+        np.add.at(self.__visits.reshape(-1), cells, 1)
+
+        if recorders is not None:
+            self.__record('choose', recorders, states, sizes, rows, action_indices, \
+                          q_before=old_q, q_after=old_q)
+            self.__record('update', recorders, states, sizes, rows, action_indices, \
+                          q_before=old_q, q_after=Q[rows, action_indices], reward=reward_values)
+
+        if logs is not None and any(log is not None for log in logs):
+            new_q = Q[rows, action_indices]
+            offset = 0
+            for state, size, log in zip(states, sizes, logs):
+                if log is not None:
+                    for i in range(offset, offset + size):
+                        log.append("Updating Q for action {} in state {} from {} to {}"\
+                                     .format(self.__actions[action_indices[i]], \
+                                             self.__decode_state(rows[i] % self.__n_states), old_q[i], new_q[i]))
+                offset += size
+
+    def learner(self, index):
+        """ Returns a learner for the Q table of given index which can be used
+            where a QLearner is expected.
+        """
+        return _BatchQLearnerView(self, index)
+
+    def get_q_size(self, index):
+        """ Returns the number of states seen so far by given learner. """
+        return int(self.__seen[index].sum())
+
+    def get_q_table(self, index):
+        """ Returns the Q table of given learner as a data frame with states on
+            x and actions on y.
+        """
+        states = [self.__decode_state(i) for i in range(self.__n_states)]
+        return pd.DataFrame(self.__Q[index].copy(), \
+                            index=pd.Index(states, tupleize_cols=False), columns=self.__actions)
+
+    def get_state(self, index):
+        """ Returns the state of given learner as a dictionary of arrays, see
+            ArrayQLearner.get_state.
+        """
+        seen = np.flatnonzero(self.__seen[index])
+        return {
+            'states': ((seen[:, np.newaxis] // self.__multipliers) % self.__bins).astype(np.int64),
+            'q': self.__Q[index, seen].copy(),
+            'visits': self.__visits[index, seen].copy(),
+            'alpha': float(self.__alphas[index]),
+            'actions': list(self.__actions),
+            'state_variables': list(self.__state_variables)
+        }
+
+    def set_state(self, index, state):
+        """ Restores the state of given learner, see ArrayQLearner.set_state. """
+        if list(state['actions']) != list(self.__actions) \
+                or list(state['state_variables']) != list(self.__state_variables):
+            raise ValueError("Learner state for actions {} and state variables {} does not match {} and {}"\
+                             .format(list(state['actions']), list(state['state_variables']), \
+                                     self.__actions, self.__state_variables))
+
+        rows = np.asarray(state['states'], dtype=np.int64).reshape(-1, len(self.__state_variables))
+        rows = rows.dot(self.__multipliers)
+
+        self.__alphas[index] = float(state['alpha'])
+        self.__Q[index] = 0.0
+        self.__visits[index] = 0
+        self.__seen[index] = False
+        self.__Q[index, rows] = state['q']
+        self.__visits[index, rows] = state['visits']
+        self.__seen[index, rows] = True
+
+    def __rows(self, learners, states):
+        sizes = [len(state.columns) for state in states]
+        rows = [index * self.__n_states + \
+                self.__multipliers.dot(np.asarray(state.loc[self.__state_variables].values, dtype=np.int64)) \
+                for index, state in zip(learners, states)]
+        return np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64), sizes
+
+    def __choose(self, rows):
+        self.__seen.reshape(-1)[rows] = True
+        return self.__Q.reshape(-1, len(self.__actions))[rows].argmax(axis=1)
+
+    def __record(self, kind, recorders, states, sizes, rows, action_indices, **values):
+        offset = 0
+        for state, size, recorder in zip(states, sizes, recorders):
+            if recorder is not None:
+                part = slice(offset, offset + size)
+                digits = ((rows[part] % self.__n_states)[:, np.newaxis] // self.__multipliers) % self.__bins
+                recorder.record(kind, state.columns, states=digits.astype(np.int8), \
+                                action=[self.__actions[a] for a in action_indices[part]], \
+                                **dict((name, value[part]) for name, value in values.items()))
+            offset += size
+
+    def __decode_state(self, state_index):
+        digits = (state_index // self.__multipliers) % self.__bins
+        return tuple(int(d) for d in digits)
+
+class _BatchQLearnerView:
+    """ The QLearner interface onto one Q table of a BatchQLearner. """
+
+    def __init__(self, batch, index):
+        self.__batch = batch
+        self.__index = index
+
+    def get_actions_for_states(self, states, log=None, recorder=None):
+        return self.__batch.get_actions_for_states_batch([self.__index], [states], recorders=[recorder])[0]
+
+    def get_action_codes_for_states(self, states, log=None, recorder=None):
+        return self.__batch.get_action_codes_for_states_batch([self.__index], [states], recorders=[recorder])[0]
+
+    def reward(self, states, rewards, log=None, recorder=None):
+        self.__batch.reward_batch([self.__index], [states], [rewards], logs=[log], recorders=[recorder])
+
+    def get_q_size(self):
+        return self.__batch.get_q_size(self.__index)
+
+    def get_q_table(self):
+        return self.__batch.get_q_table(self.__index)
+
+    def get_state(self):
+        return self.__batch.get_state(self.__index)
+
+    def set_state(self, state):
+        self.__batch.set_state(self.__index, state)
@@ -0,0 +1,54 @@
+import numpy as np
+
+class QCheckpoint:
+    """ Saves and loads learner states (see QLearner.get_state) together with
+        further named arrays as an uncompressed numpy archive, which loads in
+        milliseconds.
+
+        Q values are stored as float64, visit counts as int64, states as int8
+        and names as unicode arrays, hence no pickling is involved.
+    """
+
+    __learner_keys = ['states', 'q', 'visits', 'alpha', 'actions', 'state_variables']
+
+    @staticmethod
+    def save(path, learner_state, **extra):
+        """ Writes the learner state and given extra arrays to given path.
+
+            Arguments:
+            path -- the file to write
+            learner_state -- a dictionary as returned by a learner's 'get_state'
+            extra -- further arrays to store (e.g. the progress of an agent)
+        """
+        arrays = {
+            'states': np.asarray(learner_state['states'], dtype=np.int8),
+            'q': np.asarray(learner_state['q'], dtype=np.float64),
+            'visits': np.asarray(learner_state['visits'], dtype=np.int64),
+            'alpha': np.float64(learner_state['alpha']),
+            'actions': np.array([str(action) for action in learner_state['actions']], dtype=np.str_),
+            'state_variables': np.array([str(variable) for variable in learner_state['state_variables']], \
+                                        dtype=np.str_)
+        }
+
+        for key, value in extra.items():
+            if key in arrays:
+                raise ValueError("Extra array {} clashes with the learner state".format(key))
+            arrays[key] = np.asarray(value)
+
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @staticmethod
+    def load(path):
+        """ Reads a checkpoint and returns a tuple of the learner state and a
+            dictionary of the extra arrays.
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            arrays = dict((key, archive[key]) for key in archive.files)
+
+        learner_state = dict((key, arrays.pop(key)) for key in QCheckpoint.__learner_keys)
+        learner_state['alpha'] = float(learner_state['alpha'])
+        learner_state['actions'] = [str(action) for action in learner_state['actions']]
+        learner_state['state_variables'] = [str(variable) for variable in learner_state['state_variables']]
+
+        return learner_state, arrays
@@ -1,3 +1,6 @@
+import numpy as np
+import pandas as pd
+
 class QLearner:
 
     def __init__(self, environment, actions, state_variables, alpha=0.5):
@@ -11,9 +14,10 @@ class QLearner:
         self.__actions = actions
         self.__state_variables = state_variables
         self.__Q = dict()
+        self.__visits = dict()
         self.__alpha= alpha
 
-    def reward(self, states, rewards, log=None):
+    def reward(self, states, rewards, log=None, recorder=None):
         """ Realises rewards for given states.
 
             Arguments:
@@ -21,9 +25,13 @@ class QLearner:
                       and state variables on y
             rewards -- series with rewards for actionables (e.g. asset)
             log -- list to append log messages on or None if not needed
+            recorder -- TradeRecorder to record the choices and updates on or None
         """
 
-        actions = self.get_actions_for_states(states, log)
+        actions = self.get_actions_for_states(states, log, recorder=recorder)
+        built_states = []
+        old_qs = []
+        new_qs = []
 
         for actionable in actions.keys():
             state = self.__build_state(states[actionable])
@@ -35,25 +43,36 @@ class QLearner:
             new_q = old_q + self.__alpha * (reward - old_q)
 
             self.__Q[state][action] = new_q
+            self.__visits[state][action] += 1
+            built_states.append(state)
+            old_qs.append(old_q)
+            new_qs.append(new_q)
 
-            if log:
+            if log is not None:
                 log.append("Updating Q for action {} in state {} from {} to {}"\
                              .format(action, state, old_q, new_q))
 
-    def get_actions(self, log=None):
+        if recorder is not None:
+            tickers = list(actions.keys())
+            recorder.record('update', tickers, states=np.array(built_states, dtype=np.int8), \
+                            action=[actions[ticker] for ticker in tickers], q_before=old_qs, q_after=new_qs, \
+                            reward=[rewards[ticker] for ticker in tickers])
+
+    def get_actions(self, log=None, recorder=None):
         """ Senses the environment and determines the best actions for each
             of the possible actionable.
 
             Arguments:
             log -- list of log should be appended or None if not needed
+            recorder -- TradeRecorder to record the choices on or None
         """
 
         states = self.__environment.sense()
-        actions = self.get_actions_for_states(states, log=log)
+        actions = self.get_actions_for_states(states, log=log, recorder=recorder)
 
         return actions
 
-    def get_actions_for_states(self, states, log=None):
+    def get_actions_for_states(self, states, log=None, recorder=None):
         """
             Gets actions to choose for given state data frame.
 
@@ -61,9 +80,12 @@ class QLearner:
             states -- data frame with actionable (e.g. asset) on x
                       and state variables on y
             log -- list to append log messages on or None if not needed
+            recorder -- TradeRecorder to record the choices on or None
 
         """
         result = {}
+        built_states = []
+        best_qs = []
 
         for actionable in states.columns:
             state = self.__build_state(states[actionable])
@@ -77,13 +99,72 @@ class QLearner:
                 if best_Q == None or best_Q[0] < q_value:
                     best_Q = (q_value, action)
 
-            if log:
+            if log is not None:
                 log.append("Choosing {} for {} based on best Q {} for state {} ({})"\
                          .format(best_Q[1], actionable, best_Q[0], state, self.__Q[state]))
             result[actionable] = best_Q[1]
+            built_states.append(state)
+            best_qs.append(best_Q[0])
+
+        if recorder is not None:
+            tickers = list(states.columns)
+            recorder.record('choose', tickers, states=np.array(built_states, dtype=np.int8), \
+                            action=[result[ticker] for ticker in tickers], q_before=best_qs, q_after=best_qs)
 
         return result
 
+    def get_action_codes_for_states(self, states, log=None, recorder=None):
+        """ Chooses as per 'get_actions_for_states' but returns the index of
+            the action per column of the states.
+        """
+        actions = self.get_actions_for_states(states, log=log, recorder=recorder)
+        codes = dict((action, i) for i, action in enumerate(self.__actions))
+        return np.array([codes[actions[actionable]] for actionable in states.columns], dtype=np.int8)
+
+    def get_q_size(self):
+        """ Returns the number of states in the Q table. """
+        return len(self.__Q)
+
+    def get_state(self):
+        """ Returns the learner state (Q values and visit counts of all states,
+            alpha and the state schema) as a dictionary of arrays, see QCheckpoint.
+        """
+        states = sorted(self.__Q.keys())
+        return {
+            'states': np.array(states, dtype=np.int64).reshape(len(states), len(self.__state_variables)),
+            'q': np.array([[self.__Q[state][action] for action in self.__actions] for state in states], \
+                          dtype=np.float64).reshape(len(states), len(self.__actions)),
+            'visits': np.array([[self.__visits[state][action] for action in self.__actions] for state in states], \
+                               dtype=np.int64).reshape(len(states), len(self.__actions)),
+            'alpha': self.__alpha,
+            'actions': list(self.__actions),
+            'state_variables': list(self.__state_variables)
+        }
+
+    def set_state(self, state):
+        """ Restores the learner state from given dictionary as returned by
+            'get_state'. Raises a ValueError if the actions or state variables differ.
+        """
+        if list(state['actions']) != list(self.__actions) \
+                or list(state['state_variables']) != list(self.__state_variables):
+            raise ValueError("Learner state for actions {} and state variables {} does not match {} and {}"\
+                             .format(list(state['actions']), list(state['state_variables']), \
+                                     self.__actions, self.__state_variables))
+
+        self.__alpha = float(state['alpha'])
+        self.__Q = dict()
+        self.__visits = dict()
+        for raw_state, q_values, visits in zip(state['states'], state['q'], state['visits']):
+            key = tuple(int(value) for value in raw_state)
+            self.__Q[key] = dict(zip(self.__actions, [float(q) for q in q_values]))
+            self.__visits[key] = dict(zip(self.__actions, [int(v) for v in visits]))
+
+    def get_q_table(self):
+        """ Returns the Q table as a data frame with states on x and actions on y. """
+        states = sorted(self.__Q.keys())
+        return pd.DataFrame([self.__Q[state] for state in states], \
+                            index=pd.Index(states, tupleize_cols=False), columns=self.__actions)
+
     def __build_state(self, raw_state):
         state = []
         for state_variable in self.__state_variables:
@@ -95,5 +176,7 @@ class QLearner:
         # add state to Q table
         if state not in self.__Q:
             self.__Q[state] = {}
+            self.__visits[state] = {}
             for action in self.__actions:
                 self.__Q[state][action] = 0.0
+                self.__visits[state][action] = 0
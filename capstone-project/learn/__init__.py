@@ -1 +1,4 @@
-from QLearner import QLearner
+from .QLearner import QLearner
+from .ArrayQLearner import ArrayQLearner
+from .BatchQLearner import BatchQLearner
+from .QCheckpoint import QCheckpoint
@@ -0,0 +1,13 @@
+from abc import ABCMeta, abstractmethod
+
+# the abstract base of Python 2 and 3
+class Calendar(ABCMeta('ABC', (object,), {})):
+    """ Base class of the calendars which select the dates to act on (e.g. to
+        rebalance) from the trading dates.
+    """
+
+    @abstractmethod
+    def dates(self, trading_dates):
+        """ Returns the scheduled dates as a subset of given (sorted) trading
+            dates.
+        """
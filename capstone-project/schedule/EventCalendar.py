@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from .Calendar import Calendar
+
+class EventCalendar(Calendar):
+    """ Schedules the first trading date on or after each event date (e.g.
+        the release dates of fundamentals, see AsOfPanel.get_dates), delayed
+        by a number of trading dates.
+    """
+
+    def __init__(self, event_dates, lag=0):
+        """
+        Arguments:
+        event_dates -- the dates of the events
+        lag -- the number of trading dates to act after the event
+        """
+        self.__event_dates = pd.DatetimeIndex(event_dates).sort_values()
+        self.__lag = lag
+
+    def dates(self, trading_dates):
+        positions = np.unique(trading_dates.searchsorted(self.__event_dates, side='left') + self.__lag)
+        return trading_dates[positions[positions < len(trading_dates)]]
@@ -0,0 +1,16 @@
+from .Calendar import Calendar
+
+class EveryNDaysCalendar(Calendar):
+    """ Schedules every n-th trading date. """
+
+    def __init__(self, n, offset=0):
+        """
+        Arguments:
+        n -- the number of trading dates between scheduled dates
+        offset -- the position of the first scheduled date
+        """
+        self.__n = n
+        self.__offset = offset
+
+    def dates(self, trading_dates):
+        return trading_dates[self.__offset::self.__n]
@@ -0,0 +1,18 @@
+import numpy as np
+from .Calendar import Calendar
+
+class PeriodEndCalendar(Calendar):
+    """ Schedules the last trading date of each period (e.g. month end). """
+
+    def __init__(self, freq='M'):
+        """
+        Arguments:
+        freq -- the pandas period frequency, e.g. 'W' for weeks, 'M' for months
+                or 'Q' for quarters
+        """
+        self.__freq = freq
+
+    def dates(self, trading_dates):
+        periods = np.asarray(trading_dates.to_period(self.__freq).asi8)
+        last = np.append(periods[1:] != periods[:-1], len(periods) > 0)
+        return trading_dates[last]
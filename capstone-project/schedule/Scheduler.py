@@ -0,0 +1,84 @@
+import heapq
+import numpy as np
+
+class Scheduler:
+    """ Drives a trading agent through the dates of a calendar rather than
+        through every trading date.
+
+        On each scheduled date the agent senses, chooses (and when trading
+        rebalances) and the reward of these actions is queued for its due
+        date, either a fixed number of trading dates later or the next
+        scheduled date. The agent is only ever stepped to scheduled and due
+        dates, which are processed in date order (acting before rewarding on
+        the same date).
+
+        The queue of due rewards is kept between calls, hence rewards for
+        actions taken while learning are realised once due while trading.
+    """
+
+    def __init__(self, agent, calendar, horizon=None):
+        """
+        Arguments:
+        agent -- the TradingAgent to drive
+        calendar -- a Calendar or the scheduled dates
+        horizon -- the number of trading dates after which the reward of the
+                   actions on a scheduled date is due or None for the next
+                   scheduled date
+        """
+        self.__agent = agent
+        self.__horizon = horizon
+
+        dates = agent.get_environment().get_date_index()
+        scheduled = calendar.dates(dates.dates) if hasattr(calendar, 'dates') else calendar
+        self.__dates = dates
+        self.__positions = np.array([dates.position(date) for date in scheduled], dtype=np.int64)
+        self.__next = 0
+        self.__queue = []
+
+    def get_dates(self):
+        """ Returns the scheduled dates. """
+        return self.__dates.dates[self.__positions]
+
+    def learn(self, end=None, log=None):
+        """ Learns on the scheduled and due dates up to and including given
+            date (or all), see TradingAgent.learn.
+        """
+        self.__agent.learn_events(self.events(end), log=log)
+
+    def trade(self, end=None, log=None):
+        """ Trades on the scheduled and due dates up to and including given
+            date (or all), see TradingAgent.trade.
+        """
+        self.__agent.trade_events(self.events(end), log=log)
+
+    def events(self, end=None):
+        """ Yields the events up to and including given date (or all) which
+            were not yielded yet, i.e. ('act', date) for scheduled dates and
+            ('reward', date, act_date) for rewards due at date.
+        """
+        last = len(self.__dates) - 1 if end is None else self.__dates.position(end)
+
+        while True:
+            act = self.__positions[self.__next] if self.__next < len(self.__positions) else None
+            due = self.__queue[0][0] if self.__queue else None
+
+            if act is not None and act <= last and (due is None or act <= due):
+                self.__next += 1
+                self.__enqueue(act)
+                yield ('act', self.__dates.date(act))
+            elif due is not None and due <= last:
+                due, acted = heapq.heappop(self.__queue)
+                yield ('reward', self.__dates.date(due), self.__dates.date(acted))
+            else:
+                return
+
+    def __enqueue(self, position):
+        if self.__horizon is not None:
+            due = position + self.__horizon
+        elif self.__next < len(self.__positions):
+            due = self.__positions[self.__next]
+        else:
+            return
+
+        if due < len(self.__dates):
+            heapq.heappush(self.__queue, (int(due), int(position)))
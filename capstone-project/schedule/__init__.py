@@ -0,0 +1,5 @@
+from .Calendar import Calendar
+from .EveryNDaysCalendar import EveryNDaysCalendar
+from .PeriodEndCalendar import PeriodEndCalendar
+from .EventCalendar import EventCalendar
+from .Scheduler import Scheduler
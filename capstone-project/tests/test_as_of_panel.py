@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+from data import AsOfPanel
+from data import DataPanel
+
+
+class AsOfPanelTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        days = pd.bdate_range('2016-01-01', '2016-12-30')
+        quarters = pd.DatetimeIndex(['2016-02-15', '2016-05-13', '2016-08-15', '2016-11-14'])
+
+        price = pd.DataFrame(100 + rng.normal(0, 1, (len(days), 3)).cumsum(axis=0), \
+                             index=days, columns=['AAPL', 'IBM', 'MSFT'])
+        price.iloc[:20, 1] = np.nan
+        # released at other dates and for other tickers, one value missing
+        ebt = pd.DataFrame(rng.normal(0, 1, (len(quarters), 3)), index=quarters, columns=['AAPL', 'MSFT', 'XOM'])
+        ebt.iloc[2, 0] = np.nan
+        self.frames = {'PRICE': price, 'EBT': ebt.iloc[::-1]}
+        self.panel = AsOfPanel.from_frames(self.frames)
+
+    def assert_panel_equal(self, panel, expected):
+        self.assertEqual(panel.items, expected.items)
+        self.assertEqual(list(panel.dates), list(expected.dates))
+        self.assertEqual(list(panel.tickers), list(expected.tickers))
+        self.assertTrue(np.array_equal(panel.values, expected.values, equal_nan=True))
+
+    def test_matches_filled_panel(self):
+        # the values as of the union of all dates are those of the aligned
+        # panel filled forward
+        expected = DataPanel.from_frames(self.frames).ffill()
+        self.assert_panel_equal(self.panel.to_panel(), expected)
+
+    def test_as_of_calendar(self):
+        calendar = pd.DatetimeIndex(['2015-12-31', '2016-02-15', '2016-03-31', '2016-06-30', '2016-09-30', \
+                                     '2016-12-31'])
+        panel = self.panel.to_panel(calendar)
+
+        filled = DataPanel.from_frames(self.frames).ffill()
+        for item in self.frames:
+            expected = filled.get(item).reindex(filled.dates.union(calendar)).ffill().loc[calendar]
+            self.assertTrue(np.array_equal(panel.get(item).values, expected.values, equal_nan=True))
+        # nothing before the first date of an item
+        self.assertTrue(np.isnan(panel.get('EBT').iloc[0]).all())
+
+    def test_native_dates(self):
+        ebt = self.panel.get('EBT')
+        self.assertEqual(list(ebt.index), sorted(self.frames['EBT'].index))
+        self.assertEqual(list(ebt.columns), ['AAPL', 'IBM', 'MSFT', 'XOM'])
+        self.assertEqual(ebt.loc['2016-08-15', 'AAPL'], self.frames['EBT'].loc['2016-05-13', 'AAPL'])
+
+        self.assertEqual(list(self.panel.union_dates()), list(self.frames['PRICE'].index.union(ebt.index)))
+        self.assertLess(self.panel.nbytes, DataPanel.from_frames(self.frames).values.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from data import ColumnarFile
+from data import FlatFileDataService
+
+
+class ColumnarFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.frame = pd.DataFrame(rng.normal(0, 1, (40, 4)), \
+                                  index=pd.bdate_range('2016-01-04', periods=40, name='Date'), \
+                                  columns=['AAPL', 'MSFT', 'IBM', 'XOM'])
+        self.frame.iloc[:10, 2] = np.nan
+        self.path = os.path.join(self.directory, "PRICE.{}".format(ColumnarFile.extension))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_frame_equal(self, frame, expected):
+        self.assertEqual(list(frame.columns), list(expected.columns))
+        self.assertEqual(list(frame.index), list(expected.index))
+        self.assertTrue(np.array_equal(frame.values, expected.values, equal_nan=True))
+
+    def test_round_trip(self):
+        ColumnarFile.write(self.path, self.frame)
+        frame = ColumnarFile.read(self.path)
+        self.assert_frame_equal(frame, self.frame)
+        self.assertEqual(frame.index.name, 'Date')
+        self.assertEqual(list(ColumnarFile.read_dates(self.path)), list(self.frame.index))
+
+    def test_read_selection(self):
+        ColumnarFile.write(self.path, self.frame)
+        frame = ColumnarFile.read(self.path, ['XOM', 'IBM'], start='2016-01-10', end='2016-02-05')
+        self.assert_frame_equal(frame, self.frame.loc['2016-01-10':'2016-02-05', ['XOM', 'IBM']])
+
+        self.assertEqual(len(ColumnarFile.read(self.path, start='2017-01-01')), 0)
+        self.assertRaises(Exception, ColumnarFile.read, self.path, ['AAPL', 'GOOG'])
+
+    def test_converted_files_match_csv(self):
+        self.frame.to_csv(os.path.join(self.directory, "PRICE.csv"))
+        binary_directory = os.path.join(self.directory, 'binary')
+        os.mkdir(binary_directory)
+        FlatFileDataService.convert(self.directory, binary_directory)
+
+        csv = FlatFileDataService(self.directory)
+        binary = FlatFileDataService(binary_directory, binary=True)
+
+        expected = csv.get_data(['PRICE'], ['IBM', 'AAPL'], start='2016-01-08')
+        data = binary.get_data(['PRICE'], ['IBM', 'AAPL'], start='2016-01-08')
+        self.assert_frame_equal(data.get('PRICE'), expected.get('PRICE'))
+
+        chunks = list(binary.iter_data(['PRICE'], ['IBM', 'AAPL'], chunk_size=7))
+        expected = list(csv.iter_data(['PRICE'], ['IBM', 'AAPL'], chunk_size=7))
+        self.assertEqual(len(chunks), len(expected))
+        for chunk, expected_chunk in zip(chunks, expected):
+            self.assert_frame_equal(chunk.get('PRICE'), expected_chunk.get('PRICE'))
+
+
+if __name__ == '__main__':
+    unittest.main()
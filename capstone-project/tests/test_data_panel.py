@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import pandas as pd
+from data import DataPanel
+
+
+class DataPanelTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        dates = pd.bdate_range('2016-01-04', periods=30)
+
+        price = pd.DataFrame(rng.normal(100, 1, (30, 3)), index=dates, columns=['AAPL', 'IBM', 'MSFT'])
+        price.iloc[[0, 1, 7], 1] = np.nan
+        # quarterly like item on other dates and tickers
+        ebt = pd.DataFrame(rng.normal(0, 1, (5, 3)), index=dates[::6] + pd.Timedelta(days=1), \
+                           columns=['AAPL', 'MSFT', 'XOM'])
+        self.frames = {'PRICE': price, 'EBT': ebt}
+        self.panel = DataPanel.from_frames(self.frames)
+
+    def expected(self, item):
+        """ The item as aligned on the union of all dates and tickers. """
+        dates = self.frames['PRICE'].index.union(self.frames['EBT'].index)
+        tickers = self.frames['PRICE'].columns.union(self.frames['EBT'].columns)
+        return self.frames[item].reindex(index=dates, columns=tickers)
+
+    def assert_frame_equal(self, frame, expected):
+        self.assertEqual(list(frame.index), list(expected.index))
+        self.assertEqual(list(frame.columns), list(expected.columns))
+        self.assertTrue(np.array_equal(frame.values, expected.values, equal_nan=True))
+
+    def test_from_frames(self):
+        self.assertEqual(self.panel.items, ['EBT', 'PRICE'])
+        for item in self.frames:
+            self.assert_frame_equal(self.panel.get(item), self.expected(item))
+            self.assert_frame_equal(self.panel[item], self.expected(item))
+
+    def test_set_item(self):
+        price = self.panel.get('PRICE') * 2
+        self.panel['PRICE'] = price
+        self.assert_frame_equal(self.panel.get('PRICE'), price)
+
+        self.panel['RETURN'] = self.frames['PRICE'].pct_change(fill_method=None)
+        self.assertEqual(self.panel.items, ['EBT', 'PRICE', 'RETURN'])
+        self.assert_frame_equal(self.panel.get('RETURN'), \
+                                self.frames['PRICE'].pct_change(fill_method=None).reindex_like(price))
+
+    def test_select_and_slice(self):
+        selected = self.panel.select(['PRICE', 'EBT'])
+        self.assertEqual(selected.items, ['PRICE', 'EBT'])
+        self.assert_frame_equal(selected.get('EBT'), self.expected('EBT'))
+
+        sliced = self.panel.slice_dates('2016-01-10', '2016-01-31')
+        self.assert_frame_equal(sliced.get('PRICE'), self.expected('PRICE').loc['2016-01-10':'2016-01-31'])
+        self.assertTrue(np.shares_memory(sliced.values, self.panel.values))
+
+        chunks = [chunk.get('EBT') for chunk in self.panel.iter_chunks(7)]
+        self.assertTrue(all(len(chunk) <= 7 for chunk in chunks))
+        self.assert_frame_equal(pd.concat(chunks), self.expected('EBT'))
+
+    def test_missing_values(self):
+        filled = self.panel.ffill()
+        for item in self.frames:
+            self.assert_frame_equal(filled.get(item), self.expected(item).ffill())
+
+        # dates and tickers where any item has a missing value are dropped
+        price = self.frames['PRICE']
+        volume = price * 0 + 1000
+        volume.iloc[3, 0] = np.nan
+        panel = DataPanel.from_frames({'PRICE': price, 'VOLUME': volume})
+
+        dates = panel.dropna_dates()
+        self.assertEqual(len(dates.dates), len(price) - 4)
+        valid = price.notnull().all(axis=1) & volume.notnull().all(axis=1)
+        self.assert_frame_equal(dates.get('PRICE'), price.loc[valid])
+        tickers = panel.dropna_tickers()
+        self.assert_frame_equal(tickers.get('VOLUME'), volume.loc[:, ['MSFT']])
+
+    def test_astype(self):
+        panel = self.panel.astype(np.float32)
+        self.assertEqual(panel.values.dtype, np.float32)
+        self.assert_frame_equal(panel.get('PRICE'), self.expected('PRICE').astype(np.float32))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+import pandas as pd
+from data import DateIndex
+
+
+class DateIndexTest(unittest.TestCase):
+
+    def test_positions(self):
+        dates = pd.bdate_range('2016-01-04', periods=10)
+        index = DateIndex(dates)
+
+        self.assertEqual(len(index), 10)
+        for position, date in enumerate(dates):
+            self.assertEqual(index.position(date), position)
+            self.assertEqual(index.date(position), date)
+            self.assertTrue(date in index)
+
+        self.assertFalse(pd.Timestamp('2016-01-09') in index)
+        self.assertRaises(KeyError, index.position, pd.Timestamp('2016-01-09'))
+        self.assertEqual(index.date(-1), dates[-1])
+
+    def test_unique_dates(self):
+        dates = pd.DatetimeIndex(['2016-01-04', '2016-01-05', '2016-01-05'])
+        self.assertRaises(ValueError, DateIndex, dates)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import pandas as pd
+from discretise import Discretiser
+from discretise import ZScoreDiscretiser
+from discretise import QuantileDiscretiser
+from discretise import FixedEdgeDiscretiser
+
+
+class DiscretiserTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.dates = pd.bdate_range('2016-01-04', periods=50)
+        self.values = rng.normal(0, 1, (50, 9))
+        self.values[3, 2] = np.nan
+
+    def test_incomplete_subclass(self):
+        class Incomplete(Discretiser):
+            pass
+
+        self.assertRaises(TypeError, Incomplete)
+
+    def test_nan_bin(self):
+        for discretiser in [ZScoreDiscretiser(3), QuantileDiscretiser(3), \
+                            FixedEdgeDiscretiser(3, edges=[-0.5, 0.5])]:
+            states = discretiser.discretise('ITEM', self.values, self.dates)
+            self.assertEqual(states.dtype, np.int8)
+            self.assertEqual(states[3, 2], 3)
+            self.assertTrue(((states >= 0) & (states < discretiser.get_bins())).all())
+
+        # values on an edge belong to the lower bin
+        values = self.values[np.isfinite(self.values)]
+        expected = [(values <= -0.5).sum(), ((values > -0.5) & (values <= 0.5)).sum(), (values > 0.5).sum(), 1]
+        self.assertTrue(min(expected[:3]) > 0)
+        self.assertEqual(list(np.bincount(states.ravel(), minlength=4)), expected)
+
+    def test_invalid_cross_sections(self):
+        states = ZScoreDiscretiser(3, nan_bin=False).discretise('ITEM', self.values, self.dates)
+        self.assertTrue((states[3] == -1).all())
+        self.assertTrue((np.delete(states, 3, axis=0) >= 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from Benchmark import Benchmark
+from Environment import Environment
+
+ITEMS = [Benchmark.state_item(0), Benchmark.state_item(1)]
+
+
+class EnvironmentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Benchmark(seed=4).synthetic_panel(60, 12, len(ITEMS))
+
+    def test_precomputed_states_match_sensing(self):
+        sensed = Environment(self.data, ITEMS)
+        precomputed = Environment(self.data, ITEMS, precompute=True)
+
+        for date in self.data.dates:
+            expected = sensed.sense_date(date)
+            states = precomputed.sense_date(date)
+
+            self.assertEqual(list(states.index), list(expected.index))
+            self.assertEqual(list(states.columns), list(expected.columns))
+            self.assertTrue((states.values == expected.values.astype(np.int64)).all())
+            self.assertTrue((precomputed.get_state_ids(date) == sensed.get_state_ids(date)).all())
+
+    def test_sense_follows_advance(self):
+        precomputed = Environment(self.data, ITEMS, precompute=True)
+        for date in self.data.dates[:5]:
+            self.assertEqual(precomputed.advance(), date)
+            self.assertTrue((precomputed.sense().values == precomputed.sense_date(date).values).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from data import FinancialDataService
+from data import FlatFileDataService
+from data import SnapshotCache
+
+
+class FinancialDataServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        dates = pd.bdate_range('2009-12-01', '2011-01-31')
+        tickers = ['AAPL', 'MSFT']
+        rng = np.random.RandomState(0)
+
+        prices = pd.DataFrame(100 + rng.randn(len(dates), 2).cumsum(axis=0), index=dates, columns=tickers)
+        quarterly = dates[dates.is_quarter_end | (dates == dates[0])]
+        ebt = pd.DataFrame(rng.rand(len(quarterly), 2), index=quarterly, columns=tickers)
+        ebit = ebt * 2
+
+        for item, frame in [('PRICE', prices), ('EBT', ebt), ('EBIT', ebit)]:
+            frame.rename_axis('Date').to_csv(os.path.join(self.directory, "{}.csv".format(item)))
+        self.prices = prices
+        self.ebt = ebt
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_date_range(self):
+        for binary in [False, True]:
+            directory = self.directory
+            if binary:
+                directory = os.path.join(self.directory, 'binary')
+                os.mkdir(directory)
+                FlatFileDataService.convert(self.directory, directory)
+
+            service = FinancialDataService(FlatFileDataService(directory, binary=binary).get_data)
+            data = service.get_data(tickers=['AAPL'], items=['PRICE', 'INTEREST_BURDEN'], \
+                                    start='2010-01-01', end='2010-12-31', trim=False)
+
+            self.assertEqual(data.dates[0], pd.Timestamp('2010-01-01'))
+            self.assertEqual(data.dates[-1], pd.Timestamp('2010-12-31'))
+            self.assertTrue(np.allclose(data.get('PRICE')['AAPL'].values, \
+                                        self.prices.loc['2010-01-01':'2010-12-31', 'AAPL'].values))
+            self.assertTrue(np.allclose(data.get('INTEREST_BURDEN')['AAPL'].values, 0.5))
+
+            # fundamentals released before the range are carried into it
+            data = service.get_data(tickers=['AAPL'], items=['PRICE', 'EBT'], \
+                                    start='2010-01-01', end='2010-12-31')
+            self.assertEqual(data.dates[0], pd.Timestamp('2010-01-01'))
+            self.assertEqual(data.dates[-1], pd.Timestamp('2010-12-31'))
+            ebt = data.get('EBT')['AAPL']
+            self.assertTrue((ebt.loc[:'2010-03-30'] == self.ebt.loc['2009-12-31', 'AAPL']).all())
+            self.assertEqual(ebt.loc['2010-03-31'], self.ebt.loc['2010-03-31', 'AAPL'])
+
+    def test_dates_without_values(self):
+        # e.g. a holiday on which no price is quoted
+        directory = os.path.join(self.directory, 'holiday')
+        os.mkdir(directory)
+        prices = self.prices.copy()
+        prices.loc['2010-04-02'] = np.nan
+        prices.rename_axis('Date').to_csv(os.path.join(directory, 'PRICE.csv'))
+        shutil.copy(os.path.join(self.directory, 'EBT.csv'), directory)
+
+        data = FinancialDataService(FlatFileDataService(directory).get_data)\
+            .get_data(tickers=['AAPL', 'MSFT'], items=['PRICE', 'EBT'])
+
+        self.assertIn(pd.Timestamp('2010-04-02'), data.dates)
+        self.assertTrue(data.dates.equals(prices.index))
+        self.assertTrue(np.allclose(data.get('PRICE').loc['2010-04-02'].values, prices.loc['2010-04-01'].values))
+
+    def test_archive(self):
+        archive = os.path.join(self.directory, 'data.tar.gz')
+        with tarfile.open(archive, 'w:gz') as f:
+            for item in ['PRICE', 'EBT', 'EBIT']:
+                f.add(os.path.join(self.directory, "{}.csv".format(item)), arcname="data/{}.csv".format(item))
+
+        expected = FinancialDataService(FlatFileDataService(self.directory).get_data)\
+            .get_data(tickers=['AAPL', 'MSFT'], items=['PRICE', 'INTEREST_BURDEN'])
+        data = FinancialDataService(FlatFileDataService('data', archive=archive).get_data)\
+            .get_data(tickers=['AAPL', 'MSFT'], items=['PRICE', 'INTEREST_BURDEN'])
+
+        self.assertTrue(data.dates.equals(expected.dates))
+        self.assertTrue(np.allclose(data.values, expected.values, equal_nan=True))
+
+    def test_snapshots(self):
+        snapshots = SnapshotCache(os.path.join(self.directory, 'snapshots'))
+        source = FlatFileDataService(self.directory)
+        request = dict(tickers=['AAPL', 'MSFT'], items=['PRICE', 'INTEREST_BURDEN'])
+
+        loads = []
+        def data_func(items, tickers):
+            loads.append(items)
+            return source.get_data(items, tickers)
+
+        service = FinancialDataService(data_func, snapshots=snapshots, fingerprint=source.get_fingerprint)
+        expected = service.get_data(**request)
+        self.assertEqual(len(loads), 1)
+
+        service = FinancialDataService(data_func, snapshots=snapshots, fingerprint=source.get_fingerprint)
+        data = service.get_data(**request)
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(data.items, expected.items)
+        self.assertTrue(data.dates.equals(expected.dates))
+        self.assertEqual(data.dates.dtype, expected.dates.dtype)
+        self.assertEqual(list(data.tickers), list(expected.tickers))
+        self.assertTrue(np.allclose(data.values, expected.values, equal_nan=True))
+
+        # a different request is not served from the snapshot
+        service.get_data(trim=False, **request)
+        self.assertEqual(len(loads), 2)
+
+        # changed source data invalidates the snapshot
+        prices = self.prices * 2
+        path = os.path.join(self.directory, 'PRICE.csv')
+        prices.rename_axis('Date').to_csv(path)
+        os.utime(path, (0, 1))
+
+        data = FinancialDataService(source.get_data, snapshots=snapshots).get_data(**request)
+        self.assertTrue(np.allclose(data.get('PRICE').values, prices.loc[data.dates].values))
+
+    def test_expanded_tickers_are_sorted(self):
+        requested = []
+        def data_func(items, tickers):
+            requested.append(list(tickers))
+            return FlatFileDataService(self.directory).get_data(items, ['AAPL', 'MSFT'])
+
+        FinancialDataService.indices['TEST'] = ['MSFT', 'AAPL']
+        try:
+            FinancialDataService(data_func).get_data(tickers=['TEST'], items=['PRICE'], expand_composites=True)
+        finally:
+            del FinancialDataService.indices['TEST']
+        self.assertEqual(requested, [['AAPL', 'MSFT']])
+
+    def test_snapshots_need_fingerprint(self):
+        snapshots = SnapshotCache(os.path.join(self.directory, 'snapshots'))
+        source = FlatFileDataService(self.directory)
+        self.assertRaises(ValueError, FinancialDataService, \
+                          lambda items, tickers: source.get_data(items, tickers), snapshots=snapshots)
+
+
+if __name__ == '__main__':
+    unittest.main()
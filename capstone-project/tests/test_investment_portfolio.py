@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import pandas as pd
+from data import DateIndex
+from finance import InvestmentPortfolio
+
+
+def frame_portfolio(rebalances):
+    """ The portfolio weights as the data frame InvestmentPortfolio kept,
+        tickers in order of appearance and missing weights as zero.
+    """
+    portfolio = pd.DataFrame()
+    for date, weights in rebalances:
+        for ticker in weights.index:
+            if ticker not in portfolio.columns:
+                portfolio[ticker] = .0
+        portfolio.loc[date] = weights.reindex(portfolio.columns)
+        portfolio = portfolio.fillna(0)
+    return portfolio
+
+
+def frame_returns(portfolio, prices):
+    """ The portfolio returns as InvestmentPortfolio calculated them from
+        forward filled normalised weights.
+    """
+    prices = prices.loc[:, portfolio.columns]
+    norm_weights = portfolio.div(portfolio.sum(axis=1), axis=0)
+    weights_aligned = norm_weights.reindex(prices.index).ffill().fillna(0).shift(1)[1:]
+    asset_returns = (prices / prices.shift(1) - 1)[1:]
+    return (asset_returns * weights_aligned).sum(axis=1)
+
+
+class InvestmentPortfolioTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.dates = pd.bdate_range('2016-01-04', periods=60)
+        tickers = ["T{}".format(i) for i in range(25)]
+        self.prices = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (60, 25)), axis=0), \
+                                   index=self.dates, columns=tickers).assign(CASH=1.0)
+
+        # more dates and tickers than initially allocated, tickers appear over
+        # time and one date is rebalanced twice
+        self.rebalances = []
+        for i, position in enumerate(list(range(1, 60, 2)) + [31]):
+            held = rng.choice(tickers[:5 + (i * 20) // 30], size=4, replace=False)
+            self.rebalances.append((self.dates[position], pd.Series(rng.rand(4), index=held)))
+        self.rebalances.append((self.dates[59], pd.Series({'CASH': 1.0})))
+
+    def test_matches_frame(self):
+        expected = frame_portfolio(self.rebalances)
+        for date_index in [None, DateIndex(self.dates)]:
+            portfolio = InvestmentPortfolio(date_index=date_index)
+            for date, weights in self.rebalances:
+                portfolio.rebalance(date, weights)
+
+            weights = portfolio.get_portfolio_weights()
+            self.assertEqual(list(weights.index), list(expected.index))
+            self.assertEqual(list(weights.columns), list(expected.columns))
+            self.assertTrue(np.allclose(weights.values, expected.values))
+
+            returns = portfolio.calculate_portfolio_returns(self.prices)
+            self.assertTrue(returns.index.equals(self.dates[1:]))
+            self.assertTrue(np.allclose(returns.values, frame_returns(expected, self.prices).values))
+
+    def test_state(self):
+        portfolio = InvestmentPortfolio()
+        for date, weights in self.rebalances:
+            portfolio.rebalance(date, weights)
+
+        restored = InvestmentPortfolio(date_index=DateIndex(self.dates))
+        restored.set_state(portfolio.get_state())
+
+        expected = portfolio.get_portfolio_weights()
+        weights = restored.get_portfolio_weights()
+        self.assertEqual(list(weights.index), list(expected.index))
+        self.assertEqual(list(weights.columns), list(expected.columns))
+        self.assertTrue(np.array_equal(weights.values, expected.values))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+from finance import MinVarianceSolver
+
+try:
+    import cvxopt
+    from cvxopt import solvers
+except ImportError:
+    cvxopt = None
+
+
+def qp_min_variance(cov):
+    """ The long-only minimum variance portfolio as solved by the cvxopt QP
+        solver (as portfolioopt.min_var_portfolio did).
+    """
+    n = len(cov)
+    solvers.options['show_progress'] = False
+    # tighter than the defaults so that the weights can be compared
+    solvers.options.update(abstol=1e-12, reltol=1e-12, feastol=1e-12)
+    solution = solvers.qp(cvxopt.matrix(cov.values), cvxopt.matrix(0.0, (n, 1)), \
+                          cvxopt.matrix(-np.identity(n)), cvxopt.matrix(0.0, (n, 1)), \
+                          cvxopt.matrix(1.0, (1, n)), cvxopt.matrix(1.0))
+    return pd.Series(np.array(solution['x']).ravel(), index=cov.index)
+
+
+def random_covariances(rng, count):
+    for i in range(count):
+        n = rng.randint(2, 30)
+        # fewer observations than assets gives singular covariances
+        observations = rng.choice([n // 2 + 1, 2 * n, 250])
+        returns = pd.DataFrame(rng.normal(0.0005, 0.02, (observations, n)) + \
+                               rng.normal(0, 0.01, (observations, 1)), \
+                               columns=["T{}".format(j) for j in range(n)])
+        yield returns.cov()
+
+
+class MinVarianceSolverTest(unittest.TestCase):
+
+    @unittest.skipIf(cvxopt is None, "needs cvxopt")
+    def test_matches_qp(self):
+        rng = np.random.RandomState(0)
+        solver = MinVarianceSolver()
+        for cov in random_covariances(rng, 60):
+            weights = solver.solve(cov)
+            expected = qp_min_variance(cov)
+
+            self.assertAlmostEqual(weights.sum(), 1.0)
+            self.assertTrue((weights >= 0).all())
+
+            variance = weights.dot(cov).dot(weights)
+            expected_variance = expected.dot(cov).dot(expected)
+            # never worse than the QP solution beyond its tolerance
+            self.assertLessEqual(variance, expected_variance * (1 + 1e-6))
+
+            if np.linalg.matrix_rank(cov.values) == len(cov):
+                # the optimum is unique for definite covariances
+                self.assertTrue(np.allclose(weights.values, expected.values, atol=1e-4))
+
+    def test_warm_start_gives_same_solution(self):
+        rng = np.random.RandomState(1)
+        warm = MinVarianceSolver()
+        for cov in random_covariances(rng, 20):
+            cold = MinVarianceSolver().solve(cov)
+            self.assertTrue(np.allclose(warm.solve(cov).values, cold.values, atol=1e-8))
+
+    def test_non_finite_covariance(self):
+        cov = pd.DataFrame([[np.nan, np.nan], [np.nan, np.nan]], index=['A', 'B'], columns=['A', 'B'])
+        self.assertRaises(ValueError, MinVarianceSolver().solve, cov)
+        self.assertEqual(list(MinVarianceSolver().solve_or_equal(cov).values), [0.5, 0.5])
+
+    def test_zero_covariance(self):
+        weights = MinVarianceSolver().solve(pd.DataFrame([[0.0]]))
+        self.assertEqual(list(weights.values), [1.0])
+
+        cov = pd.DataFrame(np.zeros((4, 4)), index=list('ABCD'), columns=list('ABCD'))
+        self.assertTrue(np.allclose(MinVarianceSolver().solve(cov).values, 0.25))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+import pandas as pd
+from finance import InvestmentPortfolio
+from finance import PortfolioReturns
+
+
+class PortfolioReturnsTest(unittest.TestCase):
+
+    def setUp(self):
+        dates = pd.bdate_range('2016-01-04', periods=6)
+        self.prices = pd.DataFrame({'A': [1.0, 1.1, 1.21, 1.1, 1.0, 1.2], \
+                                    'B': [2.0, 2.0, 1.8, 1.9, 2.1, 2.0]}, index=dates)
+
+    def test_calculate_without_rebalances(self):
+        returns = PortfolioReturns(self.prices).calculate(pd.DataFrame())
+        self.assertTrue(returns.index.equals(self.prices.index[1:]))
+        self.assertTrue((returns == 0).all())
+
+        returns = InvestmentPortfolio().calculate_portfolio_returns(self.prices)
+        self.assertTrue(returns.index.equals(self.prices.index[1:]))
+        self.assertTrue((returns == 0).all())
+
+    def test_calculate_matches_step(self):
+        weights = pd.DataFrame({'A': [1.0, 0.5], 'B': [0.0, 0.5]}, index=self.prices.index[[1, 3]])
+
+        streamed = PortfolioReturns(self.prices)
+        for date in self.prices.index[1:]:
+            if date in weights.index:
+                streamed.rebalance(date, weights.loc[date])
+            streamed.step(date)
+
+        returns = PortfolioReturns(self.prices).calculate(weights)
+        self.assertTrue(np.allclose(returns.values, streamed.get_returns().values))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import pandas as pd
+from learn import QLearner
+from learn import ArrayQLearner
+from learn import BatchQLearner
+
+ACTIONS = ["BUY", "SELL"]
+ITEMS = ["ITEM_0", "ITEM_1"]
+
+
+def random_steps(seed, steps=200, tickers=15):
+    """ Yields state frames and rewards where tickers often share a state. """
+    rng = np.random.RandomState(seed)
+    columns = ["T{}".format(i) for i in range(tickers)]
+    for i in range(steps):
+        states = pd.DataFrame(rng.randint(0, 3, (len(ITEMS), tickers)), index=ITEMS, columns=columns)
+        yield states, pd.Series(rng.normal(0, 1, tickers), index=columns)
+
+
+class QLearnerTest(unittest.TestCase):
+
+    def assert_same_learning(self, learner, expected):
+        for states, rewards in random_steps(0):
+            actions = learner.get_actions_for_states(states)
+            self.assertEqual(actions, expected.get_actions_for_states(states))
+
+            codes = learner.get_action_codes_for_states(states)
+            self.assertEqual(codes.dtype, np.int8)
+            self.assertEqual([ACTIONS[code] for code in codes], [actions[ticker] for ticker in states.columns])
+
+            learner.reward(states, rewards)
+            expected.reward(states, rewards)
+
+        q_table = expected.get_q_table()
+        self.assertTrue(np.allclose(learner.get_q_table().loc[q_table.index].values, q_table.values))
+        self.assertEqual(learner.get_q_size(), expected.get_q_size())
+
+    def test_array_learner_matches_dictionary_learner(self):
+        self.assert_same_learning(ArrayQLearner(None, ACTIONS, ITEMS, alpha=0.3), \
+                                  QLearner(None, ACTIONS, ITEMS, alpha=0.3))
+
+    def test_batch_learner_matches_array_learner(self):
+        batch = BatchQLearner(3, ACTIONS, ITEMS, alpha=[0.1, 0.3, 0.5])
+        self.assert_same_learning(batch.learner(1), ArrayQLearner(None, ACTIONS, ITEMS, alpha=0.3))
+
+        # the other learners were not touched
+        self.assertEqual(batch.get_q_size(0), 0)
+        self.assertEqual(batch.get_q_size(2), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
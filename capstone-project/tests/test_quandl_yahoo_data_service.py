@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+from data import QuandlYahooDataService
+
+DATES = pd.bdate_range('2016-01-04', '2016-03-31')
+
+
+def series(key):
+    """ A deterministic series per requested key. """
+    return pd.Series(np.arange(len(DATES)) + float(sum(map(ord, key))), index=DATES)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """ Serves yahoo price tables and quandl datasets as csv like the real
+        services do, restricted to the requested dates.
+    """
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = dict((name, values[0]) for name, values in parse_qs(url.query).items())
+
+        if url.path.startswith('/yahoo'):
+            start = pd.Timestamp(int(query['c']), int(query['a']) + 1, int(query['b']))
+            end = pd.Timestamp(int(query['f']), int(query['d']) + 1, int(query['e']))
+            key, column = query['s'], "Adj Close"
+        else:
+            start, end = pd.Timestamp(query['start_date']), pd.Timestamp(query['end_date'])
+            key, column = url.path.split('/datasets/')[1][:-len('.csv')], "Value"
+        StandInHandler.requests.append((key, start, end))
+
+        # newest first as the real services
+        values = series(key).loc[start:end].sort_index(ascending=False)
+        body = values.to_frame(column).rename_axis("Date").to_csv().encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class QuandlYahooDataServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        StandInHandler.requests = []
+        self.server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.cache_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_directory)
+
+    def service(self):
+        url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        return QuandlYahooDataService(cache_directory=self.cache_directory, threads=4, \
+                                      yahoo_url=url + "/yahoo", quandl_url=url + "/datasets")
+
+    def test_get_data(self):
+        with self.service() as service:
+            data = service.get_data(['PRICE', 'EBIT'], ['AAPL', 'MSFT'], start='2016-01-04', end='2016-02-29')
+
+        self.assertEqual(data.items, ['EBIT', 'PRICE'])
+        expected = series('MSFT').loc['2016-01-04':'2016-02-29']
+        self.assertTrue(np.allclose(data.get('PRICE')['MSFT'].values, expected.values))
+        self.assertTrue(np.allclose(data.get('EBIT')['AAPL'].values, \
+                                    series('SF1/AAPL_EBIT_ART').loc['2016-01-04':'2016-02-29'].values))
+
+    def test_incremental_refresh(self):
+        with self.service() as service:
+            service.get_data(['PRICE', 'EBIT'], ['AAPL', 'MSFT'], start='2016-01-04', end='2016-02-29')
+        self.assertEqual(len(StandInHandler.requests), 4)
+
+        StandInHandler.requests = []
+        with self.service() as service:
+            data = service.get_data(['PRICE', 'EBIT'], ['AAPL', 'MSFT'], start='2016-01-04', end='2016-03-31')
+
+        # only the dates after the cached range are downloaded
+        self.assertEqual(len(StandInHandler.requests), 4)
+        for key, start, end in StandInHandler.requests:
+            self.assertEqual(start, pd.Timestamp('2016-03-01'))
+            self.assertEqual(end, pd.Timestamp('2016-03-31'))
+
+        self.assertTrue(np.allclose(data.get('PRICE')['AAPL'].values, series('AAPL').values))
+
+        StandInHandler.requests = []
+        with self.service() as service:
+            service.get_data(['PRICE'], ['AAPL'], start='2016-02-01', end='2016-03-31')
+        self.assertEqual(StandInHandler.requests, [])
+
+    def test_close(self):
+        service = self.service()
+        service.get_data(['PRICE'], ['AAPL'], start='2016-01-04', end='2016-01-29')
+        before = threading.active_count()
+        service.close()
+        self.assertLess(threading.active_count(), before)
+
+        # usable again after closing
+        data = service.get_data(['PRICE'], ['AAPL'], start='2016-01-04', end='2016-01-29')
+        self.assertEqual(len(data.dates), len(DATES[DATES <= '2016-01-29']))
+        service.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
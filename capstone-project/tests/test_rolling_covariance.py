@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import pandas as pd
+from finance import RollingCovariance
+
+
+def returns_with_gaps(seed, dates=80, tickers=6):
+    rng = np.random.RandomState(seed)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (dates, tickers)), \
+                           index=pd.bdate_range('2016-01-04', periods=dates), \
+                           columns=["T{}".format(i) for i in range(tickers)])
+    # a ticker listed later and a few missing returns
+    returns.iloc[:30, 1] = np.nan
+    returns.iloc[[5, 17, 40], 3] = np.nan
+    return returns
+
+
+class RollingCovarianceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.returns = returns_with_gaps(0)
+        self.tickers = ['T0', 'T1', 'T3', 'T5']
+
+    def assert_matches_pandas(self, covariance, date, lookback):
+        window = self.returns.loc[:date, self.tickers]
+        if lookback is not None:
+            window = window.iloc[-lookback:]
+        expected = window.cov()
+
+        result = covariance.covariance(date, self.tickers)
+        self.assertEqual(list(result.index), self.tickers)
+        self.assertEqual(list(result.columns), self.tickers)
+        self.assertTrue(np.allclose(result.values, expected.values, equal_nan=True))
+
+    def test_expanding_window(self):
+        covariance = RollingCovariance(self.returns)
+        for date in self.returns.index:
+            self.assert_matches_pandas(covariance, date, None)
+
+    def test_lookback_window(self):
+        covariance = RollingCovariance(self.returns, lookback=20)
+        for date in self.returns.index[::3]:
+            self.assert_matches_pandas(covariance, date, 20)
+
+    def test_jumps_through_time(self):
+        covariance = RollingCovariance(self.returns, lookback=10)
+        for position in [50, 70, 12, 13, 79, 0]:
+            self.assert_matches_pandas(covariance, self.returns.index[position], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+import pandas as pd
+from finance import RollingSharpe
+
+
+class RollingSharpeTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.returns = pd.DataFrame(rng.normal(0.001, 0.02, (60, 5)), \
+                                    index=pd.bdate_range('2016-01-04', periods=60), \
+                                    columns=["T{}".format(i) for i in range(5)])
+        # a ticker listed later
+        self.returns.iloc[:10, 2] = np.nan
+
+    def expected(self, date_from, date_to):
+        """ The cumulative returns, standard deviations and Sharpe ratios as
+            TradingAgent computed them from a slice of the returns.
+        """
+        returns_slice = self.returns.loc[date_from:date_to]
+        cum_returns = ((returns_slice + 1).apply(lambda s: s.cumprod()) - 1).iloc[-1]
+        std = returns_slice.std()
+        return cum_returns, std, cum_returns / std
+
+    def test_window_matches_slice(self):
+        sharpe = RollingSharpe(self.returns)
+        dates = self.returns.index
+        for first, last in [(0, 12), (8, 14), (11, 12), (20, 59), (0, 59), (30, 30)]:
+            result = sharpe.window(dates[first], dates[last])
+            for values, expected in zip(result, self.expected(dates[first], dates[last])):
+                self.assertTrue(values.index.equals(expected.index))
+                self.assertTrue(np.allclose(values.values, expected.values, equal_nan=True))
+
+    def test_windows_match_window(self):
+        sharpe = RollingSharpe(self.returns)
+        dates_from = self.returns.index[[0, 15, 40]]
+        dates_to = self.returns.index[[5, 30, 45]]
+
+        frames = sharpe.windows(dates_from, dates_to)
+        for i in range(len(dates_from)):
+            for frame, values in zip(frames, sharpe.window(dates_from[i], dates_to[i])):
+                self.assertEqual(frame.index[i], dates_from[i])
+                self.assertTrue(np.allclose(frame.iloc[i].values, values.values, equal_nan=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+import pandas as pd
+from Benchmark import Benchmark
+from TradingAgent import TradingAgent
+from schedule import Calendar
+from schedule import EveryNDaysCalendar
+from schedule import PeriodEndCalendar
+from schedule import EventCalendar
+from schedule import Scheduler
+
+ITEMS = [Benchmark.state_item(0), Benchmark.state_item(1)]
+
+
+class CalendarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dates = pd.bdate_range('2016-01-04', '2016-06-30')
+
+    def test_every_n_days(self):
+        self.assertTrue(EveryNDaysCalendar(5, offset=2).dates(self.dates).equals(self.dates[2::5]))
+
+    def test_period_end(self):
+        dates = PeriodEndCalendar('M').dates(self.dates)
+        self.assertEqual([str(date.date()) for date in dates], \
+                         ['2016-01-29', '2016-02-29', '2016-03-31', '2016-04-29', '2016-05-31', '2016-06-30'])
+
+    def test_events(self):
+        # a release on a weekend is acted on the next trading date
+        dates = EventCalendar(['2016-02-06', '2016-05-02', '2017-01-01'], lag=1).dates(self.dates)
+        self.assertEqual(list(dates), [pd.Timestamp('2016-02-09'), pd.Timestamp('2016-05-03')])
+
+    def test_incomplete_subclass(self):
+        class Incomplete(Calendar):
+            pass
+
+        self.assertRaises(TypeError, Incomplete)
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def test_trades_events_from_first_date(self):
+        data = Benchmark(seed=1).synthetic_panel(200, 8, len(ITEMS))
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5, array_learner=True)
+
+        scheduler = Scheduler(agent, EveryNDaysCalendar(5), horizon=5)
+        scheduler.trade()
+
+        weights = agent.get_portfolio().get_portfolio_weights()
+        self.assertEqual(list(weights.index), list(scheduler.get_dates()))
+        self.assertTrue(np.isfinite(weights.values).all())
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1.0))
+
+        performance = agent.get_performance()
+        prices = data.get('PRICE').assign(CASH=1.0)
+        returns = agent.get_portfolio().calculate_portfolio_returns(prices)
+        # the first date has no return
+        self.assertEqual(performance.iloc[0], 0.0)
+        self.assertTrue(np.allclose(performance.iloc[1:].values, returns.loc[performance.index[1:]].values))
+
+    def test_rewards_are_due_after_the_horizon(self):
+        data = Benchmark(seed=1).synthetic_panel(120, 4, len(ITEMS))
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5)
+
+        events = list(Scheduler(agent, PeriodEndCalendar('M'), horizon=3).events())
+        acts = [event[1] for event in events if event[0] == 'act']
+        rewards = [event for event in events if event[0] == 'reward']
+
+        # except for the last month end which is not due within the data
+        self.assertEqual([event[2] for event in rewards], acts[:-1])
+        for kind, date, act_date in rewards:
+            self.assertEqual(data.dates.get_loc(date) - data.dates.get_loc(act_date), 3)
+        self.assertEqual([event[1] for event in events], sorted(event[1] for event in events))
+
+
+if __name__ == '__main__':
+    unittest.main()
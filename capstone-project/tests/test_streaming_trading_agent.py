@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from Benchmark import Benchmark
+from StreamingTradingAgent import StreamingTradingAgent
+
+ITEMS = [Benchmark.state_item(0), Benchmark.state_item(1)]
+
+
+class StreamingTradingAgentTest(unittest.TestCase):
+
+    def run_agent(self, data, **agent_args):
+        agent = StreamingTradingAgent(data.iter_chunks(50), 'PRICE', ITEMS, 0.5, \
+                                      array_learner=True, cov_lookback=60, **agent_args)
+        agent.learn(120, 5)
+        agent.trade(5)
+        return agent
+
+    def test_without_history(self):
+        data = Benchmark(seed=2).synthetic_panel(300, 6, len(ITEMS))
+        kept = self.run_agent(data)
+
+        events = []
+        streamed = self.run_agent(data, history=False, sink=lambda *event: events.append(event))
+        self.assertIsNone(streamed.get_portfolio())
+        self.assertEqual(len(streamed.get_performance()), 0)
+
+        performance = kept.get_performance()
+        returns = [value for kind, date, value in events if kind == 'return']
+        self.assertTrue(np.allclose(returns, performance.values))
+
+        rebalances = [date for kind, date, value in events if kind == 'rebalance']
+        self.assertEqual(rebalances, list(kept.get_portfolio().get_portfolio_weights().index))
+
+        self.assertAlmostEqual(streamed.get_cumulative_return(), (performance + 1).prod() - 1)
+        self.assertAlmostEqual(kept.get_cumulative_return(), streamed.get_cumulative_return())
+
+    def test_trades_before_covariance_is_known(self):
+        data = Benchmark(seed=2).synthetic_panel(100, 6, len(ITEMS))
+        # a ticker listed later has no returns to estimate its covariance from
+        data.values[data.items.index('PRICE'), :30, 0] = np.nan
+
+        agent = StreamingTradingAgent(data.iter_chunks(50), 'PRICE', ITEMS, 0.5, array_learner=True)
+        agent.trade(5)
+
+        weights = agent.get_portfolio().get_portfolio_weights()
+        self.assertGreater(len(weights), 0)
+        self.assertTrue(np.allclose(weights.sum(axis=1).values, 1.0))
+        self.assertTrue(np.isfinite(agent.get_performance().values).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from learn import QLearner
+from learn import ArrayQLearner
+from Benchmark import Benchmark
+from TradeRecorder import TradeRecorder
+from TradingAgent import TradingAgent
+from tests.test_q_learner import ACTIONS, ITEMS, random_steps
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TradeRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record_learning(self, learner):
+        recorder = TradeRecorder(ITEMS, ACTIONS, capacity=4)
+        for i, (states, rewards) in enumerate(random_steps(1, steps=20, tickers=6)):
+            recorder.set_date(pd.Timestamp('2016-01-04') + pd.Timedelta(days=i))
+            learner.get_actions_for_states(states, recorder=recorder)
+            learner.reward(states, rewards, recorder=recorder)
+        return recorder
+
+    def test_record(self):
+        recorder = TradeRecorder(ITEMS, ACTIONS, capacity=2)
+        recorder.set_date('2016-01-04')
+        recorder.record('choose', ['AAPL', 'MSFT'], states=np.array([[0, 1], [2, 2]]), \
+                        action=['BUY', 'SELL'], q_before=[0.1, 0.2], q_after=[0.1, 0.2])
+        recorder.set_date('2016-01-05')
+        recorder.record('reward', ['MSFT', 'IBM', 'AAPL'], action_taken=['SELL', 'BUY', 'BUY'], \
+                        reward=[1.0, -1.0, 0.5])
+        self.assertRaises(ValueError, recorder.record, 'reward', ['AAPL'], sharpe_ratio=[1.0])
+
+        frame = recorder.to_frame()
+        self.assertEqual(len(recorder), 5)
+        self.assertEqual(list(frame['date']), [pd.Timestamp('2016-01-04')] * 2 + [pd.Timestamp('2016-01-05')] * 3)
+        self.assertEqual(list(frame['kind']), ['choose'] * 2 + ['reward'] * 3)
+        self.assertEqual(list(frame['ticker']), ['AAPL', 'MSFT', 'MSFT', 'IBM', 'AAPL'])
+        self.assertEqual(list(frame['ITEM_1']), [1, 2, -1, -1, -1])
+        self.assertEqual(list(frame['action'].astype(object).fillna('')), ['BUY', 'SELL', '', '', ''])
+        self.assertTrue(np.allclose(frame['reward'].values, [np.nan, np.nan, 1.0, -1.0, 0.5], equal_nan=True))
+
+        rewards = recorder.to_frame(kind='reward')
+        self.assertEqual(list(rewards['action_taken']), ['SELL', 'BUY', 'BUY'])
+        self.assertTrue(rewards['q_before'].isnull().all())
+
+    def test_learners_record_the_same(self):
+        expected = self.record_learning(QLearner(None, ACTIONS, ITEMS, alpha=0.3)).to_frame()
+        frame = self.record_learning(ArrayQLearner(None, ACTIONS, ITEMS, alpha=0.3)).to_frame()
+
+        # the Q of an update differs for tickers sharing a state as the
+        # dictionary learner records it ticker by ticker
+        for kind, values in [('choose', ['q_before', 'q_after']), ('update', ['reward'])]:
+            rows = (frame['kind'] == kind).values
+            expected_rows = (expected['kind'] == kind).values
+            for column in ['date', 'ticker', 'ITEM_0', 'ITEM_1', 'action']:
+                self.assertEqual(list(frame.loc[rows, column]), list(expected.loc[expected_rows, column]))
+            for column in values:
+                self.assertTrue(np.allclose(frame.loc[rows, column].values, \
+                                            expected.loc[expected_rows, column].values))
+
+    def test_agent_records_its_steps(self):
+        data = Benchmark(seed=1).synthetic_panel(300, 6, len(ITEMS))
+        recorder = TradeRecorder(ITEMS, ACTIONS)
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5, array_learner=True, precompute=True, recorder=recorder)
+        agent.learn(100, 5)
+        agent.trade(5)
+
+        frame = recorder.to_frame()
+        counts = frame['kind'].value_counts()
+        self.assertEqual(counts['choose'] % 6, 0)
+        self.assertEqual(counts['reward'], counts['update'])
+        self.assertEqual(set(frame['ticker']), set(data.tickers))
+
+    @unittest.skipIf(pyarrow is None, "needs pyarrow")
+    def test_export(self):
+        recorder = self.record_learning(ArrayQLearner(None, ACTIONS, ITEMS))
+        expected = recorder.to_frame()
+
+        path = os.path.join(self.directory, 'trades.parquet')
+        recorder.to_parquet(path)
+        self.assertTrue(pd.read_parquet(path).equals(expected))
+
+        path = os.path.join(self.directory, 'trades.feather')
+        recorder.to_feather(path)
+        self.assertTrue(pd.read_feather(path).equals(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from Benchmark import Benchmark
+from BatchTradingAgent import BatchTradingAgent
+from Instrumentation import Instrumentation
+from TradeRecorder import TradeRecorder
+from TradingAgent import TradingAgent
+
+ITEMS = [Benchmark.state_item(0), Benchmark.state_item(1)]
+
+
+def synthetic_panel(dates=340, tickers=8):
+    return Benchmark(seed=1).synthetic_panel(dates, tickers, len(ITEMS))
+
+
+class CountingLearner(object):
+    """ Wraps a learner and counts the calls of get_q_size. """
+
+    def __init__(self, learner):
+        self.learner = learner
+        self.q_size_calls = 0
+
+    def get_q_size(self):
+        self.q_size_calls += 1
+        return self.learner.get_q_size()
+
+    def __getattr__(self, name):
+        return getattr(self.learner, name)
+
+
+class TradingAgentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_resumes(self, data, checkpoint_dates, start=0, **agent_args):
+        """ Trades on the dates from start, checkpoints, resumes on all dates
+            and compares with trading the dates from start without interruption.
+        """
+        path = os.path.join(self.directory, 'agent.npz')
+
+        continuous = TradingAgent(data.iloc_dates(start), 'PRICE', ITEMS, 0.5, **agent_args)
+        continuous.learn(120, 5)
+        continuous.trade(5)
+
+        first = TradingAgent(data.iloc_dates(start, checkpoint_dates), 'PRICE', ITEMS, 0.5, **agent_args)
+        first.learn(120, 5)
+        first.trade(5)
+        first.save_checkpoint(path)
+
+        resumed = TradingAgent(data, 'PRICE', ITEMS, 0.5, **agent_args)
+        resumed.load_checkpoint(path)
+        resumed.trade(5)
+
+        expected = continuous.get_portfolio().get_portfolio_weights()
+        weights = resumed.get_portfolio().get_portfolio_weights()
+        self.assertTrue(weights.index.equals(expected.index))
+        self.assertTrue(np.allclose(weights.loc[:, expected.columns].values, expected.values))
+
+        performance = resumed.get_performance()
+        self.assertTrue(performance.index.equals(continuous.get_performance().index))
+        self.assertTrue(np.allclose(performance.values, continuous.get_performance().values))
+
+        prices = data.iloc_dates(start).get('PRICE').assign(CASH=1.0)
+        self.assertTrue(np.allclose(resumed.get_portfolio().calculate_portfolio_returns(prices).values, \
+                                    continuous.get_portfolio().calculate_portfolio_returns(prices).values))
+
+        q_table = resumed.get_learner().get_q_table()
+        self.assertTrue(np.allclose(q_table.values, continuous.get_learner().get_q_table().loc[q_table.index].values))
+
+    def test_checkpoint_resumes_trading(self):
+        self.assert_resumes(synthetic_panel(), 250, array_learner=True, precompute=True)
+        self.assert_resumes(synthetic_panel(), 250, precompute=True)
+
+    def test_checkpoint_resumes_on_earlier_start(self):
+        self.assert_resumes(synthetic_panel(), 250, start=20, array_learner=True, precompute=True, cov_lookback=60)
+
+    def test_checkpoint_resumes_random_trading(self):
+        self.assert_resumes(synthetic_panel(600), 470, random=True, seed=3)
+
+    def test_reward_windows(self):
+        data = synthetic_panel()
+        recorder = TradeRecorder(ITEMS, ["BUY", "SELL"])
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5, array_learner=True, precompute=True, recorder=recorder)
+        agent.learn(100, 5)
+        recorded = len(recorder)
+        agent.trade(5)
+
+        # each rebalance rewards the actions taken 5 dates before over the
+        # returns up to the rebalance
+        dates = list(data.dates)
+        rebalances = agent.get_portfolio().get_portfolio_weights().index
+        self.assertGreater(len(rebalances), 0)
+        rewards = recorder.to_frame().iloc[recorded:]
+        rewards = rewards.loc[rewards['kind'] == 'reward']
+        self.assertEqual(sorted(set(rewards['date'])), [dates[dates.index(date) - 5] for date in rebalances])
+
+        returns = data.get('PRICE').pct_change(fill_method=None)
+        for date in rebalances:
+            window = returns.loc[dates[dates.index(date) - 5]:date]
+            std = rewards.loc[rewards['date'] == window.index[0]].set_index('ticker')['std']
+            self.assertTrue(np.allclose(std.loc[window.columns].values, window.std().values))
+
+    def test_batch_matches_separate_agents(self):
+        datas = [synthetic_panel(), Benchmark(seed=2).synthetic_panel(340, 5, len(ITEMS)), \
+                 Benchmark(seed=3).synthetic_panel(300, 11, len(ITEMS))]
+        alphas = [0.5, 0.3, 0.7]
+
+        batch = BatchTradingAgent(datas, 'PRICE', ITEMS, alphas, precompute=True)
+        batch.learn(120, 5)
+        batch.trade(5)
+
+        for i, (data, alpha) in enumerate(zip(datas, alphas)):
+            agent = TradingAgent(data, 'PRICE', ITEMS, alpha, precompute=True, array_learner=True)
+            agent.learn(120, 5)
+            agent.trade(5)
+
+            batch_agent = batch.get_agents()[i]
+            expected = agent.get_portfolio().get_portfolio_weights()
+            weights = batch_agent.get_portfolio().get_portfolio_weights()
+            self.assertGreater(len(expected), 0)
+            self.assertEqual(list(weights.index), list(expected.index))
+            self.assertTrue(np.array_equal(weights.loc[:, expected.columns].values, expected.values))
+            self.assertTrue(np.array_equal(batch_agent.get_performance().values, agent.get_performance().values))
+            self.assertTrue(np.array_equal(batch.get_learner().get_q_table(i).values, \
+                                           agent.get_learner().get_q_table().values))
+
+    def test_checkpoint_of_batch_agents(self):
+        datas = [synthetic_panel(), Benchmark(seed=2).synthetic_panel(340, 8, len(ITEMS))]
+        batch = BatchTradingAgent(datas, 'PRICE', ITEMS, 0.5)
+        batch.learn(120, 5)
+
+        path = os.path.join(self.directory, 'batch.npz')
+        batch.get_agents()[1].save_checkpoint(path)
+
+        agent = TradingAgent(datas[1], 'PRICE', ITEMS, 0.5, array_learner=True)
+        agent.load_checkpoint(path)
+        expected = batch.get_learner().get_q_table(1)
+        self.assertTrue(np.allclose(agent.get_learner().get_q_table().loc[expected.index].values, expected.values))
+
+        other = BatchTradingAgent(datas, 'PRICE', ITEMS, 0.5)
+        other.get_agents()[1].load_checkpoint(path)
+        self.assertTrue(np.allclose(other.get_learner().get_q_table(1).values, expected.values))
+        self.assertEqual(other.get_learner().get_q_size(0), 0)
+
+    def test_q_size_only_computed_when_read(self):
+        data = synthetic_panel()
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5, array_learner=True, seed=0)
+        learner = CountingLearner(agent.get_learner())
+
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5, learner=learner, seed=0)
+        agent.learn(100, 5)
+        self.assertEqual(learner.q_size_calls, 0)
+
+        instrumentation = Instrumentation()
+        agent = TradingAgent(data, 'PRICE', ITEMS, 0.5, learner=learner, seed=0, instrumentation=instrumentation)
+        agent.learn(100, 5)
+        self.assertEqual(learner.q_size_calls, 0)
+
+        counters = instrumentation.get_counters()
+        self.assertEqual(counters['q_table_size'], learner.learner.get_q_size())
+        self.assertGreater(counters['rewards'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()